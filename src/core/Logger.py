@@ -1,11 +1,150 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+DEFAULT_CAPACITY = 5000
+
+
+@dataclass
+class LogEvent:
+    seq: int
+    time: float
+    level: str
+    message: str
+    session: str
+
+
+class LogSession:
+    """Event log of one analysis.
+
+    Events are kept in a bounded ring buffer and numbered, so a view can poll for the
+    events after the last one it rendered (:meth:`events_since`) and append only those,
+    at whatever rate it chooses, instead of being pushed the whole history on every
+    message. Events can also be appended to a JSONL file. The session also tracks the
+    analysis' current stage, for progress displays, and the LLM tokens it used.
+
+    Args:
+        name (str): Name recorded with every event, e.g. the analysed repository.
+        capacity (int): Number of most recent events kept in memory.
+        log_file (str | None): Optional JSONL file events are appended to.
+        min_level (str): Events below this level are dropped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = DEFAULT_CAPACITY,
+        log_file: str | None = None,
+        min_level: str = "info",
+    ):
+        self.name = name
+        self.stage = "Starting"
+        self.started = time.time()
+        self.tokens = 0
+        self.min_level = LEVELS[min_level]
+        self._events = deque(maxlen=capacity)
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        self._sink = open(log_file, "a", encoding="utf-8") if log_file else None
+
+    def append(self, message: str, level: str = "info") -> None:
+        if LEVELS.get(level, LEVELS["info"]) < self.min_level:
+            return
+        with self._lock:
+            event = LogEvent(self._next_seq, time.time(), level, message, self.name)
+            self._next_seq += 1
+            self._events.append(event)
+            if self._sink is not None:
+                self._sink.write(json.dumps(asdict(event)) + "\n")
+
+    def events_since(self, seq: int) -> tuple[list[LogEvent], int]:
+        """Returns the buffered events numbered ``seq`` or later.
+
+        Returns:
+            tuple[list[LogEvent], int]: The events, and how many events after ``seq`` were
+            already dropped from the ring buffer.
+        """
+        with self._lock:
+            if not self._events or self._next_seq <= seq:
+                return [], 0
+            first = self._events[0].seq
+            start = max(seq - first, 0)
+            events = [self._events[i] for i in range(start, len(self._events))]
+        return events, max(first - seq, 0)
+
+    def record_tokens(self, tokens: int) -> None:
+        with self._lock:
+            self.tokens += tokens
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq
+
+    def close(self) -> None:
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+
 class Logger:
-    messages = []
-    screen = None
+    """Entry point for logging; events go to the log session of the current context.
+
+    Each analysis runs inside :meth:`session`, which binds a :class:`LogSession` to the
+    current context, so concurrent analyses log separately. Threads do not inherit the
+    context: code starting long-lived threads or pools should run their work through
+    ``contextvars.copy_context().run``. Events logged outside any session go to
+    ``Logger.default_session``.
+    """
+
+    default_session = LogSession("default")
+    _current: contextvars.ContextVar[LogSession | None] = contextvars.ContextVar(
+        "log_session", default=None
+    )
 
     @classmethod
-    def log(cls, message: str) -> None:
-        cls.messages.append(message)
-        if cls.screen:
-            cls.screen.app.call_from_thread(
-                setattr, cls.screen, "display_output", "<br>  \n".join(cls.messages)
-            )
+    def log(cls, message: str, level: str = "info") -> None:
+        cls.current_session().append(message, level)
+
+    @classmethod
+    def stage(cls, name: str) -> None:
+        """Marks the start of a new stage of the current analysis."""
+        session = cls.current_session()
+        session.stage = name
+        session.append(f"== {name} ==")
+
+    @classmethod
+    def record_tokens(cls, tokens: int) -> None:
+        """Adds LLM tokens used to the current analysis' total."""
+        cls.current_session().record_tokens(tokens)
+
+    @classmethod
+    def current_session(cls) -> LogSession:
+        return cls._current.get() or cls.default_session
+
+    @classmethod
+    @contextlib.contextmanager
+    def session(cls, name: str, capacity: int = DEFAULT_CAPACITY):
+        """Binds a new log session to the current context for the duration of the block.
+
+        The session writes to ``$PAPERPROBE_LOG_FILE`` (JSONL) if set, and keeps events
+        at or above ``$PAPERPROBE_LOG_LEVEL`` (default ``info``).
+        """
+        log_session = LogSession(
+            name,
+            capacity=capacity,
+            log_file=os.getenv("PAPERPROBE_LOG_FILE") or None,
+            min_level=os.getenv("PAPERPROBE_LOG_LEVEL", "info").lower(),
+        )
+        token = cls._current.set(log_session)
+        try:
+            yield log_session
+        finally:
+            cls._current.reset(token)
+            log_session.close()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, ToolMessage, messages_from_dict, messages_to_dict
+
+from src.core.paths import get_cache_dir
+from src.tool_providers.output_budget import estimate_tokens
+
+# Checkpoints older than this are ignored (and removed), since the clone they describe has
+# most likely changed since.
+CHECKPOINT_TTL_SECONDS = 24 * 3600
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+@dataclass
+class AgentBudget:
+    """Limits on an agentic task, counted across resumed attempts. ``None`` means no limit."""
+
+    max_steps: int | None = 80
+    max_seconds: float | None = 1800.0
+    max_tokens: int | None = None
+
+    @classmethod
+    def from_env(cls) -> "AgentBudget":
+        """Builds a budget from ``PAPERPROBE_AGENT_MAX_STEPS`` (model calls),
+        ``PAPERPROBE_AGENT_MAX_SECONDS`` and ``PAPERPROBE_AGENT_MAX_TOKENS``; ``0`` disables
+        a limit."""
+        budget = cls()
+        if os.getenv("PAPERPROBE_AGENT_MAX_STEPS"):
+            budget.max_steps = int(os.environ["PAPERPROBE_AGENT_MAX_STEPS"]) or None
+        if os.getenv("PAPERPROBE_AGENT_MAX_SECONDS"):
+            budget.max_seconds = float(os.environ["PAPERPROBE_AGENT_MAX_SECONDS"]) or None
+        if os.getenv("PAPERPROBE_AGENT_MAX_TOKENS"):
+            budget.max_tokens = int(os.environ["PAPERPROBE_AGENT_MAX_TOKENS"]) or None
+        return budget
+
+    def exceeded(self, progress: "AgentProgress") -> str | None:
+        """Returns why ``progress`` exceeds the budget, or ``None`` if it does not."""
+        if self.max_steps is not None and progress.steps >= self.max_steps:
+            return f"step budget of {self.max_steps} model calls reached"
+        if self.max_seconds is not None and progress.seconds >= self.max_seconds:
+            return f"time budget of {self.max_seconds:.0f}s reached"
+        if self.max_tokens is not None and progress.tokens >= self.max_tokens:
+            return f"token budget of {self.max_tokens} tokens reached"
+        return None
+
+
+@dataclass
+class AgentProgress:
+    """State of an agentic task: its messages so far and what they cost."""
+
+    messages: list = field(default_factory=list)
+    steps: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+
+    def add(self, new_messages: list, seconds: float) -> None:
+        """Accounts for the messages produced since the last call.
+
+        Model calls without usage metadata are estimated from the length of the
+        conversation they were given.
+        """
+        for message in new_messages:
+            self.messages.append(message)
+            if isinstance(message, AIMessage):
+                self.steps += 1
+                usage = message.usage_metadata or {}
+                self.tokens += usage.get("total_tokens") or sum(
+                    estimate_tokens(str(m.content)) for m in self.messages
+                )
+        self.seconds += seconds
+
+
+class AgentCheckpointStore:
+    """Persists the progress of agentic tasks so that failed attempts can be resumed.
+
+    Each task has an append-only JSONL file under ``<cache root>/agent_checkpoints/``;
+    every line records the messages added by one step and the totals spent so far. Lines
+    are only written at consistent points (when no tool call is pending), and a line left
+    incomplete by a crash is ignored, so loading always yields the last good step.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir or get_cache_dir("agent_checkpoints")
+
+    @staticmethod
+    def task_key(scope: str, messages: list, tool_names: list[str]) -> str:
+        """Identifies a task by its scope (e.g. the repository directory), its initial
+        messages and its tools."""
+        payload = json.dumps([scope, messages_to_dict(messages), sorted(tool_names)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def load(self, key: str) -> AgentProgress | None:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > CHECKPOINT_TTL_SECONDS:
+                self.clear(key)
+                return None
+            with open(path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+
+        progress = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("version") != CHECKPOINT_FORMAT_VERSION:
+                return None
+            progress = progress or AgentProgress()
+            progress.messages += messages_from_dict(record["messages"])
+            progress.steps = record["steps"]
+            progress.seconds = record["seconds"]
+            progress.tokens = record["tokens"]
+        return progress
+
+    def append(self, key: str, new_messages: list, progress: AgentProgress) -> None:
+        """Records a step: the messages it added and the totals in ``progress``."""
+        record = {
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "messages": messages_to_dict(new_messages),
+            "steps": progress.steps,
+            "seconds": progress.seconds,
+            "tokens": progress.tokens,
+        }
+        with open(self._path(key), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jsonl")
+
+
+def is_resumable(messages: list) -> bool:
+    """Whether a conversation can be handed back to the agent: no tool call is pending."""
+    return not (messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls)
+
+
+def best_validated_script(messages: list) -> str | None:
+    """Returns the last script that ran successfully with ``run_script`` or
+    ``run_scripts_in_parallel``, or ``None`` if none did."""
+    results = {m.tool_call_id: str(m.content) for m in messages if isinstance(m, ToolMessage)}
+    best = None
+    for message in messages:
+        if not isinstance(message, AIMessage):
+            continue
+        for call in message.tool_calls:
+            output = results.get(call["id"])
+            if output is None:
+                continue
+            if call["name"] == "run_script" and not output.startswith("Error"):
+                best = call["args"].get("script_code", best)
+            elif call["name"] == "run_scripts_in_parallel":
+                scripts = call["args"].get("scripts") or []
+                for i, script in enumerate(scripts, start=1):
+                    section = output.partition(f"=== Script {i} ===\n")[2]
+                    if section and not section.startswith("Error"):
+                        best = script
+    return best
@@ -0,0 +1,330 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from src.core.Logger import Logger
+from src.preprocessing_utilities.import_graph import ImportGraph
+from src.tool_providers.code_analysis_tools_provider import CodeAnalysisToolsProvider
+
+from .llm_service import LLM_CONCURRENCY, call_llm, call_llm_cached
+from .task_manager import clone_and_index, collect_repository_info, get_example_script
+from .workspace import Workspace, repository_name
+
+# Packages with more modules than this are split into several components.
+MAX_COMPONENT_FILES = 12
+# On large repositories only the most central files are summarized.
+MAX_SUMMARIZED_FILES = 150
+FILE_SUMMARY_INPUT_CHARS = 6000
+EXAMPLE_FOCUS_AREAS = 3
+# Bump whenever the summary prompts change, to invalidate cached summaries.
+SUMMARY_FORMAT_VERSION = 1
+
+
+@dataclass
+class Component:
+    """A group of modules summarized together: a package, or part of a large one."""
+
+    name: str
+    modules: list[str]
+    rank: float
+    depends_on: set[str] = field(default_factory=set)
+    summary: str | None = None
+
+
+def partition_modules(graph: ImportGraph) -> list[Component]:
+    """Partitions the repository's modules into components along package boundaries.
+
+    Within a package, modules are ordered by import-graph rank; packages with more than
+    ``MAX_COMPONENT_FILES`` modules are split into consecutive parts. Components are
+    ordered by their total rank, most central first, and record which other components
+    they import from.
+    """
+    packages: dict[str, list[str]] = {}
+    for module, rel_path in graph.module_paths.items():
+        is_package = rel_path.endswith("__init__.py")
+        package = module if is_package else module.rpartition(".")[0]
+        packages.setdefault(package or "(top level)", []).append(module)
+
+    components = []
+    owner = {}
+    for package, modules in packages.items():
+        modules.sort(key=lambda m: (-graph.ranks.get(m, 0.0), m))
+        step = MAX_COMPONENT_FILES
+        chunks = [modules[i : i + step] for i in range(0, len(modules), step)]
+        for i, chunk in enumerate(chunks, start=1):
+            name = package if len(chunks) == 1 else f"{package} (part {i} of {len(chunks)})"
+            components.append(Component(name, chunk, sum(graph.ranks.get(m, 0.0) for m in chunk)))
+            owner.update(dict.fromkeys(chunk, name))
+
+    for component in components:
+        for module in component.modules:
+            for target in graph.edges.get(module, ()):
+                if owner.get(target, component.name) != component.name:
+                    component.depends_on.add(owner[target])
+    components.sort(key=lambda c: (-c.rank, c.name))
+    return components
+
+
+class DetailedAnalysis:
+    """Map-reduce analysis of a cloned repository.
+
+    Map: every file of the most central components is summarized by the LLM from its
+    imports and signatures, then each component is summarized from its file summaries.
+    Summaries are cached by content hash, so unchanged files and components are not
+    summarized again on later analyses. LLM calls run on a pool of ``LLM_CONCURRENCY``
+    threads; files are submitted component by component, most central first, so
+    components complete, and are streamed to ``on_section``, in roughly that order.
+
+    Reduce: the component summaries and their dependencies are combined into an
+    architecture overview, and the agent writes example scripts for the most central
+    components.
+
+    Args:
+        base_dir (str): The clone's directory.
+        code_tools (CodeAnalysisToolsProvider): Provider used for signature summaries.
+        on_section: Optional callable receiving each markdown section as it completes.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        code_tools: CodeAnalysisToolsProvider,
+        on_section: Callable[[str], None] | None = None,
+    ):
+        self.base_dir = base_dir
+        self.code_tools = code_tools
+        self.cache = code_tools.ast_cache
+        self.on_section = on_section or (lambda section: None)
+        self.graph = ImportGraph(base_dir, code_tools.symbol_index)
+
+    def summarize_components(self) -> tuple[list[Component], list[Component]]:
+        """Runs the map stage.
+
+        Returns:
+            tuple[list[Component], list[Component]]: The summarized components and those
+            left out because the repository exceeds ``MAX_SUMMARIZED_FILES``.
+        """
+        self.graph.build()
+        components = partition_modules(self.graph)
+        selected, budget = [], MAX_SUMMARIZED_FILES
+        for component in components:
+            if len(component.modules) > budget:
+                break
+            selected.append(component)
+            budget -= len(component.modules)
+        skipped = components[len(selected) :]
+        Logger.log(
+            f"Summarizing {sum(len(c.modules) for c in selected)} files in {len(selected)} "
+            f"components ({len(skipped)} smaller components skipped)."
+        )
+
+        file_summaries: dict[str, str] = {}
+        remaining = {c.name: len(c.modules) for c in selected}
+        by_module = {m: c for c in selected for m in c.modules}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as pool:
+
+            def submit(fn, *args):
+                return pool.submit(contextvars.copy_context().run, fn, *args)
+
+            pending = {
+                submit(self._summarize_file, module): ("file", module)
+                for component in selected
+                for module in component.modules
+            }
+            done_count = 0
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    kind, name = pending.pop(future)
+                    if kind == "file":
+                        file_summaries[name] = future.result()
+                        component = by_module[name]
+                        remaining[component.name] -= 1
+                        if not remaining[component.name]:
+                            summaries = {m: file_summaries[m] for m in component.modules}
+                            pending[submit(self._summarize_component, component, summaries)] = (
+                                "component",
+                                component.name,
+                            )
+                    else:
+                        done_count += 1
+                        component = next(c for c in selected if c.name == name)
+                        component.summary = future.result()
+                        Logger.log(f"Summarized component {name} ({done_count}/{len(selected)}).")
+                        self.on_section(self.component_section(component))
+        return selected, skipped
+
+    def architecture_overview(self, components: list[Component], skipped: list[Component]) -> str:
+        """Runs the reduce stage over the component summaries."""
+        Logger.stage("Reducing component summaries")
+        described = "\n\n".join(
+            f"Component {c.name} (imports from: "
+            f"{', '.join(sorted(c.depends_on)) or 'nothing'}):\n{c.summary}"
+            for c in components
+        )
+        others = ", ".join(c.name for c in skipped) or "none"
+        prompt = f"""
+    You are documenting the architecture of a Python repository. Below are summaries of its
+    components, most central first, with the components each imports from, followed by a ranked
+    list of entry points and examples.
+
+    Write a markdown architecture overview for a new user: the repository's purpose, its main
+    layers and how they depend on each other, the key abstractions, and where to start reading.
+    Do not repeat the component summaries verbatim. Use at most four "###" subsections.
+
+    **Components**:
+    {"-" * 20}
+    {described}
+    {"-" * 20}
+    **Smaller components not summarized**: {others}
+
+    **Entry points and examples**:
+    {"-" * 20}
+    {self.graph.start_here_digest()}
+    {"-" * 20}
+"""
+        try:
+            return call_llm(prompt)
+        except Exception as e:
+            return f"LLM error while writing the architecture overview: {str(e)}"
+
+    def component_section(self, component: Component) -> str:
+        files = ", ".join(f"`{self.graph.module_paths[m]}`" for m in component.modules)
+        depends = ", ".join(f"`{d}`" for d in sorted(component.depends_on)) or "none"
+        return (
+            f"### `{component.name}`\n\n{component.summary}\n\n"
+            f"*Files:* {files}  \n*Imports from:* {depends}"
+        )
+
+    def _summarize_file(self, module: str) -> str:
+        rel_path = self.graph.module_paths[module]
+        signatures = self.code_tools.summarize_signatures(
+            rel_path, max_chars=FILE_SUMMARY_INPUT_CHARS
+        )
+        prompt = f"""
+    Summarize the Python module `{rel_path}` in two to four sentences for a developer new to the
+    repository: what it is for, its most important classes and functions, and how it is used.
+    Base the summary only on its imports and signatures below.
+
+    {signatures}
+"""
+        return self._cached_llm("file-summary", prompt)
+
+    def _summarize_component(self, component: Component, file_summaries: dict[str, str]) -> str:
+        described = "\n".join(
+            f"- {self.graph.module_paths[m]}: {file_summaries[m]}" for m in component.modules
+        )
+        prompt = f"""
+    The files below make up the component `{component.name}` of a Python repository. Write one
+    markdown paragraph summarizing what the component does and its main entry points, followed by
+    a bullet list of its most important classes or functions (at most five) with one line each.
+
+    {described}
+"""
+        return self._cached_llm("component-summary", prompt)
+
+    def _cached_llm(self, kind: str, prompt: str) -> str:
+        try:
+            return call_llm_cached(prompt, self.cache, kind, SUMMARY_FORMAT_VERSION)
+        except Exception as e:
+            return f"(Summary unavailable: {str(e)})"
+
+
+def detailed_analysis(
+    github_url: str,
+    on_section: Callable[[str], None] | None = None,
+    paper_digest: str | None = None,
+) -> str:
+    """Performs a detailed analysis of the GitHub repository at the given URL: component
+    summaries, an architecture overview, example scripts for the central components, and
+    repository information.
+
+    Args:
+        github_url (str): The URL of the GitHub repository.
+        on_section: Optional callable receiving markdown sections as they complete, for
+            showing partial results.
+        paper_digest (str | None): Optional digest of the paper the repository accompanies.
+
+    Returns:
+        str: The full report in markdown format.
+
+    Raises:
+        RuntimeError: If the repository could not be cloned or indexed.
+    """
+    if not github_url.startswith("https://"):
+        github_url = "https://" + github_url
+
+    with Workspace().checkout("clone", repository_name(github_url)) as clone_dir:
+        started = time.perf_counter()
+        on_section = on_section or (lambda section: None)
+        try:
+            base_dir, search_index, symbol_index = clone_and_index(github_url, clone_dir)
+        except Exception as e:
+            # Raised rather than reported, so a queued job fails and is retried instead of
+            # recording the error as the analysis.
+            raise RuntimeError(f"Error cloning repository: {str(e)}") from e
+
+        Logger.stage("Summarizing components")
+        code_tools = CodeAnalysisToolsProvider(
+            base_dir, symbol_index=symbol_index, ast_cache=symbol_index.ast_cache
+        )
+        analysis = DetailedAnalysis(base_dir, code_tools, on_section=on_section)
+        components, skipped = analysis.summarize_components()
+
+        overview = analysis.architecture_overview(components, skipped)
+        on_section(f"## Architecture overview\n\n{overview}")
+
+        Logger.stage("Generating example scripts")
+        focus_areas = [
+            f"{c.name}: {c.summary.splitlines()[0] if c.summary else ''}"
+            for c in components[:EXAMPLE_FOCUS_AREAS]
+        ]
+        try:
+            examples = get_example_script(
+                base_dir,
+                search_index=search_index,
+                symbol_index=symbol_index,
+                focus_areas=focus_areas or None,
+                paper_digest=paper_digest,
+            )
+        except Exception as e:
+            examples = f"Error generating example scripts: {str(e)}"
+        on_section(f"## Example scripts\n\n{examples}")
+
+        info = collect_repository_info(github_url, base_dir)
+        repo_name = github_url.rstrip("/").split("github.com/")[-1]
+        skipped_note = (
+            f"\n\nNot summarized (less central): {', '.join(f'`{c.name}`' for c in skipped)}"
+            if skipped
+            else ""
+        )
+        sections = [
+            f"# Detailed analysis of {repo_name}",
+            *([f"## Paper\n\n```\n{paper_digest}\n```"] if paper_digest else []),
+            f"## Architecture overview\n\n{overview}",
+            "## Components\n\n"
+            + "\n\n".join(analysis.component_section(c) for c in components)
+            + skipped_note,
+            f"## Example scripts\n\n{examples}",
+            "## Repository information\n\n"
+            + "\n\n".join(
+                f"```\n{info[key]}\n```"
+                for key in ("basic_info", "issues_summary", "top_contributors")
+            ),
+            f"## Required packages\n\n```\n{info['required_packages']}\n```",
+        ]
+        Logger.log(f"Analysis finished in {time.perf_counter() - started:.1f}s.")
+        return "\n\n".join(sections)
+
+
+async def async_detailed_analysis(
+    github_url: str,
+    on_section: Callable[[str], None] | None = None,
+    paper_digest: str | None = None,
+) -> str:
+    return await asyncio.to_thread(detailed_analysis, github_url, on_section, paper_digest)
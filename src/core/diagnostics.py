@@ -0,0 +1,161 @@
+import concurrent.futures
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+# Module imported by the ``paperprobe`` command before its first screen is drawn.
+STARTUP_MODULE = "src.ui.app"
+# Median time to import STARTUP_MODULE in a fresh interpreter above which the startup
+# benchmark fails.
+STARTUP_BUDGET_MS = 800.0
+# Idle workers look for new jobs this often in the queue benchmark, so that polling does
+# not dominate its timings.
+BENCHMARK_POLL_SECONDS = 0.02
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class QueueThroughput:
+    workers: int
+    processes_jobs_per_second: float
+    threads_jobs_per_second: float
+
+
+def profile_imports(module: str = STARTUP_MODULE) -> list[ImportTiming]:
+    """Imports ``module`` in a fresh interpreter with ``-X importtime`` and parses the report.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip()[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def import_time_report(module: str = STARTUP_MODULE, top: int = 25) -> str:
+    """Returns the ``top`` most expensive imports of ``module``, by cumulative time, plus the
+    packages that account for the most self time."""
+    timings = profile_imports(module)
+    total = sum(t.cumulative_us for t in timings if t.depth == 0)
+
+    lines = [
+        f"Interpreter startup imports plus importing {module} took {total / 1000:.1f} ms.",
+        "",
+        "Slowest imports (cumulative):",
+    ]
+    for t in sorted(timings, key=lambda t: -t.cumulative_us)[:top]:
+        lines.append(
+            f"  {t.cumulative_us / 1000:9.1f} ms  {t.self_us / 1000:8.1f} ms self  {t.module}"
+        )
+
+    by_package = {}
+    for t in timings:
+        package = t.module.split(".", 1)[0]
+        by_package[package] = by_package.get(package, 0) + t.self_us
+    lines += ["", "Self time by top-level package:"]
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {package}")
+    return "\n".join(lines)
+
+
+def startup_benchmark(
+    runs: int = 5, module: str = STARTUP_MODULE, budget_ms: float = STARTUP_BUDGET_MS
+) -> tuple[float, bool]:
+    """Measures the median time to import ``module`` in a fresh interpreter.
+
+    The interpreter's own startup is measured separately and subtracted, so the result
+    is the cost PaperProbe adds before its first screen can be drawn.
+
+    Returns:
+        tuple[float, bool]: The median in milliseconds, and whether it is within ``budget_ms``.
+    """
+
+    def median_ms(code: str) -> float:
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    baseline = median_ms("pass")
+    median = max(median_ms(f"import {module}") - baseline, 0.0)
+    return median, median <= budget_ms
+
+
+def queue_benchmark(
+    worker_counts: tuple[int, ...] = (1, 2, 4, 8),
+    jobs: int = 48,
+    cpu_ms: float = 50.0,
+    io_ms: float = 200.0,
+) -> list[QueueThroughput]:
+    """Measures job throughput by number of workers, offline.
+
+    Each job is a stand-in for an analysis (``worker.benchmark_job``): about ``cpu_ms`` of
+    pure-Python work, then ``io_ms`` of waiting. For every worker count, ``jobs`` jobs run
+    once on a pool of worker processes through a fresh SQLite queue, and once on as many
+    threads in this process, which is how analyses ran before worker mode. Timing starts
+    once every worker is up, so process startup is not counted.
+    """
+    from src.core.job_queue import DONE, SqliteJobQueue
+    from src.core.worker import WorkerPool, benchmark_job
+
+    payload = {"iterations": _iterations_for(cpu_ms), "io_ms": io_ms}
+    results = []
+    for count in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+            queue = SqliteJobQueue(path)
+            with WorkerPool(count, path, poll_seconds=BENCHMARK_POLL_SECONDS):
+                while queue.live_workers() < count:
+                    time.sleep(BENCHMARK_POLL_SECONDS)
+                started = time.perf_counter()
+                for _ in range(jobs):
+                    queue.enqueue("benchmark", payload)
+                while len(queue.jobs(DONE, jobs)) < jobs:
+                    time.sleep(BENCHMARK_POLL_SECONDS)
+                processes_seconds = time.perf_counter() - started
+            queue.close()
+
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=count) as pool:
+            list(pool.map(benchmark_job, [payload] * jobs))
+        threads_seconds = time.perf_counter() - started
+        results.append(QueueThroughput(count, jobs / processes_seconds, jobs / threads_seconds))
+    return results
+
+
+def _iterations_for(cpu_ms: float) -> int:
+    """Calibrates ``worker.benchmark_job``'s loop to take about ``cpu_ms`` on this machine."""
+    from src.core.worker import benchmark_job
+
+    iterations = 100_000
+    started = time.perf_counter()
+    benchmark_job({"iterations": iterations, "io_ms": 0})
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return max(int(iterations * cpu_ms / max(elapsed_ms, 1e-3)), 1)
@@ -0,0 +1,219 @@
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from src.core.paths import get_cache_dir
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    digest TEXT,
+    links TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    paper_id INTEGER REFERENCES papers(id),
+    repo_url TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    report_path TEXT,
+    report TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_by_repo ON analyses(repo_url, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    repo_url, report, content='analyses', content_rowid='id', tokenize='porter unicode61',
+    prefix='3 4'
+);
+CREATE TRIGGER IF NOT EXISTS analyses_fts_insert AFTER INSERT ON analyses BEGIN
+    INSERT INTO analyses_fts(rowid, repo_url, report)
+    VALUES (new.id, new.repo_url, new.report);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_fts_delete AFTER DELETE ON analyses BEGIN
+    INSERT INTO analyses_fts(analyses_fts, rowid, repo_url, report)
+    VALUES ('delete', old.id, old.repo_url, old.report);
+END;
+"""
+ENTRY_COLUMNS = (
+    "a.id, a.repo_url, a.mode, a.started_at, a.seconds, a.tokens, a.report_path, p.source"
+)
+SNIPPET_TOKENS = 12
+# Shorter prefixes have no index entries of their own and would match too many words.
+MIN_PREFIX_CHARS = 3
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    repo_url: str
+    mode: str
+    started_at: float
+    seconds: float
+    tokens: int
+    report_path: str | None
+    paper_source: str | None
+    snippet: str = ""
+    report: str | None = None
+
+
+class AnalysisHistory:
+    """Local store of past analyses: papers, their candidate links, the repository chosen,
+    the report, and what it cost.
+
+    Reports are indexed with SQLite FTS5. Searches return the newest matches first and
+    stop after ``limit`` of them, walking the index in rowid order rather than ranking
+    every match; prefixes of three and four characters have their own index entries, so
+    that as-you-type prefix queries do not merge the postings of every matching word.
+    Insert and search latency thus stay flat as the history grows. The database is in
+    WAL mode, so several processes can record and search concurrently.
+
+    Args:
+        path (str | None): Database file; ``$PAPERPROBE_HISTORY_DB``, or
+            ``history/history.sqlite3`` in the cache root, if not given.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = (
+            path
+            or os.getenv("PAPERPROBE_HISTORY_DB")
+            or os.path.join(get_cache_dir("history"), "history.sqlite3")
+        )
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            with self._db:
+                self._db.executescript(SCHEMA)
+                self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def record_paper(self, source: str, links: list[str], digest: str | None = None) -> int:
+        """Records a scanned paper and its candidate links, most relevant first."""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO papers (source, digest, links, scanned_at) VALUES (?, ?, ?, ?)",
+                (source, digest, json.dumps(links), time.time()),
+            )
+        return cursor.lastrowid
+
+    def record_analysis(
+        self,
+        repo_url: str,
+        mode: str,
+        report: str,
+        seconds: float,
+        tokens: int,
+        paper_id: int | None = None,
+        report_path: str | None = None,
+    ) -> int:
+        """Records a finished analysis.
+
+        Args:
+            repo_url (str): The analysed repository.
+            mode (str): ``"basic"`` or ``"detailed"``.
+            report (str): The report in markdown.
+            seconds (float): How long the analysis took.
+            tokens (int): LLM tokens the analysis used.
+            paper_id (int | None): The paper the repository was chosen from, if any.
+            report_path (str | None): Where the report was saved.
+
+        Returns:
+            int: The analysis' id.
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO analyses (paper_id, repo_url, mode, started_at, seconds, tokens, "
+                "report_path, report) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    paper_id,
+                    repo_url,
+                    mode,
+                    time.time() - seconds,
+                    seconds,
+                    tokens,
+                    report_path,
+                    report,
+                ),
+            )
+        return cursor.lastrowid
+
+    def search(self, query: str, limit: int = 50) -> list[HistoryEntry]:
+        """Returns the newest analyses whose repository or report contains every word of
+        ``query``, the last one as a prefix (as it may still be being typed), with a snippet
+        of the match; the newest analyses if ``query`` is empty."""
+        match = _match_expression(query)
+        if match is None:
+            return self.recent(limit)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {ENTRY_COLUMNS}, snippet(analyses_fts, 1, '«', '»', '…', ?) "
+                "FROM analyses_fts JOIN analyses a ON a.id = analyses_fts.rowid "
+                "LEFT JOIN papers p ON p.id = a.paper_id "
+                "WHERE analyses_fts MATCH ? ORDER BY analyses_fts.rowid DESC LIMIT ?",
+                (SNIPPET_TOKENS, match, limit),
+            ).fetchall()
+        return [HistoryEntry(*row[:-1], snippet=row[-1]) for row in rows]
+
+    def recent(self, limit: int = 50, repo_url: str | None = None) -> list[HistoryEntry]:
+        """Returns the newest analyses, optionally of one repository only."""
+        where, params = ("WHERE a.repo_url = ?", (repo_url, limit)) if repo_url else ("", (limit,))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM analyses a LEFT JOIN papers p ON p.id = a.paper_id "
+                f"{where} ORDER BY a.id DESC LIMIT ?",
+                params,
+            ).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def get(self, analysis_id: int) -> HistoryEntry | None:
+        """Returns an analysis with its report, or ``None`` if there is no such analysis."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {ENTRY_COLUMNS}, a.report FROM analyses a "
+                "LEFT JOIN papers p ON p.id = a.paper_id WHERE a.id = ?",
+                (analysis_id,),
+            ).fetchone()
+        return HistoryEntry(*row[:-1], report=row[-1]) if row else None
+
+    def paper_links(self, paper_id: int) -> list[str]:
+        """Returns the candidate links recorded for a paper."""
+        with self._lock:
+            row = self._db.execute("SELECT links FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def paper_digest(self, paper_id: int) -> str | None:
+        """Returns the digest recorded for a paper, if any."""
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+@functools.cache
+def default_history() -> AnalysisHistory:
+    """Returns the process-wide history at the default location."""
+    return AnalysisHistory()
+
+
+def _match_expression(query: str) -> str | None:
+    """Turns free text into an FTS5 query matching every word, and the last word as a
+    prefix if it has at least ``MIN_PREFIX_CHARS`` characters."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_CHARS:
+        terms[-1] += "*"
+    return " ".join(terms)
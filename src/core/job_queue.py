@@ -0,0 +1,409 @@
+import abc
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from src.core.paths import get_cache_dir
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+DEFAULT_MAX_ATTEMPTS = 3
+# Failed attempts are retried after RETRY_BASE_SECONDS, doubling per attempt, at most
+# RETRY_MAX_SECONDS.
+RETRY_BASE_SECONDS = 10.0
+RETRY_MAX_SECONDS = 600.0
+# A running job whose worker has not sent a heartbeat for this long is assumed lost (e.g.
+# the worker was killed) and is queued again, counting as a failed attempt.
+LEASE_SECONDS = 30.0
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    worker TEXT,
+    heartbeat_at REAL,
+    stage TEXT,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs(status, run_after, id);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_by_job ON job_events(job_id, id);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    job_id INTEGER
+);
+"""
+JOB_COLUMNS = (
+    "id, kind, payload, status, attempts, max_attempts, run_after, worker, heartbeat_at, stage, "
+    "tokens, result, error, created_at, finished_at"
+)
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: dict
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: float
+    worker: str | None
+    heartbeat_at: float | None
+    stage: str | None
+    tokens: int
+    result: dict | None
+    error: str | None
+    created_at: float
+    finished_at: float | None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+@dataclass
+class JobEvent:
+    """Something a job reported while running: a log message (``kind`` ``"log"``) or a
+    completed section of its report (``kind`` ``"section"``)."""
+
+    id: int
+    job_id: int
+    kind: str
+    level: str
+    message: str
+    time: float
+
+
+def retry_delay(attempts: int) -> float:
+    """Returns how long to wait before retrying a job that has failed ``attempts`` times."""
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+class JobQueue(abc.ABC):
+    """Durable queue of scan and analysis jobs shared by clients and worker processes.
+
+    Clients :meth:`enqueue` jobs and watch them with :meth:`get` and :meth:`events`.
+    Workers :meth:`claim` the oldest runnable job, report progress with :meth:`heartbeat`
+    and :meth:`add_events`, and finish it with :meth:`complete` or :meth:`fail`; failed
+    attempts are retried with exponential backoff up to the job's ``max_attempts``. A job
+    is leased to the worker that claimed it: a worker silent for ``LEASE_SECONDS`` loses
+    its job to the next claim, and calls made for a job it no longer holds are ignored.
+
+    Backends implement this interface; :func:`open_queue` picks one from a URL.
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Adds a job and returns its id."""
+
+    @abc.abstractmethod
+    def claim(self, worker: str) -> Job | None:
+        """Leases the oldest runnable job to ``worker``, or returns ``None`` if there is none."""
+
+    @abc.abstractmethod
+    def heartbeat(self, job_id: int, worker: str, stage: str | None, tokens: int) -> bool:
+        """Extends ``worker``'s lease on a job and records its progress.
+
+        Returns:
+            bool: Whether ``worker`` still holds the job.
+        """
+
+    @abc.abstractmethod
+    def complete(self, job_id: int, worker: str, result: dict) -> bool:
+        """Marks a job done with its result. Returns whether ``worker`` still held the job."""
+
+    @abc.abstractmethod
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        """Records a failed attempt: the job is queued again after :func:`retry_delay`, or
+        marked failed once it has used its attempts. Returns whether ``worker`` still held
+        the job."""
+
+    @abc.abstractmethod
+    def get(self, job_id: int) -> Job | None:
+        """Returns a job, or ``None`` if there is no such job."""
+
+    @abc.abstractmethod
+    def jobs(self, status: str | None = None, limit: int = 50) -> list[Job]:
+        """Returns the newest jobs, optionally with the given status only."""
+
+    @abc.abstractmethod
+    def add_events(self, job_id: int, events: list[tuple[str, str, str]]) -> None:
+        """Records ``(kind, level, message)`` events of a job."""
+
+    @abc.abstractmethod
+    def events(self, job_id: int, after: int = 0) -> list[JobEvent]:
+        """Returns a job's events with ids greater than ``after``, oldest first."""
+
+    @abc.abstractmethod
+    def register_worker(self, worker: str, job_id: int | None = None) -> None:
+        """Records that ``worker`` is alive, and the job it is running, if any."""
+
+    @abc.abstractmethod
+    def unregister_worker(self, worker: str) -> None:
+        """Removes a worker that is shutting down."""
+
+    @abc.abstractmethod
+    def live_workers(self) -> int:
+        """Returns the number of workers that sent a heartbeat within ``LEASE_SECONDS``."""
+
+    @abc.abstractmethod
+    def purge(self, older_than_seconds: float) -> int:
+        """Removes jobs finished more than ``older_than_seconds`` ago, with their events.
+
+        Returns:
+            int: The number of jobs removed.
+        """
+
+    def poll(self, job_id: int, after: int = 0) -> tuple[Job | None, list[JobEvent]]:
+        """Returns a job and its events with ids greater than ``after``, for clients
+        following it. The job is read first, so once it is seen finished, every event it
+        published is among those returned."""
+        return self.get(job_id), self.events(job_id, after)
+
+    # Not abstract: backends without connections to release need not override it.
+    def close(self) -> None:  # noqa: B027
+        """Releases the queue's connections."""
+
+
+class SqliteJobQueue(JobQueue):
+    """Job queue in a local SQLite database, shared by the processes of one machine.
+
+    The database is in WAL mode, so clients read while workers write. Claims run in
+    ``BEGIN IMMEDIATE`` transactions, which serialize them across processes: each job is
+    handed to exactly one worker. Expired leases are reclaimed at the start of every claim.
+
+    Args:
+        path (str | None): Database file; ``queue/jobs.sqlite3`` in the cache root if not
+            given.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_cache_dir("queue"), "jobs.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._db.executescript(
+                f"BEGIN IMMEDIATE; {SCHEMA} PRAGMA user_version={SCHEMA_VERSION}; COMMIT;"
+            )
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        now = time.time()
+        with self._transaction():
+            cursor = self._db.execute(
+                "INSERT INTO jobs (kind, payload, status, max_attempts, run_after, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), QUEUED, max_attempts, now, now),
+            )
+        return cursor.lastrowid
+
+    def claim(self, worker: str) -> Job | None:
+        now = time.time()
+        # Idle workers poll; checking first without the write lock keeps them from
+        # serializing on it while there is nothing to claim.
+        with self._lock:
+            claimable = self._db.execute(
+                "SELECT 1 FROM jobs WHERE status = ? AND run_after <= ? "
+                "UNION ALL SELECT 1 FROM jobs WHERE status = ? AND heartbeat_at < ? LIMIT 1",
+                (QUEUED, now, RUNNING, now - LEASE_SECONDS),
+            ).fetchone()
+        if claimable is None:
+            return None
+        with self._transaction():
+            self._db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+                "finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END, "
+                "error = 'worker lost (no heartbeat)', worker = NULL, run_after = ? "
+                "WHERE status = ? AND heartbeat_at < ?",
+                (QUEUED, FAILED, now, now, RUNNING, now - LEASE_SECONDS),
+            )
+            row = self._db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                "heartbeat_at = ?, stage = NULL WHERE id = (SELECT id FROM jobs "
+                "WHERE status = ? AND run_after <= ? ORDER BY run_after, id LIMIT 1) "
+                f"RETURNING {JOB_COLUMNS}",
+                (RUNNING, worker, now, QUEUED, now),
+            ).fetchone()
+        return _job(row) if row else None
+
+    def heartbeat(self, job_id: int, worker: str, stage: str | None, tokens: int) -> bool:
+        with self._transaction():
+            cursor = self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ?, stage = ?, tokens = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (time.time(), stage, tokens, job_id, worker, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: dict) -> bool:
+        with self._transaction():
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, json.dumps(result), time.time(), job_id, worker, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        now = time.time()
+        with self._transaction():
+            row = self._db.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (job_id, worker, RUNNING),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            if attempts < max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, worker = NULL, run_after = ? "
+                    "WHERE id = ?",
+                    (QUEUED, error, now + retry_delay(attempts), job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (FAILED, error, now, job_id),
+                )
+        return True
+
+    def get(self, job_id: int) -> Job | None:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _job(row) if row else None
+
+    def jobs(self, status: str | None = None, limit: int = 50) -> list[Job]:
+        where, params = ("WHERE status = ?", (status, limit)) if status else ("", (limit,))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs {where} ORDER BY id DESC LIMIT ?", params
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def add_events(self, job_id: int, events: list[tuple[str, str, str]]) -> None:
+        if not events:
+            return
+        now = time.time()
+        with self._transaction():
+            self._db.executemany(
+                "INSERT INTO job_events (job_id, kind, level, message, time) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(job_id, kind, level, message, now) for kind, level, message in events],
+            )
+
+    def events(self, job_id: int, after: int = 0) -> list[JobEvent]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, job_id, kind, level, message, time FROM job_events "
+                "WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after),
+            ).fetchall()
+        return [JobEvent(*row) for row in rows]
+
+    def register_worker(self, worker: str, job_id: int | None = None) -> None:
+        now = time.time()
+        with self._transaction():
+            self._db.execute(
+                "INSERT INTO workers (id, pid, started_at, heartbeat_at, job_id) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "heartbeat_at = excluded.heartbeat_at, job_id = excluded.job_id",
+                (worker, os.getpid(), now, now, job_id),
+            )
+
+    def unregister_worker(self, worker: str) -> None:
+        with self._transaction():
+            self._db.execute("DELETE FROM workers WHERE id = ?", (worker,))
+
+    def live_workers(self) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?",
+                (time.time() - LEASE_SECONDS,),
+            ).fetchone()
+        return row[0]
+
+    def purge(self, older_than_seconds: float) -> int:
+        cutoff = time.time() - older_than_seconds
+        with self._transaction():
+            self._db.execute(
+                "DELETE FROM job_events WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE finished_at < ?)",
+                (cutoff,),
+            )
+            cursor = self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+            self._db.execute("DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Runs the block in an immediate (write) transaction, holding the connection."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+
+# Backends by URL scheme. Other backends (e.g. a server-based queue shared by several
+# machines) register themselves here.
+BACKENDS: dict[str, type[JobQueue]] = {"sqlite": SqliteJobQueue}
+
+
+def open_queue(url: str | None = None) -> JobQueue:
+    """Opens the job queue at ``url`` (``$PAPERPROBE_QUEUE`` if not given).
+
+    ``url`` is ``<scheme>://<location>``, with the scheme naming one of ``BACKENDS``, or a
+    plain path to a SQLite database. The default queue is the SQLite database in the cache
+    root.
+    """
+    url = url or os.getenv("PAPERPROBE_QUEUE") or ""
+    scheme, separator, location = url.partition("://")
+    if not separator:
+        return SqliteJobQueue(url or None)
+    if scheme not in BACKENDS:
+        raise ValueError(f"unknown job queue backend '{scheme}'")
+    return BACKENDS[scheme](location or None)
+
+
+def _job(row: tuple) -> Job:
+    job = Job(*row)
+    job.payload = json.loads(job.payload)
+    job.result = json.loads(job.result) if job.result else None
+    return job
@@ -1,8 +1,27 @@
-from langchain_core.messages import HumanMessage
+import hashlib
+import os
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
 from src.constructor.constructor_model import ConstructorModel
 from src.constructor.tool_aware import create_tool_aware_agent
 
+from src.core.agent_checkpoint import (
+    AgentBudget,
+    AgentCheckpointStore,
+    AgentProgress,
+    best_validated_script,
+    is_resumable,
+)
 from src.core.Logger import Logger
+from src.preprocessing_utilities.ast_cache import AstSummaryCache
+from src.tool_providers.output_budget import estimate_tokens
+
+# Maximum number of concurrent LLM calls made by the map stages of the analyses.
+LLM_CONCURRENCY = int(os.getenv("PAPERPROBE_LLM_CONCURRENCY", "4"))
+# Failed agent runs are retried from their last good step this many times.
+AGENT_MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 5.0
 
 
 def get_chat_model():
@@ -20,15 +39,60 @@ def call_llm(prompt: str) -> str:
         str: The response from the language model.
     """
     model = get_chat_model()
-    return model.invoke([HumanMessage(content=prompt)]).content
+    response = model.invoke([HumanMessage(content=prompt)])
+    usage = getattr(response, "usage_metadata", None) or {}
+    Logger.record_tokens(
+        usage.get("total_tokens") or estimate_tokens(prompt + str(response.content))
+    )
+    return response.content
+
 
+def call_llm_cached(prompt: str, cache: AstSummaryCache, kind: str, version: int) -> str:
+    """Like :func:`call_llm`, but responses are cached on disk, keyed by a hash of the prompt.
+
+    Args:
+        prompt (str): The prompt to send to the language model.
+        cache (AstSummaryCache): The cache to store responses in.
+        kind (str): The kind of response, used with ``version`` as the cache namespace.
+        version (int): Version of the prompt; bump it to invalidate cached responses.
 
-def execute_agentic_task(tools: list, messages: list) -> str:
+    Returns:
+        str: The (stripped) response from the language model.
+    """
+    namespace = AstSummaryCache.namespace(kind, version)
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    cached = cache.get(namespace, digest)
+    if cached is not None:
+        return cached
+    started = time.perf_counter()
+    response = call_llm(prompt).strip()
+    cache.put(namespace, digest, response, time.perf_counter() - started)
+    return response
+
+
+def execute_agentic_task(
+    tools: list,
+    messages: list,
+    checkpoint_scope: str | None = None,
+    budget: AgentBudget | None = None,
+) -> str:
     """Executes an agentic task using the provided tools and messages.
 
+    The agent is streamed step by step. If it fails (e.g. the LLM endpoint errors), it is
+    retried from its last good step up to ``AGENT_MAX_RETRIES`` times. Once the budget is
+    exhausted it is stopped, and the last script that ran successfully is returned. The
+    checkpoint is removed only once the agent finishes; after a failure or an early stop it
+    is kept, so a later call resumes (or stops at once, if the budget is spent) from there.
+
     Args:
         tools (list): A list of tools available to the agent.
         messages (list): A list of messages to set up the agent's state.
+        checkpoint_scope (str | None): If given, every step is checkpointed to disk under a
+            key made of this scope (e.g. the repository directory), the messages and the
+            tools, and a later call with the same key resumes where the last one stopped,
+            e.g. after the process died.
+        budget (AgentBudget | None): Limits on model calls, time and tokens, counted across
+            resumed attempts. ``AgentBudget.from_env()`` if not given.
 
     Returns:
         str: The final response from the agent after executing the task.
@@ -37,11 +101,98 @@ def execute_agentic_task(tools: list, messages: list) -> str:
         model = get_chat_model()
     except Exception:
         Logger.log(
-            "Failed to initialize the chat model. Please make sure you've set the necessary environment variables."
+            "Failed to initialize the chat model. Please make sure you've set the necessary environment variables.",
+            level="error",
         )
         return ""
     agent = create_tool_aware_agent(model=model, tools=tools)
+    budget = budget or AgentBudget.from_env()
+
+    store, key, progress = None, None, None
+    if checkpoint_scope is not None:
+        store = AgentCheckpointStore()
+        key = store.task_key(checkpoint_scope, messages, [tool.name for tool in tools])
+        progress = store.load(key)
+        if progress is not None:
+            Logger.log(f"Resuming the agent from its checkpoint after {progress.steps} steps.")
+    progress = progress or AgentProgress(messages=list(messages))
+
+    finished = False
+    for attempt in range(AGENT_MAX_RETRIES + 1):
+        try:
+            result, finished = _run_agent(agent, progress, budget, store, key)
+            break
+        except Exception as e:
+            if attempt == AGENT_MAX_RETRIES:
+                if best_validated_script(progress.messages) is None:
+                    raise
+                Logger.log(f"Agent failed: {str(e)}", level="error")
+                result = _early_stop_answer(f"the agent failed: {str(e)}", progress.messages)
+                break
+            Logger.log(
+                f"Agent failed after {progress.steps} steps ({str(e)}); retrying from the last "
+                "good step.",
+                level="warning",
+            )
+            time.sleep(RETRY_BACKOFF_SECONDS * 2**attempt)
+
+    if store is not None and finished:
+        store.clear(key)
+    return result
+
+
+def _run_agent(
+    agent,
+    progress: AgentProgress,
+    budget: AgentBudget,
+    store: AgentCheckpointStore | None,
+    key: str | None,
+) -> tuple[str, bool]:
+    """Streams the agent from ``progress``, which is advanced (and checkpointed) at every
+    step after which no tool call is pending, so that it always holds the last good step.
+
+    Returns:
+        tuple[str, bool]: The answer, and whether the agent finished rather than being
+        stopped early.
+    """
+    reason = budget.exceeded(progress)
+    if reason:
+        return _early_stop_answer(reason, progress.messages), False
+
+    # Messages the agent's state holds besides the task's own (e.g. a system prompt).
+    offset = None
+    last = time.perf_counter()
+    for state in agent.stream(
+        agent.setup_state(messages=list(progress.messages)), stream_mode="values"
+    ):
+        current = state["messages"]
+        if offset is None:
+            offset = len(current) - len(progress.messages)
+        new_messages = current[offset + len(progress.messages) :]
+        if not new_messages or not is_resumable(current):
+            continue
+        now = time.perf_counter()
+        tokens = progress.tokens
+        progress.add(new_messages, now - last)
+        Logger.record_tokens(progress.tokens - tokens)
+        last = now
+        if store is not None:
+            store.append(key, new_messages, progress)
+
+        finished = isinstance(current[-1], AIMessage)
+        reason = budget.exceeded(progress)
+        if reason and not finished:
+            return _early_stop_answer(reason, progress.messages), False
+
+    return progress.messages[-1].content, True
 
-    result = agent.invoke(agent.setup_state(messages=messages))
 
-    return result["messages"][-1].content
+def _early_stop_answer(reason: str, messages: list) -> str:
+    Logger.log(f"Stopping the agent early: {reason}.", level="warning")
+    script = best_validated_script(messages)
+    if script is None:
+        return f"The agent was stopped early ({reason}) before any script ran successfully."
+    return (
+        f"The agent was stopped early ({reason}). This is the last script that ran "
+        f"successfully:\n\n```python\n{script}\n```"
+    )
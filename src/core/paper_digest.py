@@ -0,0 +1,225 @@
+import concurrent.futures
+import contextvars
+import re
+from dataclasses import dataclass, field
+
+from src.core.Logger import Logger
+from src.preprocessing_utilities.ast_cache import AstSummaryCache
+
+from .llm_service import LLM_CONCURRENCY, call_llm_cached
+
+# About 2k tokens per chunk.
+CHUNK_CHARS = 8000
+# Long papers (e.g. with large appendices) are cut after this many chunks.
+MAX_CHUNKS = 40
+# About 600 tokens, so downstream prompts carry a few hundred tokens of paper context.
+DIGEST_MAX_CHARS = 2400
+MAX_CODE_STATEMENTS = 5
+MAX_STATEMENT_CHARS = 300
+# Bump whenever the digest prompts change, to invalidate cached responses.
+DIGEST_FORMAT_VERSION = 1
+
+DIGEST_FIELDS = ("Method", "Datasets", "Code availability")
+KNOWN_HEADINGS = (
+    "abstract|introduction|background|related work|method|methods|methodology|approach|"
+    "model|experiments|experimental setup|evaluation|results|discussion|conclusion|"
+    "conclusions|limitations|references|bibliography|acknowledgments|acknowledgements|"
+    "appendix"
+)
+# A known heading on its own line, optionally numbered, or a short numbered title such as
+# "3.2 Training Objective" or "IV. EXPERIMENTS". Only the known headings are matched
+# case-insensitively: numbered body lines such as "2 samples were drawn" are not titles.
+HEADING = re.compile(
+    rf"^(?:(?-i:\d+(?:\.\d+)*\.?|[IVX]+\.|[A-H]\.?)\s+)?(?:{KNOWN_HEADINGS})\s*$"
+    r"|^(?-i:(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z][\w\-:,&' ]{2,60})$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Sections the digest skips, as they say nothing about the method or the code.
+SKIPPED_SECTIONS = re.compile(r"references|bibliography|acknowledge?ments", re.IGNORECASE)
+CODE_STATEMENT = re.compile(
+    r"[^.!?\n]*(?:github\.com|code (?:is|will be) (?:publicly )?(?:available|released)|"
+    r"open[- ]source|our (?:code|implementation))[^.!?]*[.!?]?",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Chunk:
+    section: str
+    text: str
+
+
+@dataclass
+class PaperDigest:
+    """Compact summary of a paper, sent to the LLM in place of its full text."""
+
+    title: str
+    fields: dict[str, str] = field(default_factory=dict)
+    code_statements: list[str] = field(default_factory=list)
+
+    def to_prompt(self) -> str:
+        """Renders the digest in at most ``DIGEST_MAX_CHARS`` characters."""
+        lines = [f"Title: {self.title}"]
+        lines += [f"{name}: {self.fields.get(name) or 'not stated'}" for name in DIGEST_FIELDS]
+        if self.code_statements:
+            lines.append("Statements about the code:")
+            lines += [f'- "{statement}"' for statement in self.code_statements]
+        return "\n".join(lines)[:DIGEST_MAX_CHARS]
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """Splits extracted paper text at its section headings.
+
+    Returns:
+        list[tuple[str, str]]: ``(heading, body)`` pairs in order; text before the first
+        heading is returned under ``"Front matter"``.
+    """
+    sections = []
+    heading, start = "Front matter", 0
+    for match in HEADING.finditer(text):
+        sections.append((heading, text[start : match.start()]))
+        heading, start = match.group(0).strip(), match.end()
+    sections.append((heading, text[start:]))
+    return [(heading, body.strip()) for heading, body in sections if body.strip()]
+
+
+def chunk_sections(sections: list[tuple[str, str]], max_chars: int = CHUNK_CHARS) -> list[Chunk]:
+    """Packs sections into chunks of at most ``max_chars`` characters.
+
+    Chunks never span two sections; long sections are split at paragraph breaks, or at
+    line breaks if a single paragraph is too long. Reference lists and acknowledgements
+    are dropped.
+    """
+    chunks = []
+    for heading, body in sections:
+        if SKIPPED_SECTIONS.search(heading):
+            continue
+        current = ""
+        for paragraph in _split_long(body, max_chars):
+            if current and len(current) + len(paragraph) + 2 > max_chars:
+                chunks.append(Chunk(heading, current))
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(Chunk(heading, current))
+    return chunks
+
+
+def find_code_statements(text: str) -> list[str]:
+    """Returns the first sentences mentioning the paper's code or a GitHub link."""
+    statements = []
+    for match in CODE_STATEMENT.finditer(text):
+        statement = " ".join(match.group(0).split())[:MAX_STATEMENT_CHARS]
+        if statement and statement not in statements:
+            statements.append(statement)
+        if len(statements) == MAX_CODE_STATEMENTS:
+            break
+    return statements
+
+
+def digest_paper(text: str, cache: AstSummaryCache | None = None) -> PaperDigest:
+    """Digests the extracted text of a paper with a map-reduce over its sections.
+
+    Map: the LLM takes notes on the method, datasets and code availability of each
+    section-aware chunk, with at most ``LLM_CONCURRENCY`` chunks in flight. Reduce: the
+    notes are merged into one short entry per field. Responses are cached by prompt, so
+    digesting the same paper again makes no LLM calls. Statements about the code are
+    extracted from the text (outside the references) without the LLM.
+
+    Args:
+        text (str): The text extracted from the paper, e.g. by ``PDFParser``.
+        cache (AstSummaryCache | None): Cache for the LLM responses; the default cache
+            directory is used if not given.
+
+    Returns:
+        PaperDigest: The digest; fields the LLM could not fill are left empty.
+    """
+    cache = cache or AstSummaryCache()
+    title = next((line.strip() for line in text.splitlines() if line.strip()), "Unknown")
+    sections = split_sections(text)
+    chunks = chunk_sections(sections)
+    if len(chunks) > MAX_CHUNKS:
+        Logger.log(f"Paper has {len(chunks)} chunks; digesting the first {MAX_CHUNKS}.")
+        chunks = chunks[:MAX_CHUNKS]
+    Logger.log(f"Digesting the paper in {len(chunks)} chunks...")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _chunk_notes, chunk, cache)
+            for chunk in chunks
+        ]
+        notes = [future.result() for future in futures]
+
+    fields = {}
+    notes_text = "\n\n".join(note for note in notes if note)
+    if notes_text:
+        prompt = f"""
+    Below are notes taken on consecutive excerpts of a research paper titled "{title}".
+    Merge them into one entry per field, each at most 80 words. Keep specific names (models,
+    datasets, libraries) and drop repetitions. Answer with exactly these three lines:
+    Method: ...
+    Datasets: ...
+    Code availability: ...
+    Write "not stated" for a field the notes say nothing about.
+
+    {notes_text}
+"""
+        try:
+            fields = _parse_fields(
+                call_llm_cached(prompt, cache, "paper-digest", DIGEST_FORMAT_VERSION)
+            )
+        except Exception as e:
+            Logger.log(f"Could not merge the paper notes: {str(e)}", level="warning")
+    main_text = "\n".join(
+        body for heading, body in sections if not SKIPPED_SECTIONS.search(heading)
+    )
+    return PaperDigest(title, fields, find_code_statements(main_text))
+
+
+def _chunk_notes(chunk: Chunk, cache: AstSummaryCache) -> str:
+    prompt = f"""
+    The text below is an excerpt from the section "{chunk.section}" of a research paper. Note
+    what it says about the paper's method, the datasets used, and whether and where the code
+    is available. Answer with exactly these three lines, each at most 40 words:
+    Method: ...
+    Datasets: ...
+    Code availability: ...
+    Write "none" for a field the excerpt says nothing about.
+
+    {chunk.text}
+"""
+    try:
+        response = call_llm_cached(prompt, cache, "paper-chunk", DIGEST_FORMAT_VERSION)
+    except Exception as e:
+        Logger.log(f"Could not digest a chunk of {chunk.section}: {str(e)}", level="warning")
+        return ""
+    fields = _parse_fields(response)
+    return "\n".join(
+        f"{name}: {value}"
+        for name, value in fields.items()
+        if value.lower().rstrip(".") not in ("none", "not stated")
+    )
+
+
+def _parse_fields(response: str) -> dict[str, str]:
+    fields = {}
+    for line in response.splitlines():
+        name, _, value = line.strip(" -*").partition(":")
+        name = name.strip(" *")
+        for field_name in DIGEST_FIELDS:
+            if name.lower() == field_name.lower() and value.strip():
+                fields[field_name] = value.strip()
+    return fields
+
+
+def _split_long(body: str, max_chars: int) -> list[str]:
+    parts = []
+    for paragraph in re.split(r"\n\s*\n", body):
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            parts.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip("\n")
+        if paragraph.strip():
+            parts.append(paragraph)
+    return parts
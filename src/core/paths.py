@@ -0,0 +1,39 @@
+import contextlib
+import os
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Returns (creating it if needed) a directory under PaperProbe's cache root.
+
+    The root is ``$PAPERPROBE_CACHE_DIR`` if set, otherwise ``paperprobe`` inside
+    ``$XDG_CACHE_HOME`` (defaulting to ``~/.cache``).
+    """
+    root = os.getenv("PAPERPROBE_CACHE_DIR") or os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "paperprobe",
+    )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def directory_size(path: str) -> int:
+    """Returns the total size in bytes of the files under ``path``, without following links."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            with contextlib.suppress(OSError):
+                total += os.lstat(os.path.join(root, name)).st_size
+    return total
+
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
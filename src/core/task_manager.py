@@ -1,42 +1,59 @@
 import asyncio
-import concurrent.futures
 import os
+import time
 from urllib.parse import urlparse
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from src.core.Logger import Logger
 from src.github_repo.github_repo import GitHubRepo
+from src.preprocessing_utilities.ast_cache import AstSummaryCache
 from src.preprocessing_utilities.pdf_parser import PDFParser
+from src.preprocessing_utilities.symbol_index import SymbolIndex
+from src.preprocessing_utilities.trigram_index import TrigramIndex
 from src.tool_providers.code_analysis_tools_provider import CodeAnalysisToolsProvider
 from src.tool_providers.file_system_tools_provider import FileSystemToolsProvider
 from src.tool_providers.github_stats_tools_provider import GitHubStatsToolsProvider
+from src.tool_providers.tool_executor import ToolExecutor
 from src.tool_providers.venv_tools_provider import VenvToolsProvider
 
 from .llm_service import call_llm, execute_agentic_task
+from .paper_digest import digest_paper
+from .workspace import Workspace, repository_name
 
 
-async def async_get_github_links(pdf_path: str) -> list[str]:
+async def async_get_github_links(pdf_path: str) -> tuple[list[str], str]:
     return await asyncio.to_thread(get_github_links, pdf_path)
 
 
-async def async_basic_analysis(github_url: str) -> str:
-    return await asyncio.to_thread(basic_analysis, github_url)
+async def async_basic_analysis(github_url: str, paper_digest: str | None = None) -> str:
+    return await asyncio.to_thread(basic_analysis, github_url, paper_digest)
 
 
-def get_github_links(pdf_path: str) -> list[str]:
-    """Extract GitHub links from a PDF file.
+def get_github_links(pdf_path: str) -> tuple[list[str], str]:
+    """Extract GitHub links from a PDF file, most relevant first, and digest the paper.
 
     Args:
-        pdf_path (str): The path to the PDF file."""
+        pdf_path (str): The path to the PDF file.
+
+    Returns:
+        tuple[list[str], str]: The links, and the paper's digest (method, datasets and
+        statements about the code), to pass on to the analysis of the chosen repository.
+        The digest is empty when the paper has no links, as there is nothing to analyse.
+    """
 
     is_url = bool(urlparse(pdf_path).scheme in ("http", "https"))
     pdf_parser = PDFParser(pdf_path, is_url=is_url)
     github_links = list(pdf_parser.extract_github_links())
+    if not github_links:
+        return [], ""
+    paper_digest = digest_paper(pdf_parser.get_text()).to_prompt()
+    if len(github_links) < 2:
+        return github_links, paper_digest
+
+    RANKING_PROMPT = f"""Read the following digest of a research paper:
 
-    RANKING_PROMPT = f"""Read the following text extracted from a research paper:
-    
-    {pdf_parser.get_text()}
+    {paper_digest}
 
     Here are some github links extracted from the paper. Identify which of theses links
     is the main code repository for the paper or is most relevant to the paper. Only return the link, nothing else.
@@ -53,49 +70,83 @@ def get_github_links(pdf_path: str) -> list[str]:
             github_links[0], github_links[i] = github_links[i], github_links[0]
             break
 
-    return github_links
+    return github_links, paper_digest
 
 
-def get_example_script(base_dir: str) -> str:
+def get_example_script(
+    base_dir: str,
+    search_index: TrigramIndex | None = None,
+    symbol_index: SymbolIndex | None = None,
+    focus_areas: list[str] | None = None,
+    paper_digest: str | None = None,
+) -> str:
     """Uses an LLM-based agent to generate an example script demonstrating the main functionality of the codebase
     located at the given base directory.
 
     Args:
         base_dir (str): The base directory of the code repository.
+        search_index (TrigramIndex | None): Optional search index over the repository, used by the
+            directory search tool once it has finished building.
+        symbol_index (SymbolIndex | None): Optional symbol index over the repository, used by the
+            symbol lookup tools. One is built on first use if not given.
+        focus_areas (list[str] | None): Optional areas of the codebase to write one example
+            script each for, instead of a single script for the primary functionality.
+        paper_digest (str | None): Optional digest of the paper the repository accompanies,
+            so that the scripts demonstrate the paper's method.
 
     Returns:
-        str: The generated example script.
+        str: The generated example script, or the scripts for each focus area in markdown.
     """
-    fs_tools_provider = FileSystemToolsProvider(base_dir)
-    code_analysis_tools_provider = CodeAnalysisToolsProvider(base_dir)
-
-    script_gen_tools = (
-        fs_tools_provider.get_tool_list() + code_analysis_tools_provider.get_tool_list()
+    fs_tools_provider = FileSystemToolsProvider(base_dir, search_index=search_index)
+    ast_cache = symbol_index.ast_cache if symbol_index is not None else AstSummaryCache()
+    code_analysis_tools_provider = CodeAnalysisToolsProvider(
+        base_dir, symbol_index=symbol_index, ast_cache=ast_cache
     )
 
-    def get_venv_tools():
-        venv_tools_provider = VenvToolsProvider(base_dir)
-        return venv_tools_provider.get_tool_list()
-
-    # run get_tool_list with a timeout (seconds). adjust TOOL_TIMEOUT as needed.
-    TOOL_TIMEOUT = 120.0
-    venv_tools = []
-    try:
-        _ex = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-        fut = _ex.submit(get_venv_tools)
-        try:
-            Logger.log("Setting up virtual environment...")
-            venv_tools = fut.result(timeout=TOOL_TIMEOUT)
-        except concurrent.futures.TimeoutError:
-            # timed out — ignore and continue with no venv tools
-            Logger.log("Virtual environment setup timed out. Continuing without venv tools...")
-            venv_tools = []
-        finally:
-            _ex.shutdown(wait=False)
-    except Exception:
-        venv_tools = []
-
-    script_gen_tools += venv_tools
+    # One executor for all providers, so that running a script invalidates memoized reads.
+    tool_executor = ToolExecutor()
+    script_gen_tools = fs_tools_provider.get_tool_list(
+        tool_executor
+    ) + code_analysis_tools_provider.get_tool_list(tool_executor)
+
+    # The environment is set up in the background while the agent explores the repository;
+    # the venv tools wait for it when first used. Setup writes into the clone (the venv,
+    # requirements.txt), so reads memoized meanwhile are dropped once it finishes.
+    venv_tools_provider = VenvToolsProvider(base_dir)
+    Logger.log("Setting up virtual environment in the background...")
+    venv_tools_provider.start_setup(on_finished=tool_executor.files_changed)
+    script_gen_tools += venv_tools_provider.get_tool_list(tool_executor)
+    script_gen_tools.append(
+        tool_executor.batch_tool(
+            script_gen_tools,
+            set(fs_tools_provider.read_only_tools + code_analysis_tools_provider.read_only_tools),
+        )
+    )
+    script_gen_tools.append(tool_executor.fetch_more_tool())
+
+    if focus_areas:
+        areas = "\n".join(f"- {area}" for area in focus_areas)
+        task = (
+            "Your task is to understand the repository at the given base directory and produce "
+            "one runnable Python example script for each of the following areas of the "
+            f"codebase:\n{areas}\n"
+        )
+        final_answer = (
+            "On your final response, return the final version of every script, each under a "
+            "markdown heading naming its area and in a fenced python code block."
+        )
+    else:
+        task = (
+            "Your task is to understand the repository at the given base "
+            "directory and produce a single, runnable Python example script that "
+            "demonstrates the repository's primary functionality. "
+        )
+        final_answer = "On your final response, return the final version of the Python script."
+    if paper_digest:
+        task += (
+            "The repository accompanies the research paper digested below; prefer examples "
+            f"that exercise the paper's method.\n{paper_digest}\n"
+        )
 
     script_gen_messages = [
         SystemMessage(
@@ -106,49 +157,67 @@ def get_example_script(base_dir: str) -> str:
             "requesting tool calls."
         ),
         HumanMessage(
-            "Your task is to understand the repository at the given base "
-            "directory and produce a single, runnable Python example script that "
-            "demonstrates the repository's primary functionality. Since the repository might "
+            task + "Start with the "
+            "get_start_here_digest tool, which ranks entry points, examples and the most central "
+            "modules. Since the repository might "
             "already contain some examples, you can check for those first. Use the filesystem and "
             "code-analysis tools to discover files, important modules, functions, and "
-            "entry points, then design a clear, self-contained script. If they are available, use the virtual-"
-            ""
+            "entry points; use run_tools_in_parallel to batch independent reads and searches "
+            "into a single step. Then design a clear, self-contained script. Use the virtual-"
             "environment tools to run the script, diagnose "
-            "errors, and refine the script as much as possible. On your "
-            "final response, return the final version of the Python script."
+            "errors, and refine the script as much as possible. " + final_answer
         ),
     ]
 
-    script = execute_agentic_task(tools=script_gen_tools, messages=script_gen_messages)
+    script = execute_agentic_task(
+        tools=script_gen_tools,
+        messages=script_gen_messages,
+        checkpoint_scope=os.path.abspath(base_dir),
+    )
+    Logger.log(ast_cache.stats_report())
+    Logger.log(tool_executor.metrics_report())
+    Logger.log(
+        f"Script validation: {venv_tools_provider.successful_script_runs} of "
+        f"{venv_tools_provider.script_runs} script runs succeeded."
+    )
 
     return script
 
 
-def basic_analysis(github_url: str) -> str:
-    """Performs a basic analysis of the GitHub repository at the given URL. It includes some
-    information about the repository and example scripts of usage.
+def clone_and_index(
+    github_url: str, destination: str = "."
+) -> tuple[str, TrigramIndex, SymbolIndex]:
+    """Clones the repository and starts indexing it in the background.
 
     Args:
         github_url (str): The URL of the GitHub repository.
+        destination (str): Directory to clone into, e.g. one checked out of the workspace.
+            An existing clone there is reused.
 
     Returns:
-        str: A summary of the repository in markdown format.
+        tuple[str, TrigramIndex, SymbolIndex]: The clone's directory and its search and symbol
+        indexes. Searches fall back to a linear scan until the search index is ready.
     """
-    if not github_url.startswith("https://"):
-        github_url = "https://" + github_url
+    Logger.stage("Cloning repository")
+    Logger.log(f"Cloning repository from {github_url}...")
+    repo = GitHubRepo(github_url)
+    base_dir = repo.clone_repo(destination)
 
-    try:
-        Logger.log(f"Cloning repository from {github_url}...")
-        repo = GitHubRepo(github_url)
-        base_dir = repo.clone_repo(".")
-    except Exception as e:
-        return f"Error cloning repository: {str(e)}"
+    search_index = TrigramIndex(base_dir)
+    search_index.start_background_build()
+    symbol_index = SymbolIndex(base_dir)
+    symbol_index.start_background_build()
+    return base_dir, search_index, symbol_index
 
-    try:
-        example_script = get_example_script(base_dir)
-    except Exception as e:
-        example_script = f"Error generating example script: {str(e)}"
 
+def collect_repository_info(github_url: str, base_dir: str) -> dict[str, str]:
+    """Collects GitHub statistics and the required packages of a cloned repository.
+
+    Returns:
+        dict[str, str]: ``basic_info``, ``issues_summary``, ``top_contributors`` and
+        ``required_packages``.
+    """
+    Logger.stage("Collecting repository statistics")
     github_stats_tools_provider = GitHubStatsToolsProvider(github_url)
 
     req_file = os.path.join(base_dir, "requirements.txt")
@@ -158,33 +227,81 @@ def basic_analysis(github_url: str) -> str:
     else:
         required_packages = "No requirements.txt found."
 
-    basic_info = github_stats_tools_provider.get_basic_info()
-    issues_summary = github_stats_tools_provider.get_issues_summary()
-    top_contributors = github_stats_tools_provider.get_top_contributors()
-
-    SUMMARY_PROMPT = f"""
-    Using the following repository information, generate a markdown summary of the repository. If certain
-    information is not available, omit that section from the summary. Make sure code is formatted correctly in markdown.
-    Include all available information.
-
-    **Repository Information**:
-    {"-" * 20}
-    {basic_info}
-    {issues_summary}
-    {top_contributors}
-    {"-" * 20}
-    **Required Packages**:
-    {"-" * 20}
-    {required_packages}
-    {"-" * 20}
-    **Example Script of Usage**:
-    {"-" * 20}
-    {example_script}
-    {"-" * 20}
-"""
-    try:
-        Logger.log("Summarizing results...")
-        summary = call_llm(SUMMARY_PROMPT)
-        return summary
-    except Exception:
-        return "LLM error during summary generation. Make sure you have set the necessary environment variables."
+    return {
+        "basic_info": github_stats_tools_provider.get_basic_info(),
+        "issues_summary": github_stats_tools_provider.get_issues_summary(),
+        "top_contributors": github_stats_tools_provider.get_top_contributors(),
+        "required_packages": required_packages,
+    }
+
+
+def basic_analysis(github_url: str, paper_digest: str | None = None) -> str:
+    """Performs a basic analysis of the GitHub repository at the given URL. It includes some
+    information about the repository and example scripts of usage.
+
+    Args:
+        github_url (str): The URL of the GitHub repository.
+        paper_digest (str | None): Optional digest of the paper the repository accompanies.
+
+    Returns:
+        str: A summary of the repository in markdown format.
+
+    Raises:
+        RuntimeError: If the repository could not be cloned or indexed.
+    """
+    if not github_url.startswith("https://"):
+        github_url = "https://" + github_url
+
+    with Workspace().checkout("clone", repository_name(github_url)) as clone_dir:
+        started = time.perf_counter()
+        try:
+            base_dir, search_index, symbol_index = clone_and_index(github_url, clone_dir)
+        except Exception as e:
+            # Raised rather than reported, so a queued job fails and is retried instead of
+            # recording the error as the analysis.
+            raise RuntimeError(f"Error cloning repository: {str(e)}") from e
+
+        try:
+            Logger.stage("Generating example script")
+            example_script = get_example_script(
+                base_dir,
+                search_index=search_index,
+                symbol_index=symbol_index,
+                paper_digest=paper_digest,
+            )
+        except Exception as e:
+            example_script = f"Error generating example script: {str(e)}"
+
+        info = collect_repository_info(github_url, base_dir)
+
+        SUMMARY_PROMPT = f"""
+        Using the following repository information, generate a markdown summary of the repository. If certain
+        information is not available, omit that section from the summary. Make sure code is formatted correctly in markdown.
+        Include all available information.
+
+        **Repository Information**:
+        {"-" * 20}
+        {info["basic_info"]}
+        {info["issues_summary"]}
+        {info["top_contributors"]}
+        {"-" * 20}
+        **Required Packages**:
+        {"-" * 20}
+        {info["required_packages"]}
+        {"-" * 20}
+        **Paper Digest**:
+        {"-" * 20}
+        {paper_digest or "No paper given."}
+        {"-" * 20}
+        **Example Script of Usage**:
+        {"-" * 20}
+        {example_script}
+        {"-" * 20}
+    """
+        try:
+            Logger.stage("Summarizing results")
+            summary = call_llm(SUMMARY_PROMPT)
+            Logger.log(f"Analysis finished in {time.perf_counter() - started:.1f}s.")
+            return summary
+        except Exception:
+            return "LLM error during summary generation. Make sure you have set the necessary environment variables."
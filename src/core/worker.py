@@ -0,0 +1,281 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from src.core.job_queue import Job, JobQueue, open_queue
+from src.core.Logger import Logger
+
+# Workers extend their lease on the running job, and publish its new log events, this often;
+# must be well below job_queue.LEASE_SECONDS.
+HEARTBEAT_SECONDS = 5.0
+# How long an idle worker waits before looking for new jobs again.
+POLL_SECONDS = 1.0
+DEFAULT_WORKERS = int(os.getenv("PAPERPROBE_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# Finished jobs are removed from the queue after this long; results stay in the history.
+FINISHED_JOB_RETENTION_SECONDS = 7 * 86400
+
+
+def scan_paper(payload: dict, on_section: Callable[[str], None] | None = None) -> dict:
+    """Job handler: scans the paper at ``payload["source"]`` for GitHub links, digests it and
+    records it in the history.
+
+    Returns:
+        dict: The ``links``, the ``paper_digest`` and the history's ``paper_id``.
+    """
+    from src.core.history import default_history
+    from src.core.task_manager import get_github_links
+
+    source = payload["source"]
+    links, paper_digest = get_github_links(source)
+    paper_id = default_history().record_paper(source, links, paper_digest)
+    return {"links": links, "paper_digest": paper_digest, "paper_id": paper_id}
+
+
+def analyze_repository(payload: dict, on_section: Callable[[str], None] | None = None) -> dict:
+    """Job handler: analyses the repository at ``payload["url"]`` in ``payload["mode"]``
+    ("basic" or "detailed"), saves the report in the workspace and records it in the
+    history, with the time and LLM tokens it took.
+
+    The payload may also carry the ``paper_id`` and ``paper_digest`` of the paper the
+    repository was found in. The detailed analysis passes its sections to ``on_section``
+    as they complete.
+
+    Returns:
+        dict: The history's ``analysis_id`` and the report's ``filename``.
+    """
+    from src.core.history import default_history
+
+    url, mode = payload["url"], payload["mode"]
+    session = Logger.current_session()
+    started, tokens = time.perf_counter(), session.tokens
+    if mode == "detailed":
+        from src.core.detailed_analysis import detailed_analysis
+
+        markdown = detailed_analysis(url, on_section, payload.get("paper_digest"))
+    else:
+        from src.core.task_manager import basic_analysis
+
+        markdown = basic_analysis(url, payload.get("paper_digest"))
+    seconds = time.perf_counter() - started
+
+    filename = save_report(url, mode, markdown)
+    analysis_id = default_history().record_analysis(
+        url,
+        mode,
+        markdown,
+        seconds,
+        session.tokens - tokens,
+        paper_id=payload.get("paper_id"),
+        report_path=filename,
+    )
+    return {"analysis_id": analysis_id, "filename": filename}
+
+
+def save_report(url: str, mode: str, markdown: str) -> str:
+    """Saves an analysis report in the workspace and returns its path."""
+    from src.core.workspace import Workspace, repository_name
+
+    return Workspace().save_report(f"{repository_name(url)}-{mode}", markdown, url)
+
+
+def benchmark_job(payload: dict, on_section: Callable[[str], None] | None = None) -> dict:
+    """Job handler standing in for an analysis, offline: ``payload["iterations"]`` rounds of
+    pure-Python work, which holds the GIL like parsing and indexing do, then
+    ``payload["io_ms"]`` milliseconds of waiting, like LLM calls and subprocesses."""
+    total = 0
+    for i in range(payload["iterations"]):
+        total += i * i
+    time.sleep(payload["io_ms"] / 1000)
+    return {"total": total}
+
+
+HANDLERS: dict[str, Callable[[dict, Callable[[str], None] | None], dict]] = {
+    "scan": scan_paper,
+    "analyze": analyze_repository,
+    "benchmark": benchmark_job,
+}
+
+
+class Worker:
+    """Runs jobs from a queue, one at a time.
+
+    Each job runs in its own log session. While it runs, a heartbeat thread extends the
+    worker's lease every ``HEARTBEAT_SECONDS`` and publishes the job's stage, token count
+    and new log events to the queue, where clients follow them; sections of a detailed
+    analysis are published as they complete. A handler raising an exception fails the
+    attempt, and the queue retries it with backoff.
+
+    Args:
+        queue (JobQueue): The queue to take jobs from.
+        name (str | None): Worker name recorded with its jobs; defaults to host and pid.
+        handlers (dict | None): Handler per job kind; defaults to ``HANDLERS``.
+    """
+
+    def __init__(self, queue: JobQueue, name: str | None = None, handlers: dict | None = None):
+        self.queue = queue
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.handlers = handlers or HANDLERS
+
+    def run(self, stop=None, poll_seconds: float = POLL_SECONDS) -> int:
+        """Runs jobs until ``stop`` (a ``threading`` or ``multiprocessing`` event) is set.
+
+        Returns:
+            int: The number of jobs run.
+        """
+        stop = stop or threading.Event()
+        count, last_beat = 0, 0.0
+        try:
+            while not stop.is_set():
+                if time.time() - last_beat >= HEARTBEAT_SECONDS:
+                    self.queue.register_worker(self.name)
+                    last_beat = time.time()
+                job = self.queue.claim(self.name)
+                if job is None:
+                    stop.wait(poll_seconds)
+                    continue
+                self.run_job(job)
+                count += 1
+                last_beat = 0.0
+        finally:
+            self.queue.unregister_worker(self.name)
+        return count
+
+    def run_job(self, job: Job) -> None:
+        self.queue.register_worker(self.name, job.id)
+        handler = self.handlers.get(job.kind)
+        with Logger.session(f"job {job.id}: {job.kind}") as session:
+            published = 0
+
+            def publish() -> bool:
+                nonlocal published
+                events, _ = session.events_since(published)
+                if events:
+                    published = events[-1].seq + 1
+                    self.queue.add_events(job.id, [("log", e.level, e.message) for e in events])
+                return self.queue.heartbeat(job.id, self.name, session.stage, session.tokens)
+
+            finished = threading.Event()
+
+            def beat() -> None:
+                holding = True
+                while not finished.wait(HEARTBEAT_SECONDS):
+                    try:
+                        if not publish() and holding:
+                            holding = False
+                            session.append(
+                                f"Worker {self.name} lost its lease on job {job.id}; its result "
+                                "will be discarded.",
+                                level="warning",
+                            )
+                        self.queue.register_worker(self.name, job.id)
+                    except Exception as e:
+                        session.append(f"Heartbeat failed: {str(e)}", level="warning")
+
+            Logger.log(
+                f"Worker {self.name} started job {job.id} "
+                f"(attempt {job.attempts} of {job.max_attempts})."
+            )
+            publish()
+            heartbeat = threading.Thread(target=beat, daemon=True)
+            heartbeat.start()
+            result, error = None, None
+            try:
+                if handler is None:
+                    raise ValueError(f"unknown job kind '{job.kind}'")
+                result = handler(
+                    job.payload,
+                    lambda section: self.queue.add_events(job.id, [("section", "info", section)]),
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {str(e)}"
+                Logger.log(f"Job {job.id} failed: {error}", level="error")
+            finally:
+                finished.set()
+                heartbeat.join()
+            publish()
+        if error is None:
+            self.queue.complete(job.id, self.name, result)
+        else:
+            self.queue.fail(job.id, self.name, error)
+
+
+def worker_main(queue_url: str | None, stop, poll_seconds: float = POLL_SECONDS) -> None:
+    """Entry point of a worker process."""
+    # The pool's owner handles Ctrl+C: it lets running jobs finish on the first one.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    queue = open_queue(queue_url)
+    try:
+        Worker(queue).run(stop, poll_seconds)
+    finally:
+        queue.close()
+
+
+class WorkerPool:
+    """Worker processes running jobs from a shared queue.
+
+    Each analysis then runs in its own process, with its own GIL, subprocesses and log
+    state. Workers are spawned rather than forked, as the parent (e.g. the TUI) may be
+    running threads. Starting the pool also purges jobs finished more than
+    ``FINISHED_JOB_RETENTION_SECONDS`` ago.
+
+    Args:
+        processes (int): Number of worker processes; ``$PAPERPROBE_WORKERS``, or the number
+            of CPUs up to 4, by default.
+        queue_url (str | None): Queue the workers take jobs from; see ``open_queue``.
+        poll_seconds (float): How long idle workers wait before looking for new jobs again.
+    """
+
+    def __init__(
+        self,
+        processes: int = DEFAULT_WORKERS,
+        queue_url: str | None = None,
+        poll_seconds: float = POLL_SECONDS,
+    ):
+        context = multiprocessing.get_context("spawn")
+        self.processes = processes
+        self.queue_url = queue_url
+        self._stop = context.Event()
+        self._processes = [
+            context.Process(
+                target=worker_main,
+                args=(queue_url, self._stop, poll_seconds),
+                name=f"paperprobe-worker-{i}",
+            )
+            for i in range(processes)
+        ]
+
+    def start(self) -> None:
+        queue = open_queue(self.queue_url)
+        try:
+            queue.purge(FINISHED_JOB_RETENTION_SECONDS)
+        finally:
+            queue.close()
+        for process in self._processes:
+            process.start()
+
+    def join(self) -> None:
+        for process in self._processes:
+            process.join()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Asks the workers to exit after their current job and waits up to ``timeout``
+        seconds for them; workers still running then are terminated, and their jobs are
+        retried once their leases expire."""
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for process in self._processes:
+            process.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    def __enter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop(timeout=0 if exc_info[0] else None)
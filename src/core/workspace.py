@@ -0,0 +1,245 @@
+import contextlib
+import glob
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+
+from src.core.Logger import Logger
+from src.core.paths import directory_size, get_cache_dir, pid_alive
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_QUOTA_BYTES = int(float(os.getenv("PAPERPROBE_WORKSPACE_QUOTA_GB", "20")) * 1024**3)
+KINDS = ("clone", "report")
+# Prefix of downloaded papers in the temporary directory; see PDFParser.
+DOWNLOAD_PREFIX = "paperprobe-"
+# Downloads older than this are assumed to be leaked by a crashed process.
+STALE_DOWNLOAD_SECONDS = 3600
+
+
+@dataclass
+class Artifact:
+    id: str
+    kind: str
+    path: str
+    lease: str
+
+
+class Workspace:
+    """Managed directory for the artifacts analyses leave on disk.
+
+    Clones (including their ``.venv``) and reports live under the workspace root
+    (``$PAPERPROBE_WORKSPACE_DIR``, or ``workspace`` in the cache root) and are recorded
+    in a catalog with their kind, size, last use and owning job. Artifacts in use are
+    leased, as in the environment pool: :meth:`checkout` hands a clone directory to
+    one analysis at a time, so concurrent analyses of the same repository get separate
+    clones, and an idle clone is reused by the next analysis of that repository. Least
+    recently used artifacts without live leases are removed once the workspace exceeds
+    its quota (``$PAPERPROBE_WORKSPACE_QUOTA_GB``, default 20).
+    """
+
+    def __init__(self, root: str | None = None, quota_bytes: int = DEFAULT_QUOTA_BYTES):
+        self.root = root or os.getenv("PAPERPROBE_WORKSPACE_DIR") or get_cache_dir("workspace")
+        self.quota_bytes = quota_bytes
+        for kind in KINDS:
+            os.makedirs(os.path.join(self.root, kind + "s"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "leases"), exist_ok=True)
+
+    @contextlib.contextmanager
+    def checkout(self, kind: str, name: str, job: str | None = None):
+        """Leases a directory for an artifact for the duration of the block.
+
+        An existing, unleased artifact of the same kind and name is reused; otherwise a
+        new, empty directory is created. On exit the artifact's size is recorded and the
+        workspace is garbage collected.
+
+        Args:
+            kind (str): One of ``KINDS``.
+            name (str): Name identifying the artifact, e.g. the repository.
+            job (str | None): Owner recorded in the catalog; defaults to the name of the
+                current log session.
+
+        Yields:
+            str: The artifact's directory.
+        """
+        artifact = self._acquire(kind, name, job or Logger.current_session().name)
+        try:
+            yield artifact.path
+        finally:
+            self.release(artifact)
+
+    def save_report(self, name: str, markdown: str, job: str | None = None) -> str:
+        """Writes a report into the workspace and returns its path."""
+        with self.checkout("report", name, job) as report_dir:
+            path = os.path.join(report_dir, f"{name}.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(markdown)
+        return path
+
+    def release(self, artifact: Artifact) -> None:
+        with self._locked():
+            catalog = self._read_catalog()
+            if artifact.id in catalog:
+                catalog[artifact.id]["size"] = directory_size(artifact.path)
+                catalog[artifact.id]["last_used"] = time.time()
+                self._write_catalog(catalog)
+        with contextlib.suppress(OSError):
+            os.remove(artifact.lease)
+        self.gc()
+
+    def gc(self, quota_bytes: int | None = None) -> int:
+        """Removes least recently used, unleased artifacts until the workspace fits its quota.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        quota = self.quota_bytes if quota_bytes is None else quota_bytes
+        reclaimed = self._remove(lambda entry, total: total > quota)
+        if reclaimed:
+            Logger.log(f"Workspace GC reclaimed {reclaimed / 1024**2:.0f} MB.")
+        return reclaimed
+
+    def cleanup(self, older_than_seconds: float | None = None) -> int:
+        """Removes every unleased artifact (or those unused for ``older_than_seconds``),
+        catalog entries whose files are gone, and papers leaked in the temporary directory.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        cutoff = time.time() - (older_than_seconds or 0.0)
+        reclaimed = self._remove(lambda entry, total: entry["last_used"] <= cutoff)
+        for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{DOWNLOAD_PREFIX}*.pdf")):
+            with contextlib.suppress(OSError):
+                if time.time() - os.path.getmtime(path) > STALE_DOWNLOAD_SECONDS:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                    reclaimed += size
+        return reclaimed
+
+    def report(self) -> str:
+        """Describes the catalog: one line per artifact, most recently used first."""
+        catalog = self._read_catalog()
+        total = sum(entry["size"] for entry in catalog.values())
+        lines = [
+            f"Workspace {self.root}: {len(catalog)} artifacts, {total / 1024**2:.0f} MB of "
+            f"{self.quota_bytes / 1024**2:.0f} MB quota."
+        ]
+        for artifact_id, entry in sorted(catalog.items(), key=lambda item: -item[1]["last_used"]):
+            in_use = " (in use)" if self._has_live_lease(artifact_id) else ""
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))
+            lines.append(
+                f"  {entry['kind']:<6} {artifact_id}: {entry['size'] / 1024**2:.1f} MB, last used "
+                f"{last_used}, job {entry['job']}{in_use}"
+            )
+        return "\n".join(lines)
+
+    def _acquire(self, kind: str, name: str, job: str) -> Artifact:
+        if kind not in KINDS:
+            raise ValueError(f"unknown artifact kind '{kind}'")
+        with self._locked():
+            catalog = self._read_catalog()
+            candidates = [
+                artifact_id
+                for artifact_id, entry in catalog.items()
+                if entry["kind"] == kind
+                and entry["name"] == name
+                and os.path.isdir(entry["path"])
+                and not self._has_live_lease(artifact_id)
+            ]
+            if candidates:
+                artifact_id = max(candidates, key=lambda a: catalog[a]["last_used"])
+            else:
+                artifact_id = f"{_slug(name)}-{uuid.uuid4().hex[:8]}"
+                path = os.path.join(self.root, kind + "s", artifact_id)
+                os.makedirs(path)
+                catalog[artifact_id] = {"kind": kind, "name": name, "path": path, "size": 0}
+            entry = catalog[artifact_id]
+            entry.update(job=job, last_used=time.time())
+            lease = self._acquire_lease(artifact_id)
+            self._write_catalog(catalog)
+        return Artifact(artifact_id, kind, entry["path"], lease)
+
+    def _remove(self, should_remove) -> int:
+        """Removes the unleased artifacts for which ``should_remove(entry, remaining_total)``
+        holds, least recently used first."""
+        reclaimed = 0
+        with self._locked():
+            catalog = self._read_catalog()
+            total = sum(entry["size"] for entry in catalog.values())
+            by_last_use = sorted(catalog.items(), key=lambda item: item[1]["last_used"])
+            for artifact_id, entry in by_last_use:
+                if not os.path.exists(entry["path"]):
+                    del catalog[artifact_id]
+                    total -= entry["size"]
+                    continue
+                if not should_remove(entry, total - reclaimed):
+                    continue
+                if self._has_live_lease(artifact_id):
+                    continue
+                shutil.rmtree(entry["path"], ignore_errors=True)
+                shutil.rmtree(os.path.join(self.root, "leases", artifact_id), ignore_errors=True)
+                del catalog[artifact_id]
+                reclaimed += entry["size"]
+            self._write_catalog(catalog)
+        return reclaimed
+
+    def _acquire_lease(self, artifact_id: str) -> str:
+        lease_dir = os.path.join(self.root, "leases", artifact_id)
+        os.makedirs(lease_dir, exist_ok=True)
+        lease = os.path.join(lease_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+        open(lease, "w").close()
+        return lease
+
+    def _has_live_lease(self, artifact_id: str) -> bool:
+        lease_dir = os.path.join(self.root, "leases", artifact_id)
+        if not os.path.isdir(lease_dir):
+            return False
+        for name in os.listdir(lease_dir):
+            pid = int(name.split("-", 1)[0]) if name.split("-", 1)[0].isdigit() else -1
+            if pid_alive(pid):
+                return True
+            # The process holding this lease has exited without releasing it.
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(lease_dir, name))
+        return False
+
+    def _read_catalog(self) -> dict:
+        try:
+            with open(os.path.join(self.root, "catalog.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_catalog(self, catalog: dict) -> None:
+        path = os.path.join(self.root, "catalog.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        os.replace(f"{path}.tmp", path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, "catalog.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def repository_name(github_url: str) -> str:
+    """Names a repository's artifacts after its owner and name, e.g. ``owner__repo``."""
+    return "__".join(github_url.rstrip("/").split("github.com/")[-1].split("/")[:2])
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name)[:60]
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from src.core.paths import get_cache_dir
+
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Evict once the cache has grown by this fraction of its limit since the last sweep.
+EVICTION_SLACK = 0.1
+
+
+class AstSummaryCache:
+    """On-disk cache of per-file structural summaries, keyed by source content hash.
+
+    Entries live under ``<cache root>/ast_summaries/<namespace>/`` where the
+    namespace combines the kind of summary, the version of the code producing it
+    and the running Python's grammar version, so bumping any of them simply starts
+    a fresh namespace. Writes are atomic (write to a temporary file, then rename),
+    making the cache safe to share between concurrent analyses and processes.
+    Least recently used entries are evicted when the cache exceeds its size limit.
+
+    Each instance counts hits, misses and the parse time that hits saved, so it can
+    report per-analysis statistics.
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir("ast_summaries")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.parse_seconds = 0.0
+        self.parse_seconds_saved = 0.0
+        self._lock = threading.Lock()
+        self._bytes_written = 0
+
+    @staticmethod
+    def namespace(kind: str, version: int) -> str:
+        return f"{kind}-v{version}-py{sys.version_info.major}.{sys.version_info.minor}"
+
+    def get(self, namespace: str, digest: str):
+        """Returns the cached value for a content hash, or ``None`` on a miss."""
+        path = self._entry_path(namespace, digest)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.parse_seconds_saved += entry.get("parse_seconds", 0.0)
+        return entry["value"]
+
+    def put(self, namespace: str, digest: str, value, parse_seconds: float = 0.0) -> None:
+        """Stores a JSON-serializable value together with the time it took to compute."""
+        path = self._entry_path(namespace, digest)
+        entry_dir = os.path.dirname(path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=entry_dir, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as tmp:
+                json.dump({"value": value, "parse_seconds": parse_seconds}, tmp)
+            os.replace(tmp.name, path)
+            size = os.path.getsize(path)
+        except (OSError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            self.parse_seconds += parse_seconds
+            self._bytes_written += size
+            should_evict = self._bytes_written > self.max_bytes * EVICTION_SLACK
+            if should_evict:
+                self._bytes_written = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits its size limit.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        reclaimed = 0
+        for _, size, path in sorted(entries):
+            if total - reclaimed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                reclaimed += size
+            except OSError:
+                continue
+        return reclaimed
+
+    def stats_report(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (
+            f"AST summary cache: {self.hits}/{lookups} hits ({hit_rate:.0f}%), "
+            f"{self.parse_seconds_saved:.2f}s of parsing saved, "
+            f"{self.parse_seconds:.2f}s spent parsing misses."
+        )
+
+    def _entry_path(self, namespace: str, digest: str) -> str:
+        return os.path.join(self.cache_dir, namespace, digest[:2], f"{digest}.json")
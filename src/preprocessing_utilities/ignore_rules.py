@@ -0,0 +1,129 @@
+import fnmatch
+import os
+import re
+
+DEFAULT_IGNORED_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    ".github",
+    ".venv",
+    "venv",
+    "env",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".tox",
+    ".nox",
+    ".ipynb_checkpoints",
+    "node_modules",
+    "site-packages",
+    "build",
+    "dist",
+}
+
+
+class IgnoreRules:
+    """Decides which paths of a cloned repository are worth searching or indexing.
+
+    Combines a fixed set of directories that never contain the repository's own
+    source (VCS metadata, virtual environments, caches and build output) with the
+    patterns from every ``.gitignore`` found while walking the tree.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        # Maps a directory (relative to base_dir, "" for the root) to its compiled
+        # gitignore patterns as (regex, negated, dir_only) tuples.
+        self._patterns: dict[str, list[tuple[re.Pattern, bool, bool]]] = {}
+
+    def walk_files(self, path: str = ""):
+        """Yields paths, relative to the repository root, of all files that are not ignored.
+
+        Args:
+            path (str): Directory to walk, relative to the repository root.
+        """
+        target_dir = os.path.join(self.base_dir, path)
+        for root, dirs, files in os.walk(target_dir):
+            rel_root = os.path.relpath(root, self.base_dir)
+            rel_root = "" if rel_root == "." else rel_root
+            self._load_gitignore(rel_root)
+
+            dirs[:] = sorted(
+                d
+                for d in dirs
+                if not self.is_ignored(os.path.join(rel_root, d), is_dir=True)
+                and not os.path.exists(os.path.join(root, d, "pyvenv.cfg"))
+            )
+            for f in sorted(files):
+                rel_path = os.path.join(rel_root, f)
+                if not self.is_ignored(rel_path, is_dir=False):
+                    yield rel_path
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Checks a path (relative to the repository root) against the ignore rules.
+
+        Only the ``.gitignore`` files of directories already visited by
+        :meth:`walk_files` are taken into account.
+        """
+        rel_path = rel_path.replace(os.sep, "/")
+        name = rel_path.rsplit("/", 1)[-1]
+        if is_dir and (name in DEFAULT_IGNORED_DIRS or name.endswith(".egg-info")):
+            return True
+
+        ignored = False
+        parts = rel_path.split("/")
+        # Rules from deeper .gitignore files take precedence, so apply them last.
+        for depth in range(len(parts)):
+            owner = "/".join(parts[:depth])
+            patterns = self._patterns.get(owner)
+            if not patterns:
+                continue
+            sub_path = "/".join(parts[depth:])
+            for regex, negated, dir_only in patterns:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(sub_path):
+                    ignored = not negated
+        return ignored
+
+    def _load_gitignore(self, rel_dir: str) -> None:
+        key = rel_dir.replace(os.sep, "/")
+        if key in self._patterns:
+            return
+        self._patterns[key] = []
+        gitignore = os.path.join(self.base_dir, rel_dir, ".gitignore")
+        if not os.path.isfile(gitignore):
+            return
+        try:
+            with open(gitignore, encoding="utf-8", errors="ignore") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/") if dir_only else line
+            if not line:
+                continue
+            self._patterns[key].append((self._compile(line), negated, dir_only))
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern:
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        regex = ""
+        for i, chunk in enumerate(pattern.split("**")):
+            if i:
+                regex += ".*"
+            regex += fnmatch.translate(chunk)[4:-3].replace(".*", "[^/]*")
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        return re.compile(regex + r"\Z", re.DOTALL)
@@ -0,0 +1,235 @@
+import ast
+import configparser
+import os
+import tomllib
+from collections import Counter
+
+from .ignore_rules import IgnoreRules
+from .symbol_index import SymbolIndex
+
+EXAMPLE_DIR_NAMES = {"examples", "example", "demo", "demos", "notebooks", "tutorials", "scripts"}
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 30
+# Directories whose packages are imported without the directory's name (``src/`` layouts).
+SOURCE_ROOTS = ("src",)
+
+
+class ImportGraph:
+    """Module-level import graph of a repository, with centrality and entry-point detection.
+
+    Nodes are the repository's own Python modules (taken from a :class:`SymbolIndex`);
+    an edge ``a -> b`` means module ``a`` imports module ``b``. Modules that many
+    others (transitively) depend on get a high PageRank, which is a good proxy for
+    the package's core API.
+    """
+
+    def __init__(self, base_dir: str, symbol_index: SymbolIndex):
+        self.base_dir = base_dir
+        self.symbol_index = symbol_index
+        self.module_paths: dict[str, str] = {}
+        self.edges: dict[str, set[str]] = {}
+        self.ranks: dict[str, float] = {}
+
+    def build(self) -> None:
+        self.symbol_index.ensure_built()
+        self.module_paths = {
+            _module_name(rel_path): rel_path for rel_path in self.symbol_index.modules
+        }
+        # Imports name a module relative to the repository root or to a source root. Only
+        # those prefixes are stripped, so e.g. ``import logging`` does not resolve to some
+        # ``utils/logging.py``.
+        by_name = {module: module for module in self.module_paths}
+        for module in sorted(self.module_paths):
+            root, _, name = module.partition(".")
+            if root in SOURCE_ROOTS and name:
+                by_name.setdefault(name, module)
+
+        self.edges = {}
+        for module, rel_path in self.module_paths.items():
+            is_package = rel_path.endswith("__init__.py")
+            targets = set()
+            for imported, name, _, _ in self.symbol_index.modules[rel_path]["imports"]:
+                imported = _resolve_relative(module, imported, is_package)
+                candidates = [f"{imported}.{name}", imported] if name else [imported]
+                for candidate in candidates:
+                    target = by_name.get(candidate)
+                    if target is not None and target != module:
+                        targets.add(target)
+                        break
+            self.edges[module] = targets
+        self.ranks = self._pagerank()
+
+    def top_modules(self, limit: int = 10) -> list[tuple[str, float]]:
+        return sorted(self.ranks.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def top_symbols(self, limit: int = 15) -> list[tuple[str, dict, int]]:
+        """Ranks public definitions by how often other modules call them.
+
+        Returns:
+            list[tuple[str, dict, int]]: ``(path, definition, call_count)`` triples, ties
+            broken by the PageRank of the defining module.
+        """
+        calls = Counter()
+        for summary in self.symbol_index.modules.values():
+            calls.update(name for name, _, _ in summary["references"])
+
+        path_ranks = {
+            path: self.ranks.get(module, 0.0) for module, path in self.module_paths.items()
+        }
+        scored = [
+            (path, definition, calls[definition["name"]])
+            for path, definition in self.symbol_index.public_api()
+            if definition["kind"] != "method" or definition["name"] != "__init__"
+        ]
+        scored.sort(key=lambda item: (-item[2], -path_ranks.get(item[0], 0.0), item[0]))
+        return scored[:limit]
+
+    def main_modules(self) -> list[str]:
+        return sorted(
+            path for path, summary in self.symbol_index.modules.items() if summary["has_main"]
+        )
+
+    def console_scripts(self) -> dict[str, str]:
+        """Returns console-script names mapped to their ``module:function`` targets."""
+        scripts = {}
+        pyproject = os.path.join(self.base_dir, "pyproject.toml")
+        if os.path.isfile(pyproject):
+            try:
+                with open(pyproject, "rb") as f:
+                    data = tomllib.load(f)
+                scripts.update(data.get("project", {}).get("scripts", {}))
+                scripts.update(data.get("tool", {}).get("poetry", {}).get("scripts", {}))
+            except Exception:
+                pass
+
+        setup_cfg = os.path.join(self.base_dir, "setup.cfg")
+        if os.path.isfile(setup_cfg):
+            parser = configparser.ConfigParser()
+            try:
+                parser.read(setup_cfg, encoding="utf-8")
+                entries = parser.get("options.entry_points", "console_scripts", fallback="")
+                scripts.update(_parse_entry_points(entries.splitlines()))
+            except Exception:
+                pass
+
+        setup_py = os.path.join(self.base_dir, "setup.py")
+        if os.path.isfile(setup_py):
+            try:
+                with open(setup_py, encoding="utf-8") as f:
+                    tree = ast.parse(f.read())
+                for node in ast.walk(tree):
+                    if isinstance(node, ast.keyword) and node.arg == "entry_points":
+                        value = ast.literal_eval(node.value)
+                        if isinstance(value, dict):
+                            scripts.update(_parse_entry_points(value.get("console_scripts", [])))
+            except Exception:
+                pass
+        return {str(k): str(v) for k, v in scripts.items()}
+
+    def example_files(self) -> list[str]:
+        examples = []
+        for rel_path in IgnoreRules(self.base_dir).walk_files():
+            parts = rel_path.lower().split(os.sep)
+            if not parts[-1].endswith((".py", ".ipynb")):
+                continue
+            if (
+                parts[-1].endswith(".ipynb")
+                or "example" in parts[-1]
+                or "demo" in parts[-1]
+                or any(p in EXAMPLE_DIR_NAMES for p in parts[:-1])
+            ):
+                examples.append(rel_path)
+        return examples
+
+    def start_here_digest(self, max_items: int = 10) -> str:
+        """Renders a compact, ranked summary of where to start reading the repository."""
+        sections = []
+
+        scripts = self.console_scripts()
+        if scripts:
+            lines = [f"  {name} -> {target}" for name, target in sorted(scripts.items())]
+            sections.append("Console scripts:\n" + "\n".join(lines[:max_items]))
+
+        examples = self.example_files()
+        if examples:
+            lines = [f"  {path}" for path in examples[:max_items]]
+            if len(examples) > max_items:
+                lines.append(f"  ... and {len(examples) - max_items} more")
+            sections.append("Examples and notebooks:\n" + "\n".join(lines))
+
+        mains = self.main_modules()
+        if mains:
+            lines = [f"  {path}" for path in mains[:max_items]]
+            if len(mains) > max_items:
+                lines.append(f"  ... and {len(mains) - max_items} more")
+            sections.append(
+                'Modules with an `if __name__ == "__main__":` block:\n' + "\n".join(lines)
+            )
+
+        modules = self.top_modules(max_items)
+        if modules:
+            lines = [
+                f"  {self.module_paths[module]} (imported by {self._importer_count(module)} modules)"
+                for module, _ in modules
+            ]
+            sections.append("Most central modules (by import graph):\n" + "\n".join(lines))
+
+        symbols = self.top_symbols(max_items)
+        if symbols:
+            lines = []
+            for path, definition, count in symbols:
+                lines.append(
+                    f"  {path}:{definition['line']}: {definition['signature']} ({count} calls)"
+                )
+            sections.append("Most used public symbols:\n" + "\n".join(lines))
+
+        return "\n\n".join(sections)
+
+    def _importer_count(self, module: str) -> int:
+        return sum(1 for targets in self.edges.values() if module in targets)
+
+    def _pagerank(self) -> dict[str, float]:
+        nodes = list(self.edges)
+        if not nodes:
+            return {}
+        count = len(nodes)
+        ranks = dict.fromkeys(nodes, 1.0 / count)
+        for _ in range(PAGERANK_ITERATIONS):
+            # Modules without imports spread their rank evenly, as in standard PageRank.
+            dangling = sum(ranks[n] for n in nodes if not self.edges[n])
+            new_ranks = dict.fromkeys(nodes, (1 - PAGERANK_DAMPING) / count)
+            for node in nodes:
+                new_ranks[node] += PAGERANK_DAMPING * dangling / count
+                targets = self.edges[node]
+                for target in targets:
+                    new_ranks[target] += PAGERANK_DAMPING * ranks[node] / len(targets)
+            ranks = new_ranks
+        return ranks
+
+
+def _module_name(rel_path: str) -> str:
+    module = rel_path[: -len(".py")].replace(os.sep, ".")
+    if module.endswith(".__init__"):
+        module = module[: -len(".__init__")]
+    return module
+
+
+def _resolve_relative(module: str, imported: str, is_package: bool) -> str:
+    level = len(imported) - len(imported.lstrip("."))
+    if not level:
+        return imported
+    parts = module.split(".")
+    # A package's own __init__ is its base for relative imports; a module's is its parent.
+    base = parts if is_package else parts[:-1]
+    base = base[: len(base) - (level - 1)] if level > 1 else base
+    remainder = imported[level:]
+    return ".".join(base + [remainder]) if remainder else ".".join(base)
+
+
+def _parse_entry_points(entries) -> dict[str, str]:
+    scripts = {}
+    for entry in entries:
+        if "=" in entry:
+            name, target = entry.split("=", 1)
+            scripts[name.strip()] = target.strip()
+    return scripts
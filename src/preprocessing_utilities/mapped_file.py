@@ -0,0 +1,122 @@
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+MAX_FILE_BYTES = 64 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+
+# Line-start offsets per file, keyed by (path, mtime_ns, size) so that edits invalidate them.
+_LINE_INDEX_CACHE_SIZE = 128
+_line_index_cache: OrderedDict[tuple[str, int, int], array] = OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+class MappedFile:
+    """Random-access, read-only view of a text file backed by a memory map.
+
+    Line boundaries are computed once per file version and cached, so reading a
+    range of lines only touches (and decodes) the bytes of those lines. Files that
+    are too large or look binary are rejected with a ``ValueError`` on open.
+    """
+
+    def __init__(self, path: str, max_bytes: int = MAX_FILE_BYTES):
+        self.path = os.path.abspath(path)
+        st = os.stat(self.path)
+        if st.st_size > max_bytes:
+            raise ValueError(
+                f"file is too large to read ({st.st_size:,} bytes, limit is {max_bytes:,})"
+            )
+        self._key = (self.path, st.st_mtime_ns, st.st_size)
+        self._file = open(self.path, "rb")
+        # mmap cannot map empty files; an empty bytes object behaves the same for reading.
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+        )
+        if b"\0" in self._data[:BINARY_SNIFF_BYTES]:
+            self.close()
+            raise ValueError("file appears to be binary")
+        self._line_starts = None
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    @property
+    def line_count(self) -> int:
+        return len(self._get_line_starts())
+
+    def read_lines(self, start_line: int, end_line: int) -> list[str]:
+        """Returns lines ``start_line`` to ``end_line`` (1-based, inclusive) without line endings."""
+        starts = self._get_line_starts()
+        start_line = max(start_line, 1)
+        end_line = min(end_line, len(starts))
+        return [self._line_at(i, starts) for i in range(start_line - 1, end_line)]
+
+    def search(self, pattern: str, regex: bool = False):
+        """Yields ``(line_number, line)`` for every line containing ``pattern``.
+
+        The search runs directly on the mapped bytes; only matching lines are decoded.
+        """
+        if regex:
+            matches = (
+                m.start() for m in re.finditer(pattern.encode("utf-8"), self._data, re.MULTILINE)
+            )
+        else:
+            matches = self._find_all(pattern.encode("utf-8"))
+
+        starts = None
+        last_line = 0
+        for offset in matches:
+            if starts is None:
+                starts = self._get_line_starts()
+            line_index = bisect_right(starts, offset) - 1
+            if line_index + 1 == last_line:
+                continue
+            last_line = line_index + 1
+            yield last_line, self._line_at(line_index, starts)
+
+    def _find_all(self, needle: bytes):
+        if not needle:
+            return
+        pos = self._data.find(needle)
+        while pos != -1:
+            yield pos
+            # Only the first match on each line matters, so resume at the next line.
+            line_end = self._data.find(b"\n", pos)
+            if line_end == -1:
+                return
+            pos = self._data.find(needle, line_end + 1)
+
+    def _line_at(self, index: int, starts: array) -> str:
+        end = starts[index + 1] if index + 1 < len(starts) else len(self._data)
+        return self._data[starts[index] : end].decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def _get_line_starts(self) -> array:
+        if self._line_starts is not None:
+            return self._line_starts
+        with _line_index_lock:
+            starts = _line_index_cache.get(self._key)
+            if starts is not None:
+                _line_index_cache.move_to_end(self._key)
+        if starts is None:
+            starts = array("Q", [0] if self._data else [])
+            starts.extend(m.end() for m in re.finditer(b"\n", self._data))
+            if starts and starts[-1] == len(self._data) and len(starts) > 1:
+                starts.pop()
+            with _line_index_lock:
+                _line_index_cache[self._key] = starts
+                while len(_line_index_cache) > _LINE_INDEX_CACHE_SIZE:
+                    _line_index_cache.popitem(last=False)
+        self._line_starts = starts
+        return starts
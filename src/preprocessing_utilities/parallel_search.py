@@ -0,0 +1,149 @@
+import base64
+import concurrent.futures
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+
+from .mapped_file import MappedFile
+
+DEFAULT_MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+# Matches counted per file beyond the ones shown, so that groups can report totals.
+MAX_COUNTED_MATCHES_PER_FILE = 1000
+
+
+@dataclass
+class FileMatches:
+    path: str
+    matches: list[tuple[int, str]] = field(default_factory=list)
+    total: int = 0
+    capped: bool = False
+
+
+@dataclass
+class SearchPage:
+    files: list[FileMatches]
+    cursor: str | None = None
+
+    @property
+    def match_count(self) -> int:
+        return sum(len(f.matches) for f in self.files)
+
+
+def encode_cursor(pattern: str, regex: bool, path: str, file_path: str, line: int) -> str:
+    payload = json.dumps({"p": pattern, "r": regex, "d": path, "f": file_path, "l": line})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, pattern: str, regex: bool, path: str) -> tuple[str, int]:
+    """Returns the ``(file_path, line)`` position stored in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a different search.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = payload["f"], int(payload["l"])
+        search = payload["p"], payload["r"], payload["d"]
+    except Exception as e:
+        raise ValueError("malformed cursor") from e
+    if search != (pattern, regex, path):
+        raise ValueError("cursor belongs to a different search")
+    return position
+
+
+def search_files(
+    base_dir: str,
+    files,
+    pattern: str,
+    regex: bool = False,
+    max_matches: int = 50,
+    path: str = "",
+    cursor: str = "",
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> SearchPage:
+    """Searches many files concurrently and returns at most ``max_matches`` matches.
+
+    Files are scanned in sorted path order by a thread pool with a bounded number
+    of files in flight; scanning stops as soon as the match budget is exhausted.
+    When matches remain, the returned page carries a cursor that resumes the same
+    search right after the last match shown.
+
+    Args:
+        base_dir (str): The repository root that ``files`` are relative to.
+        files: Iterable of candidate file paths relative to ``base_dir``.
+        pattern (str): Plain-text string or regular expression to search for.
+        regex (bool): Whether ``pattern`` is a regular expression.
+        max_matches (int): Match budget for this page; at least 1.
+        path (str): The directory the search was scoped to, recorded in the cursor.
+        cursor (str): Cursor returned by a previous page of the same search.
+        max_workers (int): Number of scanning threads.
+
+    Raises:
+        ValueError: If ``cursor`` is invalid for this search.
+    """
+    max_matches = max(1, max_matches)
+    resume_file, resume_line = ("", 0)
+    if cursor:
+        resume_file, resume_line = decode_cursor(cursor, pattern, regex, path)
+    ordered = sorted(f for f in files if f >= resume_file)
+
+    stop = threading.Event()
+
+    def scan(rel_path: str) -> FileMatches:
+        result = FileMatches(rel_path)
+        if stop.is_set():
+            return result
+        first_line = resume_line + 1 if rel_path == resume_file else 1
+        try:
+            with MappedFile(os.path.join(base_dir, rel_path)) as mapped:
+                for line_num, line in mapped.search(pattern, regex=regex):
+                    if line_num < first_line:
+                        continue
+                    result.total += 1
+                    if result.total <= max_matches:
+                        result.matches.append((line_num, line.strip()))
+                    if result.total >= MAX_COUNTED_MATCHES_PER_FILE:
+                        result.capped = True
+                        break
+                    if stop.is_set():
+                        break
+        except Exception:
+            pass
+        return result
+
+    page = SearchPage(files=[])
+    budget = max_matches
+    in_flight = max_workers * 2
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(scan, f) for f in ordered[:in_flight]]
+        next_index = len(futures)
+        for index, future in enumerate(_in_order(futures)):
+            if next_index < len(ordered) and not stop.is_set():
+                futures.append(executor.submit(scan, ordered[next_index]))
+                next_index += 1
+
+            result = future.result()
+            if not result.total:
+                continue
+            if len(result.matches) > budget:
+                result.matches = result.matches[:budget]
+            budget -= len(result.matches)
+            page.files.append(result)
+
+            if budget == 0:
+                stop.set()
+                last_line = result.matches[-1][0]
+                # Later candidates are not scanned, so any of them may still match.
+                if result.total > len(result.matches) or index + 1 < len(ordered):
+                    page.cursor = encode_cursor(pattern, regex, path, result.path, last_line)
+                break
+    return page
+
+
+def _in_order(futures: list):
+    # ``futures`` grows while being consumed, so iterate by index.
+    i = 0
+    while i < len(futures):
+        yield futures[i]
+        i += 1
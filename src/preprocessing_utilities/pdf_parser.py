@@ -1,3 +1,4 @@
+import os
 import re
 import shutil
 import tempfile
@@ -9,20 +10,25 @@ import pymupdf
 class PDFParser:
     def __init__(self, pdf_path: str, is_url: bool = True):
         self.pdf_path = pdf_path
-        self.text = (
-            self._extract_text(self._download_pdf()) if is_url else self._extract_text(pdf_path)
-        )
+        if is_url:
+            downloaded = self._download_pdf()
+            try:
+                self.text = self._extract_text(downloaded)
+            finally:
+                os.remove(downloaded)
+        else:
+            self.text = self._extract_text(pdf_path)
 
     def _download_pdf(self) -> str:
-        """Downloads the PDF from the given URL and returns the local file path."""
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmpf:
+        """Downloads the PDF from the given URL and returns the local file path. The caller
+        removes the file; the prefix lets the workspace cleanup find copies a crash leaked."""
+        with tempfile.NamedTemporaryFile(delete=False, prefix="paperprobe-", suffix=".pdf") as tmpf:
             with (
                 urllib.request.urlopen(self.pdf_path) as response,
                 open(tmpf.name, "wb") as out_file,
             ):
                 shutil.copyfileobj(response, out_file)
-            self.pdf_path = tmpf.name
-            return self.pdf_path
+            return tmpf.name
 
     def _extract_text(self, pdf_path: str) -> str:
         """Extracts text from the given PDF file path."""
@@ -0,0 +1,311 @@
+import ast
+import concurrent.futures
+import contextvars
+import hashlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from src.core.Logger import Logger
+
+from .ast_cache import AstSummaryCache
+from .ignore_rules import IgnoreRules
+
+# Below this many unparsed files a process pool costs more than it saves.
+MIN_FILES_FOR_PROCESS_POOL = 32
+
+
+def summarize_source(source: str) -> dict:
+    """Extracts the definitions, imports and call references of a Python module.
+
+    Args:
+        source (str): The module's source code.
+
+    Returns:
+        dict: ``definitions`` (dicts with ``name``, ``qualname``, ``kind``, ``line``,
+        ``signature``, ``docstring``), ``imports`` (``(module, name, alias, line)``
+        tuples), ``references`` (``(called_name, line, enclosing_qualname)`` tuples),
+        ``all`` (the names listed in ``__all__``, or ``None``) and ``has_main`` (whether
+        the module has an ``if __name__ == "__main__":`` block).
+
+    Raises:
+        SyntaxError: If the source cannot be parsed.
+    """
+    tree = ast.parse(source)
+    summary = {
+        "definitions": [],
+        "imports": [],
+        "references": [],
+        "all": None,
+        "has_main": False,
+    }
+
+    def visit(node, scope: list[str], in_class: bool) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualname = ".".join(scope + [child.name])
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                    bases = ", ".join(_unparse(b) for b in child.bases)
+                    signature = f"class {child.name}({bases})" if bases else f"class {child.name}"
+                else:
+                    kind = "method" if in_class else "function"
+                    prefix = "async def" if isinstance(child, ast.AsyncFunctionDef) else "def"
+                    returns = f" -> {_unparse(child.returns)}" if child.returns else ""
+                    signature = f"{prefix} {child.name}({_unparse(child.args)}){returns}"
+                summary["definitions"].append(
+                    {
+                        "name": child.name,
+                        "qualname": qualname,
+                        "kind": kind,
+                        "line": child.lineno,
+                        "signature": signature,
+                        "docstring": ast.get_docstring(child) or "",
+                    }
+                )
+                visit(child, scope + [child.name], isinstance(child, ast.ClassDef))
+                continue
+
+            if isinstance(child, ast.Import):
+                for alias in child.names:
+                    summary["imports"].append((alias.name, None, alias.asname, child.lineno))
+            elif isinstance(child, ast.ImportFrom):
+                module = "." * child.level + (child.module or "")
+                for alias in child.names:
+                    summary["imports"].append((module, alias.name, alias.asname, child.lineno))
+            elif isinstance(child, ast.Call):
+                func = child.func
+                called = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+                if called:
+                    summary["references"].append((called, child.lineno, ".".join(scope)))
+            elif isinstance(child, ast.If) and not scope and _is_main_check(child.test):
+                summary["has_main"] = True
+            elif isinstance(child, ast.Assign) and not scope:
+                for target in child.targets:
+                    if isinstance(target, ast.Name) and target.id == "__all__":
+                        try:
+                            summary["all"] = [str(n) for n in ast.literal_eval(child.value)]
+                        except Exception:
+                            pass
+            visit(child, scope, False)
+
+    visit(tree, [], False)
+    return summary
+
+
+def _is_main_check(test) -> bool:
+    return (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+        and len(test.comparators) == 1
+        and isinstance(test.comparators[0], ast.Constant)
+        and test.comparators[0].value == "__main__"
+    )
+
+
+def _unparse(node) -> str:
+    try:
+        return ast.unparse(node)
+    except Exception:
+        return "..."
+
+
+def _summarize_file(full_path: str) -> tuple[dict | None, float]:
+    started = time.perf_counter()
+    try:
+        with open(full_path, encoding="utf-8") as f:
+            summary = summarize_source(f.read())
+    except Exception:
+        summary = None
+    return summary, time.perf_counter() - started
+
+
+class SymbolIndex:
+    """Repository-wide index of Python definitions, imports and call references.
+
+    Files are parsed in parallel on a process pool. Summaries are cached by file
+    content hash, both persisted next to the clone and in the shared
+    :class:`AstSummaryCache`, so rebuilding after a change, or indexing another
+    clone of the same code, only re-parses the files whose contents differ.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(
+        self,
+        base_dir: str,
+        index_path: str | None = None,
+        ast_cache: AstSummaryCache | None = None,
+    ):
+        self.base_dir = os.path.abspath(base_dir)
+        self.ast_cache = ast_cache or AstSummaryCache()
+        self.index_path = index_path or f"{self.base_dir.rstrip(os.sep)}.symbol_index"
+        # Maps a repository-relative path to the summary of its current contents.
+        self.modules: dict[str, dict] = {}
+        self._by_hash: dict[str, dict] = {}
+        self._ready = threading.Event()
+        self._build_lock = threading.Lock()
+        self._thread = None
+
+    def start_background_build(self) -> threading.Thread:
+        """Builds the index on a daemon thread and returns that thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=contextvars.copy_context().run, args=(self.ensure_built,), daemon=True
+            )
+            self._thread.start()
+        return self._thread
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def ensure_built(self) -> None:
+        """Builds the index unless it is already built; concurrent callers wait for the build."""
+        with self._build_lock:
+            if self._ready.is_set():
+                return
+            try:
+                self.build()
+            except Exception as e:
+                Logger.log(f"Error building symbol index: {str(e)}")
+            self._ready.set()
+
+    def build(self) -> None:
+        started = time.perf_counter()
+        self._load()
+
+        hashes = {}
+        to_parse = {}
+        for rel_path in IgnoreRules(self.base_dir).walk_files():
+            if not rel_path.endswith(".py"):
+                continue
+            try:
+                with open(os.path.join(self.base_dir, rel_path), "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+            hashes[rel_path] = digest
+            if digest not in self._by_hash:
+                to_parse[digest] = rel_path
+
+        parsed = self._parse_all(to_parse)
+        self._by_hash = {
+            digest: self._by_hash.get(digest) or parsed.get(digest)
+            for digest in set(hashes.values())
+        }
+        self.modules = {
+            rel_path: self._by_hash[digest]
+            for rel_path, digest in hashes.items()
+            if self._by_hash[digest] is not None
+        }
+        self._save()
+        Logger.log(
+            f"Indexed symbols of {len(self.modules)} Python files ({len(to_parse)} parsed) "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+    def find_symbol(self, name: str) -> list[tuple[str, dict]]:
+        """Returns ``(path, definition)`` pairs whose name or qualified name equals ``name``."""
+        return [
+            (path, definition)
+            for path, summary in sorted(self.modules.items())
+            for definition in summary["definitions"]
+            if name in (definition["name"], definition["qualname"])
+        ]
+
+    def find_references(self, name: str) -> list[tuple[str, int, str]]:
+        """Returns ``(path, line, caller)`` for every call to something named ``name``."""
+        called = name.rsplit(".", 1)[-1]
+        return [
+            (path, line, caller)
+            for path, summary in sorted(self.modules.items())
+            for ref_name, line, caller in summary["references"]
+            if ref_name == called
+        ]
+
+    def public_api(self, path: str = "") -> list[tuple[str, dict]]:
+        """Returns ``(path, definition)`` for public module-level definitions and their methods.
+
+        Modules inside private packages or test directories are skipped, and a module's
+        ``__all__`` takes precedence over the leading-underscore convention.
+        """
+        target = os.path.normpath(path.strip("/")) if path.strip("/") else ""
+        prefix = target + os.sep if target else ""
+        api = []
+        for rel_path, summary in sorted(self.modules.items()):
+            if rel_path != target and not rel_path.startswith(prefix):
+                continue
+            parts = rel_path.split(os.sep)
+            if any(p.startswith("_") and p != "__init__.py" for p in parts) or any(
+                p in ("tests", "test") or p.startswith("test_") for p in parts
+            ):
+                continue
+            exported = summary["all"]
+            public_classes = set()
+            for definition in summary["definitions"]:
+                qualname = definition["qualname"]
+                if "." not in qualname:
+                    is_public = qualname in exported if exported is not None else qualname[0] != "_"
+                    if is_public:
+                        api.append((rel_path, definition))
+                        if definition["kind"] == "class":
+                            public_classes.add(qualname)
+                elif qualname.rsplit(".", 1)[0] in public_classes and (
+                    not definition["name"].startswith("_") or definition["name"] == "__init__"
+                ):
+                    api.append((rel_path, definition))
+        return api
+
+    def _parse_all(self, to_parse: dict[str, str]) -> dict[str, dict | None]:
+        namespace = AstSummaryCache.namespace("symbols", self.FORMAT_VERSION)
+        parsed = {}
+        paths = {}
+        for digest, rel_path in to_parse.items():
+            cached = self.ast_cache.get(namespace, digest)
+            if cached is not None:
+                parsed[digest] = cached
+            else:
+                paths[digest] = os.path.join(self.base_dir, rel_path)
+
+        results = None
+        if len(paths) >= MIN_FILES_FOR_PROCESS_POOL:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(
+                    mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    results = list(executor.map(_summarize_file, paths.values(), chunksize=16))
+            except Exception as e:
+                Logger.log(f"Parallel symbol indexing failed, parsing sequentially: {str(e)}")
+        if results is None:
+            results = [_summarize_file(p) for p in paths.values()]
+
+        for digest, (summary, parse_seconds) in zip(paths.keys(), results, strict=True):
+            parsed[digest] = summary
+            if summary is not None:
+                self.ast_cache.put(namespace, digest, summary, parse_seconds)
+        return parsed
+
+    def _load(self) -> None:
+        if self._by_hash or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "rb") as f:
+                payload = pickle.load(f)
+            if payload.get("version") == self.FORMAT_VERSION:
+                self._by_hash = payload["by_hash"]
+        except Exception:
+            self._by_hash = {}
+
+    def _save(self) -> None:
+        payload = {"version": self.FORMAT_VERSION, "by_hash": self._by_hash}
+        index_dir = os.path.dirname(self.index_path) or "."
+        try:
+            with tempfile.NamedTemporaryFile(dir=index_dir, delete=False) as tmp:
+                pickle.dump(payload, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp.name, self.index_path)
+        except OSError as e:
+            Logger.log(f"Could not persist symbol index: {str(e)}")
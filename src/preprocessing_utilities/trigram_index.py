@@ -0,0 +1,202 @@
+import contextvars
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+
+from src.core.Logger import Logger
+
+from .ignore_rules import IgnoreRules
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover - layout of the re package before Python 3.11
+    import sre_parse
+
+
+class TrigramIndex:
+    """Inverted index from byte trigrams to the repository files that contain them.
+
+    The index is built once per clone (normally on a background thread right after
+    cloning) and persisted next to the clone, so later analyses of the same checkout
+    can reuse it. Queries return a superset of the files that can match; callers are
+    expected to verify each candidate.
+    """
+
+    FORMAT_VERSION = 2
+    MAX_FILE_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, base_dir: str, index_path: str | None = None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.index_path = index_path or f"{self.base_dir.rstrip(os.sep)}.trigram_index"
+        self.files: list[str] = []
+        # Every file the walk found, including those too large or binary to index.
+        self._walked: list[str] = []
+        self._postings: dict[bytes, list[int]] = {}
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start_background_build(self) -> threading.Thread:
+        """Loads or builds the index on a daemon thread and returns that thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=contextvars.copy_context().run, args=(self._load_or_build,), daemon=True
+            )
+            self._thread.start()
+        return self._thread
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: float | None = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def candidates(self, pattern: str, regex: bool = False, path: str = "") -> list[str]:
+        """Returns the indexed files under ``path`` that may contain ``pattern``.
+
+        Args:
+            pattern (str): The plain-text string or regular expression being searched for.
+            regex (bool): Whether ``pattern`` is a regular expression.
+            path (str): Restrict candidates to this directory, relative to the repository root.
+
+        Returns:
+            list[str]: Candidate file paths relative to the repository root, in index order.
+        """
+        literals = _required_literals(pattern) if regex else [pattern]
+        file_ids = None
+        for literal in literals:
+            data = literal.encode("utf-8")
+            for i in range(len(data) - 2):
+                posting = self._postings.get(data[i : i + 3], [])
+                file_ids = set(posting) if file_ids is None else file_ids.intersection(posting)
+                if not file_ids:
+                    return []
+
+        if file_ids is None:
+            file_ids = range(len(self.files))
+        prefix = os.path.normpath(path.lstrip("/"))
+        prefix = "" if prefix == "." else prefix + os.sep
+        return [self.files[i] for i in sorted(file_ids) if self.files[i].startswith(prefix)]
+
+    def build(self) -> None:
+        """Walks the repository, honoring its ignore rules, and indexes every text file."""
+        started = time.perf_counter()
+        files = []
+        postings: dict[bytes, list[int]] = {}
+        walked = list(IgnoreRules(self.base_dir).walk_files())
+        for rel_path in walked:
+            full_path = os.path.join(self.base_dir, rel_path)
+            try:
+                if os.path.getsize(full_path) > self.MAX_FILE_BYTES:
+                    continue
+                with open(full_path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if b"\0" in data[:8192]:
+                continue
+
+            file_id = len(files)
+            files.append(rel_path)
+            for trigram in {data[i : i + 3] for i in range(len(data) - 2)}:
+                postings.setdefault(trigram, []).append(file_id)
+
+        self.files = files
+        self._walked = walked
+        self._postings = postings
+        Logger.log(
+            f"Indexed {len(files)} files for search in {time.perf_counter() - started:.1f}s."
+        )
+
+    def _load_or_build(self) -> None:
+        try:
+            if not self._load():
+                self.build()
+                self._save()
+        except Exception as e:
+            Logger.log(f"Search index unavailable, falling back to linear search: {str(e)}")
+            self.files = []
+            self._postings = {}
+            return
+        self._ready.set()
+
+    def _snapshot(self, files: list[str]) -> list[tuple[str, int, int]]:
+        snapshot = []
+        for rel_path in files:
+            st = os.stat(os.path.join(self.base_dir, rel_path))
+            snapshot.append((rel_path, st.st_mtime_ns, st.st_size))
+        return snapshot
+
+    def _load(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                payload = pickle.load(f)
+            if payload.get("version") != self.FORMAT_VERSION:
+                return False
+            # The persisted index is only reused if the walk finds the same files as when
+            # it was built, none of them changed since.
+            walked = list(IgnoreRules(self.base_dir).walk_files())
+            if payload["snapshot"] != self._snapshot(walked):
+                return False
+        except Exception:
+            return False
+        self.files = payload["files"]
+        self._walked = walked
+        self._postings = payload["postings"]
+        return True
+
+    def _save(self) -> None:
+        payload = {
+            "version": self.FORMAT_VERSION,
+            "snapshot": self._snapshot(self._walked),
+            "files": self.files,
+            "postings": self._postings,
+        }
+        index_dir = os.path.dirname(self.index_path) or "."
+        try:
+            with tempfile.NamedTemporaryFile(dir=index_dir, delete=False) as tmp:
+                pickle.dump(payload, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp.name, self.index_path)
+        except OSError as e:
+            Logger.log(f"Could not persist search index: {str(e)}")
+
+
+def _required_literals(pattern: str) -> list[str]:
+    """Extracts literal substrings that every match of the regular expression must contain.
+
+    Returns an empty list (meaning "no filtering possible") when the expression
+    cannot be analysed, e.g. because it is case-insensitive.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+
+    literals = []
+
+    def visit(items) -> None:
+        run = ""
+        for op, arg in items:
+            if op is sre_parse.LITERAL:
+                run += chr(arg)
+                continue
+            if len(run) >= 3:
+                literals.append(run)
+            run = ""
+            if op is sre_parse.SUBPATTERN:
+                add_flags, sub_items = arg[1], arg[3]
+                if not (add_flags & re.IGNORECASE):
+                    visit(sub_items)
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+                visit(arg[2])
+        if len(run) >= 3:
+            literals.append(run)
+
+    visit(parsed)
+    return literals
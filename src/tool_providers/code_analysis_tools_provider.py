@@ -1,14 +1,69 @@
 import ast
+import hashlib
 import os
+import re
+import time
 
 from src.core.Logger import Logger
+from src.preprocessing_utilities.ast_cache import AstSummaryCache
+from src.preprocessing_utilities.import_graph import ImportGraph
+from src.preprocessing_utilities.symbol_index import SymbolIndex
 
 from .tool_provider_base import ToolProviderBase
 
+MAX_SYMBOL_RESULTS = 50
+# Bump whenever the output of get_imports_and_signatures changes, to invalidate cached summaries.
+SIGNATURES_FORMAT_VERSION = 1
+IMPORT_LINE = re.compile(r"^Line \d+: (?:import|from) ([\w.]+)")
+
 
 class CodeAnalysisToolsProvider(ToolProviderBase):
-    def __init__(self, base_dir: str):
+    non_tool_methods = ("summarize_signatures",)
+    read_only_tools = (
+        "get_start_here_digest",
+        "get_imports_and_signatures",
+        "find_symbol",
+        "find_references",
+        "list_public_api",
+    )
+
+    def __init__(
+        self,
+        base_dir: str,
+        symbol_index: SymbolIndex | None = None,
+        ast_cache: AstSummaryCache | None = None,
+    ):
         self.base_dir = base_dir
+        self.ast_cache = ast_cache or AstSummaryCache()
+        self.symbol_index = symbol_index or SymbolIndex(base_dir, ast_cache=self.ast_cache)
+        self._start_here_digest = None
+
+    def get_start_here_digest(self) -> str:
+        """Get a ranked overview of where to start exploring the repository.
+
+        Call this first: it usually points straight at the package's main
+        API and existing usage examples, saving many directory listings
+        and file reads.
+
+        The digest lists, when present:
+        - Console scripts declared in ``pyproject.toml``, ``setup.cfg``
+          or ``setup.py``.
+        - Example scripts and notebooks.
+        - Modules with an ``if __name__ == "__main__":`` block.
+        - The most central modules of the import graph.
+        - The public classes and functions called most often.
+
+        Returns:
+            A short plain-text digest with file paths and line numbers.
+        """
+        Logger.log("[Tool Call]: Building start-here digest from the import graph.")
+        if self._start_here_digest is None:
+            graph = ImportGraph(self.base_dir, self.symbol_index)
+            graph.build()
+            self._start_here_digest = graph.start_here_digest() or (
+                "No Python modules, entry points or examples found."
+            )
+        return self._start_here_digest
 
     def get_imports_and_signatures(self, file_path: str) -> str:
         """Summarize imports, functions, and classes in a Python file.
@@ -32,6 +87,120 @@ class CodeAnalysisToolsProvider(ToolProviderBase):
             can use to locate definitions with other tools.
         """
         Logger.log(f"[Tool Call]: Analysing file {file_path} for imports and signatures.")
+        return self.summarize_signatures(file_path)
+
+    def find_symbol(self, name: str) -> str:
+        """Find where a class, function or method is defined in the repository.
+
+        Use this instead of searching text when you know the name of a
+        symbol (for example ``Trainer`` or ``Trainer.fit``) and want its
+        location, signature and docstring.
+
+        Args:
+            name: The symbol name, either bare (``fit``) or qualified
+                by its enclosing classes (``Trainer.fit``).
+
+        Returns:
+            One block per definition with ``<file_path>:<line_number>``,
+            the kind of symbol, its signature and the first line of its
+            docstring, or a message if nothing matches.
+        """
+        Logger.log(f"[Tool Call]: Finding definitions of symbol '{name}'.")
+        self.symbol_index.ensure_built()
+        matches = self.symbol_index.find_symbol(name)
+        if not matches:
+            return f"No definitions found for '{name}'."
+
+        results = []
+        for path, definition in matches[:MAX_SYMBOL_RESULTS]:
+            entry = (
+                f"{path}:{definition['line']}: {definition['kind']} {definition['qualname']}\n"
+                f"    {definition['signature']}"
+            )
+            if definition["docstring"]:
+                entry += f"\n    {definition['docstring'].splitlines()[0]}"
+            results.append(entry)
+        if len(matches) > MAX_SYMBOL_RESULTS:
+            results.append(f"[{len(matches) - MAX_SYMBOL_RESULTS} more definitions omitted.]")
+        return "\n".join(results)
+
+    def find_references(self, name: str) -> str:
+        """Find the places in the repository where a function or method is called.
+
+        Use this to discover how the code itself uses an API, which is
+        often the best template for an example script.
+
+        Args:
+            name: Name of the called function, method or class. A
+                qualified name such as ``Trainer.fit`` is reduced to its
+                last component (``fit``).
+
+        Returns:
+            One call site per line in the format
+            ``<file_path>:<line_number>: in <caller>``, or a message if
+            no calls are found.
+        """
+        Logger.log(f"[Tool Call]: Finding references to symbol '{name}'.")
+        self.symbol_index.ensure_built()
+        references = self.symbol_index.find_references(name)
+        if not references:
+            return f"No calls found for '{name}'."
+
+        results = [
+            f"{path}:{line}: in {caller or '<module>'}"
+            for path, line, caller in references[:MAX_SYMBOL_RESULTS]
+        ]
+        if len(references) > MAX_SYMBOL_RESULTS:
+            results.append(f"[{len(references) - MAX_SYMBOL_RESULTS} more call sites omitted.]")
+        return "\n".join(results)
+
+    def list_public_api(self, path: str = "") -> str:
+        """List the public classes, functions and methods of the repository's modules.
+
+        Names starting with an underscore, test modules and private
+        packages are left out; a module's ``__all__`` is respected when
+        present. Use this to get an overview of what a package offers
+        before reading individual files.
+
+        Args:
+            path: Directory (or file) path relative to the repository
+                root to restrict the listing to. Empty string means the
+                whole repository.
+
+        Returns:
+            Signatures grouped by file, each prefixed with its line
+            number, or a message if no public API is found.
+        """
+        Logger.log(f"[Tool Call]: Listing public API under '{path}'.")
+        self.symbol_index.ensure_built()
+        api = self.symbol_index.public_api(path)
+        if not api:
+            return f"No public API found under '{path}'."
+
+        results = []
+        current_path = None
+        for rel_path, definition in api:
+            if rel_path != current_path:
+                results.append(f"{rel_path}:")
+                current_path = rel_path
+            indent = "    " * (definition["qualname"].count(".") + 1)
+            results.append(f"{indent}Line {definition['line']}: {definition['signature']}")
+        return "\n".join(results)
+
+    def summarize_signatures(self, file_path: str, max_chars: int | None = None) -> str:
+        """Builds the ``get_imports_and_signatures`` summary of a file, without logging a tool call.
+
+        Args:
+            file_path (str): Path of the file, relative to the repository root (or absolute).
+            max_chars (int | None): If given, longer summaries are compacted (imports rolled
+                up, docstrings cut to their first line) and then truncated to this length.
+        """
+        summary = self._signatures_summary(file_path)
+        if max_chars is not None and len(summary) > max_chars:
+            summary = self._summarize_get_imports_and_signatures(summary, max_chars)[:max_chars]
+        return summary
+
+    def _signatures_summary(self, file_path: str) -> str:
         full_path = (
             os.path.join(self.base_dir, file_path) if not os.path.isabs(file_path) else file_path
         )
@@ -40,9 +209,21 @@ class CodeAnalysisToolsProvider(ToolProviderBase):
             return f"Error: File not found at {full_path}"
 
         try:
-            with open(full_path, encoding="utf-8") as f:
-                source = f.read()
-            tree = ast.parse(source)
+            with open(full_path, "rb") as f:
+                data = f.read()
+        except Exception as e:
+            Logger.log(f"Error parsing file {file_path}")
+            return f"Error parsing file {file_path}: {str(e)}"
+
+        namespace = AstSummaryCache.namespace("signatures", SIGNATURES_FORMAT_VERSION)
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self.ast_cache.get(namespace, digest)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        try:
+            tree = ast.parse(data.decode("utf-8"))
         except Exception as e:
             Logger.log(f"Error parsing file {file_path}")
             return f"Error parsing file {file_path}: {str(e)}"
@@ -67,7 +248,37 @@ class CodeAnalysisToolsProvider(ToolProviderBase):
         if results:
             parts.append("\n\n".join(results))
 
-        return "\n\n".join(parts)
+        summary = "\n\n".join(parts)
+        self.ast_cache.put(namespace, digest, summary, time.perf_counter() - started)
+        return summary
+
+    def _summarize_get_imports_and_signatures(self, output: str, budget: int) -> str:
+        """Rolls the imports up into one line and keeps only the first line of docstrings."""
+        lines = []
+        modules = []
+        docstring = None
+        for line in output.splitlines():
+            stripped = line.strip()
+            if docstring is not None:
+                if stripped != '"""':
+                    docstring.append(stripped)
+                    continue
+                indent = line[: len(line) - len(line.lstrip())]
+                first = docstring[0] if docstring else ""
+                more = " ..." if len(docstring) > 1 else ""
+                lines.append(f'{indent}"""{first}{more}"""')
+                docstring = None
+            elif stripped == '"""':
+                docstring = []
+            elif match := IMPORT_LINE.match(line):
+                modules.append(match.group(1))
+            else:
+                lines.append(line)
+        if modules:
+            lines.insert(
+                0, f"Imports ({len(modules)} statements): {', '.join(dict.fromkeys(modules))}"
+            )
+        return "\n".join(lines)
 
     def _format_function(self, node, indent_level=0) -> str:
         indent = "    " * indent_level
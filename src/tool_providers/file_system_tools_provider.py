@@ -1,13 +1,29 @@
 import os
+import re
 
 from src.core.Logger import Logger
+from src.preprocessing_utilities.ignore_rules import IgnoreRules
+from src.preprocessing_utilities.mapped_file import MappedFile
+from src.preprocessing_utilities.parallel_search import search_files
+from src.preprocessing_utilities.trigram_index import TrigramIndex
 
 from .tool_provider_base import ToolProviderBase
 
+# Minified or generated files can have enormous lines; over-budget search results clip them.
+MAX_MATCH_LINE_CHARS = 300
+
 
 class FileSystemToolsProvider(ToolProviderBase):
-    def __init__(self, base_dir: str):
+    read_only_tools = (
+        "list_directory",
+        "read_file_snippet",
+        "grep_search_file",
+        "grep_search_directory",
+    )
+
+    def __init__(self, base_dir: str, search_index: TrigramIndex | None = None):
         self.base_dir = base_dir
+        self.search_index = search_index
 
     def list_directory(self, path: str = "") -> str:
         """List project files and folders to discover entry points.
@@ -86,7 +102,8 @@ class FileSystemToolsProvider(ToolProviderBase):
         Returns:
             Numbered lines from the file in the format
             ``<line_number>: <line_content>`` on each line, or a
-            human-readable error message.
+            human-readable error message (also returned for binary or
+            very large files).
         """
         Logger.log(
             f"[Tool Call]: Reading file snippet from '{file_path}' lines {start_line}-{end_line}."
@@ -100,19 +117,19 @@ class FileSystemToolsProvider(ToolProviderBase):
             return f"Error: '{file_path}' is not a file."
 
         try:
-            with open(target_path, encoding="utf-8") as f:
-                lines = f.readlines()
+            with MappedFile(target_path) as mapped:
+                line_count = mapped.line_count
 
-            if start_line < 1:
-                start_line = 1
+                if start_line < 1:
+                    start_line = 1
 
-            if end_line > len(lines):
-                end_line = len(lines)
+                if end_line > line_count:
+                    end_line = line_count
 
-            if start_line > end_line:
-                return f"Error: Start line {start_line} is greater than end line {end_line}."
+                if start_line > end_line:
+                    return f"Error: Start line {start_line} is greater than end line {end_line}."
 
-            snippet = lines[start_line - 1 : end_line]
+                snippet = mapped.read_lines(start_line, end_line)
 
             # Add line numbers to the output
             numbered_snippet = []
@@ -154,10 +171,9 @@ class FileSystemToolsProvider(ToolProviderBase):
         results = []
 
         try:
-            with open(target_path, encoding="utf-8", errors="ignore") as f:
-                for line_num, line in enumerate(f, 1):
-                    if pattern in line:
-                        results.append(f"{line_num}: {line.strip()}")
+            with MappedFile(target_path) as mapped:
+                for line_num, line in mapped.search(pattern):
+                    results.append(f"{line_num}: {line.strip()}")
         except Exception as e:
             return f"Error reading file: {str(e)}"
 
@@ -166,24 +182,41 @@ class FileSystemToolsProvider(ToolProviderBase):
 
         return "\n".join(results)
 
-    def grep_search_directory(self, pattern: str, path: str = "") -> str:
-        """Search recursively for a plain-text pattern in many files.
+    def grep_search_directory(
+        self,
+        pattern: str,
+        path: str = "",
+        regex: bool = False,
+        max_results: int = 50,
+        cursor: str = "",
+    ) -> str:
+        """Search recursively for a pattern in many files.
 
         Use this to find where important functions, classes, or CLI
         entry points are defined across the repository so you can design
-        a realistic example script.
+        a realistic example script. Virtual environments, build output
+        and files excluded by ``.gitignore`` are not searched.
 
         Args:
-            pattern: The plain-text string to search for. It should fit
-                within a single line (no regular expressions).
+            pattern: The string to search for. It should fit within a
+                single line.
             path: Directory path to search in, relative to the
                 repository root. Empty string means the repository root.
+            regex: Treat ``pattern`` as a Python regular expression
+                instead of plain text.
+            max_results: Maximum number of matching lines to return.
+                Searching stops once this many matches are found.
+            cursor: Continuation cursor from a previous call with the
+                same ``pattern``, ``path`` and ``regex``, to fetch the
+                next page of matches. Empty for the first page.
 
         Returns:
-            One match per line in the format
-            ``<file_path>:<line_number>: <line_content>`` relative to
-            the repository root, or a message if no matches are found or
-            an error occurs.
+            Matches grouped by file: a ``<file_path> (<N> matches)``
+            header relative to the repository root, followed by
+            ``  <line_number>: <line_content>`` lines. If more matches
+            exist, a final note contains the cursor for the next page.
+            A message is returned if no matches are found or an error
+            occurs.
         """
         Logger.log(f"[Tool Call]: Grep searching for pattern '{pattern}' in directory '{path}'.")
         target_dir = os.path.join(self.base_dir, path)
@@ -192,22 +225,99 @@ class FileSystemToolsProvider(ToolProviderBase):
             return f"Error: Directory '{path}' does not exist."
         if not os.path.isdir(target_dir):
             return f"Error: '{path}' is not a directory."
+        if max_results < 1:
+            return "Error: max_results must be at least 1."
 
-        results = []
+        if regex:
+            try:
+                re.compile(pattern.encode("utf-8"))
+            except re.error as e:
+                return f"Error: Invalid regular expression '{pattern}': {str(e)}"
 
-        for root, _, files in os.walk(target_dir):
-            for file in files:
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, encoding="utf-8", errors="ignore") as f:
-                        for line_num, line in enumerate(f, 1):
-                            if pattern in line:
-                                rel_path = os.path.relpath(full_path, self.base_dir)
-                                results.append(f"{rel_path}:{line_num}: {line.strip()}")
-                except Exception:
-                    continue
+        if self.search_index is not None and self.search_index.is_ready():
+            candidates = self.search_index.candidates(pattern, regex=regex, path=path)
+        else:
+            candidates = IgnoreRules(self.base_dir).walk_files(path)
 
-        if not results:
+        try:
+            page = search_files(
+                self.base_dir,
+                candidates,
+                pattern,
+                regex=regex,
+                max_matches=max_results,
+                path=path,
+                cursor=cursor,
+            )
+        except ValueError as e:
+            return f"Error: Invalid cursor: {str(e)}"
+
+        if not page.files:
+            if cursor:
+                return f"No more matches for '{pattern}' in '{path}'."
             return f"No matches found for '{pattern}' in '{path}'."
 
-        return "\n".join(results)
+        output = []
+        for file_matches in page.files:
+            count = f"{file_matches.total}+" if file_matches.capped else str(file_matches.total)
+            output.append(f"{file_matches.path} ({count} matches)")
+            output.extend(f"  {line_num}: {line}" for line_num, line in file_matches.matches)
+
+        if page.cursor:
+            output.append(
+                f"[Showing {page.match_count} matches in {len(page.files)} files. More matches "
+                f'may exist; call again with cursor="{page.cursor}" to see the next page.]'
+            )
+        return "\n".join(output)
+
+    def _summarize_list_directory(self, output: str, budget: int) -> str:
+        """Rolls the contents of the largest subdirectories up into one line each, until the
+        listing fits ``budget`` or every subdirectory is rolled up."""
+        entries = []
+        for line in output.splitlines():
+            kind, rest = line.split(" ", 1)
+            path, count = rest, 0
+            if kind == "[FILE]" and rest.endswith(" lines)"):
+                path, _, count = rest.rpartition(" (")
+                count = int(count.split(" ", 1)[0])
+            entries.append((kind, path, count, line))
+
+        children = {}
+        for entry in entries:
+            children.setdefault(os.path.dirname(entry[1]), []).append(entry)
+
+        rollups = {}
+        length = len(output)
+        dirs = [path for kind, path, _, _ in entries if kind == "[DIR]" and path in children]
+        for directory in sorted(dirs, key=lambda d: (-len(children[d]), d)):
+            if length <= budget:
+                break
+            contents = children[directory]
+            files = sum(1 for kind, *_ in contents if kind == "[FILE]")
+            lines = sum(count for _, _, count, _ in contents)
+            rollups[directory] = (
+                f"[DIR] {directory} ({files} files, {len(contents) - files} subdirectories, "
+                f"{lines} lines; call list_directory on it for details)"
+            )
+            length += len(rollups[directory]) - len(f"[DIR] {directory}")
+            length -= sum(len(line) + 1 for *_, line in contents)
+
+        output_lines = []
+        for _kind, path, _, line in entries:
+            if os.path.dirname(path) in rollups:
+                continue
+            output_lines.append(rollups.get(path, line))
+        return "\n".join(output_lines)
+
+    def _summarize_grep_search_file(self, output: str, budget: int) -> str:
+        return _clip_long_lines(output)
+
+    def _summarize_grep_search_directory(self, output: str, budget: int) -> str:
+        return _clip_long_lines(output)
+
+
+def _clip_long_lines(output: str) -> str:
+    return "\n".join(
+        line if len(line) <= MAX_MATCH_LINE_CHARS else f"{line[:MAX_MATCH_LINE_CHARS]} [...]"
+        for line in output.splitlines()
+    )
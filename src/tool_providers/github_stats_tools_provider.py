@@ -10,6 +10,8 @@ from .tool_provider_base import ToolProviderBase
 
 
 class GitHubStatsToolsProvider(ToolProviderBase):
+    read_only_tools = ("get_basic_info", "get_issues_summary", "get_top_contributors")
+
     def __init__(self, repo_url: str):
         self.repo_url = repo_url
         load_dotenv()
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+# About 3k tokens; tools can override this through ToolProviderBase.output_budgets.
+DEFAULT_OUTPUT_BUDGET = 12_000
+MAX_STORED_OUTPUTS = 64
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+class OutputPager:
+    """Splits tool outputs that exceed their budget into pages.
+
+    The first page is returned in place of the full output, followed by a note with an
+    opaque continuation token; :meth:`fetch` returns the following pages. Pages end at
+    line boundaries where possible. The most recent outputs are kept in memory, so old
+    tokens eventually expire.
+    """
+
+    def __init__(self, max_outputs: int = MAX_STORED_OUTPUTS):
+        self.max_outputs = max_outputs
+        self._outputs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def paginate(self, text: str, budget: int) -> str:
+        """Returns ``text`` unchanged if it fits ``budget``, else its first page and a note."""
+        if len(text) <= budget:
+            return text
+        output_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._outputs[output_id] = text
+            while len(self._outputs) > self.max_outputs:
+                self._outputs.popitem(last=False)
+        return self._page(output_id, text, 0, budget)
+
+    def fetch(self, token: str, budget: int) -> str:
+        """Returns the page a continuation token points to.
+
+        Raises:
+            ValueError: If the token is malformed or has expired.
+        """
+        try:
+            state = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            output_id, offset = state["id"], int(state["offset"])
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            raise ValueError("malformed continuation token") from e
+        with self._lock:
+            text = self._outputs.get(output_id)
+            if text is not None:
+                self._outputs.move_to_end(output_id)
+        if text is None:
+            raise ValueError("continuation token has expired; call the original tool again")
+        return self._page(output_id, text, offset, budget)
+
+    def _page(self, output_id: str, text: str, offset: int, budget: int) -> str:
+        end = offset + budget
+        if end >= len(text):
+            return text[offset:]
+        # Cut at the last line break in the second half of the page, if there is one.
+        newline = text.rfind("\n", offset + budget // 2, end)
+        if newline != -1:
+            end = newline + 1
+        token = base64.urlsafe_b64encode(
+            json.dumps({"id": output_id, "offset": end}).encode("utf-8")
+        ).decode("ascii")
+        return (
+            f"{text[offset:end]}\n[Output truncated: showing characters {offset + 1}-{end} of "
+            f'{len(text)}. Call fetch_more_output with token="{token}" to see the next page.]'
+        )
@@ -0,0 +1,311 @@
+import concurrent.futures
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from langchain_core.tools import StructuredTool
+
+from src.core.Logger import Logger
+
+from .output_budget import CHARS_PER_TOKEN, DEFAULT_OUTPUT_BUDGET, OutputPager
+
+MAX_CACHE_ENTRIES = 1024
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+MAX_PARALLEL_TOOL_CALLS = 8
+
+
+@dataclass
+class ToolMetrics:
+    calls: int = 0
+    cache_hits: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    output_bytes: int = 0
+    # Size before summarization and pagination.
+    full_output_bytes: int = 0
+
+
+class _ReadWriteLock:
+    """Lets any number of readers in at once, or a single writer."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_read(self) -> None:
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._condition:
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writing = True
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+
+class ToolExecutor:
+    """Execution layer shared by the tools of several providers.
+
+    Read-only tools (see ``ToolProviderBase.read_only_tools``) are memoized by their
+    arguments and may run concurrently with each other; every other tool is treated
+    as a write (e.g. running a script may change files): it runs exclusively and
+    clears the memoized results.
+
+    Outputs longer than the tool's budget are first passed to the tool's summarizer,
+    if it has one, and then paginated; the agent fetches further pages with the
+    ``fetch_more_output`` tool. Latency and output size before and after budgeting
+    are recorded per tool.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, ToolMetrics] = {}
+        self.pager = OutputPager()
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        self._rw_lock = _ReadWriteLock()
+
+    def wrap(
+        self,
+        name: str,
+        func,
+        read_only: bool,
+        budget: int | None = DEFAULT_OUTPUT_BUDGET,
+        summarize=None,
+        prepare=None,
+    ):
+        """Returns ``func`` routed through the executor, with its signature and docstring.
+
+        Args:
+            name (str): The tool name.
+            func: The tool implementation.
+            read_only (bool): Whether the tool can be memoized and run concurrently.
+            budget (int | None): Maximum output length in characters, or ``None``.
+            summarize: Optional callable taking an over-budget output and the budget and
+                returning a deterministic, shorter rendering of it.
+            prepare: Optional callable run before the tool takes its lock, e.g. to wait for
+                a resource without holding other tools up. If it returns a message, that
+                message is the tool's output and the tool does not run.
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = prepare() if prepare is not None else None
+            if result is None:
+                result = self.call(name, func, args, kwargs, read_only)
+            return self._fit(name, result, budget, summarize)
+
+        return wrapper
+
+    def call(self, name: str, func, args: tuple, kwargs: dict, read_only: bool) -> str:
+        if read_only:
+            key = (name, json.dumps([args, kwargs], sort_keys=True, default=str))
+            cached = self._cache_get(key)
+            if cached is not None:
+                Logger.log(f"[Tool Call]: {name} (cached result)")
+                self._record(name, 0.0, cache_hit=True)
+                return cached
+            self._rw_lock.acquire_read()
+            release = self._rw_lock.release_read
+        else:
+            self._rw_lock.acquire_write()
+            release = self._rw_lock.release_write
+
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            if read_only:
+                self._cache_put(key, result)
+            else:
+                self.invalidate()
+        finally:
+            release()
+        self._record(name, time.perf_counter() - started)
+        return result
+
+    def invalidate(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def files_changed(self) -> None:
+        """Clears the memoized results after files changed outside the tools (e.g. a
+        background setup writing into the clone). Waits for running tools first, so that no
+        read started before the change caches its result afterwards."""
+        self._rw_lock.acquire_write()
+        try:
+            self.invalidate()
+        finally:
+            self._rw_lock.release_write()
+
+    def fetch_more_tool(self) -> StructuredTool:
+        """Builds the tool that returns further pages of truncated tool outputs."""
+
+        def fetch_more_output(token: str) -> str:
+            """Fetch the next page of a tool output that was truncated.
+
+            Outputs that exceed their size budget end with a note containing
+            a continuation token. Only fetch more if the part you already have
+            is not enough; often a narrower call (a smaller line range, a
+            subdirectory, a more specific pattern) is the better next step.
+
+            Args:
+                token: The continuation token from the truncation note.
+
+            Returns:
+                The next page of the output, itself ending with a new token
+                if more remains, or an ``"Error:"`` message if the token is
+                invalid or has expired.
+            """
+            Logger.log("[Tool Call]: Fetching more of a truncated tool output.")
+            self._record("fetch_more_output", 0.0)
+            try:
+                page = self.pager.fetch(token, DEFAULT_OUTPUT_BUDGET)
+            except ValueError as e:
+                return f"Error: {str(e)}"
+            # The full output was already counted when the original tool returned.
+            self._record_output("fetch_more_output", "", page)
+            return page
+
+        return StructuredTool.from_function(
+            func=fetch_more_output, name="fetch_more_output", description=fetch_more_output.__doc__
+        )
+
+    def batch_tool(self, tools: list, read_only_names: set[str]) -> StructuredTool:
+        """Builds a tool that runs several read-only tool calls concurrently.
+
+        Args:
+            tools (list): The tools the batch may call.
+            read_only_names (set[str]): Names of the tools that are read-only.
+        """
+        tools_by_name = {tool.name: tool for tool in tools if tool.name in read_only_names}
+
+        def run_tools_in_parallel(calls: list[dict]) -> str:
+            """Run several independent read-only tool calls at once.
+
+            Use this instead of calling read-only tools one after another, for
+            example to read several files or search for several patterns in a
+            single step. Tools that run scripts or install packages cannot be
+            batched.
+
+            Args:
+                calls: A list of calls, each a dictionary such as
+                    ``{"tool": "read_file_snippet", "args": {"file_path":
+                    "src/model.py", "start_line": 1, "end_line": 80}}``.
+
+            Returns:
+                One section per call, in order, headed ``=== <tool> ===`` and
+                containing that tool's output or an ``"Error:"`` message. Like
+                any tool output, the whole is truncated with a continuation
+                token if it exceeds the output budget.
+            """
+            Logger.log(f"[Tool Call]: Running {len(calls)} read-only tool calls in parallel.")
+
+            def run(call: dict) -> str:
+                tool = tools_by_name.get(call.get("tool", ""))
+                if tool is None:
+                    return f"Error: '{call.get('tool')}' is not a read-only tool."
+                try:
+                    return str(tool.invoke(call.get("args") or {}))
+                except Exception as e:
+                    return f"Error: {str(e)}"
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_PARALLEL_TOOL_CALLS
+            ) as executor:
+                # Each call runs in a copy of this context, so it logs to the current session.
+                futures = [
+                    executor.submit(contextvars.copy_context().run, run, call) for call in calls
+                ]
+                outputs = [future.result() for future in futures]
+            combined = "\n\n".join(
+                f"=== {call.get('tool')} ===\n{output}"
+                for call, output in zip(calls, outputs, strict=True)
+            )
+            # Each output is within its tool's budget, and their sizes were recorded as
+            # they returned, but together they may still be several budgets long.
+            return self.pager.paginate(combined, DEFAULT_OUTPUT_BUDGET)
+
+        return StructuredTool.from_function(
+            func=run_tools_in_parallel,
+            name="run_tools_in_parallel",
+            description=run_tools_in_parallel.__doc__,
+        )
+
+    def metrics_report(self) -> str:
+        lines = ["Tool metrics (calls, cache hits, mean / max latency, output):"]
+        for name, m in sorted(self.metrics.items(), key=lambda item: -item[1].total_seconds):
+            executed = m.calls - m.cache_hits
+            mean = m.total_seconds / executed if executed else 0.0
+            lines.append(
+                f"  {name}: {m.calls} calls, {m.cache_hits} cached, {mean:.3f}s / "
+                f"{m.max_seconds:.3f}s, {m.output_bytes / 1024:.1f} KB"
+            )
+        returned = sum(m.output_bytes for m in self.metrics.values())
+        full = sum(m.full_output_bytes for m in self.metrics.values())
+        lines.append(
+            f"Output budgets: returned {returned / 1024:.1f} KB of {full / 1024:.1f} KB, "
+            f"saving about {(full - returned) // CHARS_PER_TOKEN} tokens."
+        )
+        return "\n".join(lines)
+
+    def _fit(self, name: str, result, budget: int | None, summarize) -> str:
+        output = result
+        if budget is not None and isinstance(result, str) and len(result) > budget:
+            if summarize is not None:
+                output = summarize(result, budget)
+            output = self.pager.paginate(output, budget)
+        self._record_output(name, result, output)
+        return output
+
+    def _record(self, name: str, seconds: float, cache_hit: bool = False) -> None:
+        with self._cache_lock:
+            m = self.metrics.setdefault(name, ToolMetrics())
+            m.calls += 1
+            m.cache_hits += cache_hit
+            m.total_seconds += seconds
+            m.max_seconds = max(m.max_seconds, seconds)
+
+    def _record_output(self, name: str, full, returned) -> None:
+        with self._cache_lock:
+            m = self.metrics.setdefault(name, ToolMetrics())
+            m.output_bytes += len(str(returned).encode("utf-8"))
+            m.full_output_bytes += len(str(full).encode("utf-8"))
+
+    def _cache_get(self, key: tuple):
+        with self._cache_lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def _cache_put(self, key: tuple, result) -> None:
+        size = len(str(result))
+        if size > MAX_CACHE_BYTES // 4:
+            return
+        with self._cache_lock:
+            if key in self._cache:
+                return
+            self._cache[key] = result
+            self._cache_bytes += size
+            while len(self._cache) > MAX_CACHE_ENTRIES or self._cache_bytes > MAX_CACHE_BYTES:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(str(evicted))
@@ -1,17 +1,52 @@
 import inspect
+from collections.abc import Mapping
+from types import MappingProxyType
 
 from langchain_core.tools import StructuredTool
 
+from .output_budget import DEFAULT_OUTPUT_BUDGET
+from .tool_executor import ToolExecutor
+
 
 class ToolProviderBase:
-    def get_tool_list(self) -> list:
+    # Public methods meant for the application rather than the agent.
+    non_tool_methods: tuple[str, ...] = ()
+    # Tools without side effects, whose output depends only on their arguments and on
+    # files that only non-read-only tools change. These are memoized and may run
+    # concurrently.
+    read_only_tools: tuple[str, ...] = ()
+    # Maximum output length in characters per tool (``None`` for no limit); tools not
+    # listed get DEFAULT_OUTPUT_BUDGET. A tool ``x`` may define ``_summarize_x(output,
+    # budget)`` to shorten over-budget outputs deterministically before they are paged.
+    output_budgets: Mapping[str, int | None] = MappingProxyType({})
+    # A tool ``x`` may also define ``_prepare_x()``, run before the executor takes the tool's
+    # lock; if it returns a message, that is the tool's output and the tool does not run.
+
+    def get_tool_list(self, executor: ToolExecutor | None = None) -> list:
+        """Wraps the provider's public methods as tools.
+
+        Args:
+            executor (ToolExecutor | None): Execution layer to route the tool calls through.
+                Share one between providers so that writes invalidate every provider's
+                memoized reads. A private one is used if not given.
+        """
+        executor = executor or ToolExecutor()
         tools = []
         members = inspect.getmembers(self, predicate=inspect.ismethod)
         for name, func in members:
-            if name.startswith("_") or name == "get_tool_list":
+            if name.startswith("_") or name == "get_tool_list" or name in self.non_tool_methods:
                 continue
             tool = StructuredTool.from_function(
-                func=func, name=name, description=func.__doc__ or f"Tool for {name}"
+                func=executor.wrap(
+                    name,
+                    func,
+                    read_only=name in self.read_only_tools,
+                    budget=self.output_budgets.get(name, DEFAULT_OUTPUT_BUDGET),
+                    summarize=getattr(self, f"_summarize_{name}", None),
+                    prepare=getattr(self, f"_prepare_{name}", None),
+                ),
+                name=name,
+                description=func.__doc__ or f"Tool for {name}",
             )
             tools.append(tool)
         return tools
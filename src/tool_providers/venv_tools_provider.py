@@ -1,19 +1,83 @@
+import concurrent.futures
+import contextvars
 import os
 import subprocess
 import sys
 import tempfile
-import venv
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from types import MappingProxyType
 
 from src.core.Logger import Logger
+from src.venv_management import warm_worker
+from src.venv_management.backends import get_backend, venv_executable
+from src.venv_management.env_pool import EnvironmentPool
+from src.venv_management.sandbox import ExecutionLimits, ExecutionResult, run_limited
+from src.venv_management.wheelhouse import Wheelhouse
 
 from .tool_provider_base import ToolProviderBase
 
+PREFETCH_CHUNK_SIZE = 10
+PREFETCH_WORKERS = 4
+MAX_PARALLEL_SCRIPTS = 4
+SETUP_WAIT_SECONDS = 300.0
+SETUP_PROGRESS_INTERVAL = 15.0
+
 
 class VenvToolsProvider(ToolProviderBase):
-    def __init__(self, base_dir: str):
+    """Tools for running scripts in, and installing packages into, the repository's venv.
+
+    Creating the environment can take minutes, so it happens on a background thread
+    (see :meth:`start_setup`) while the agent explores the repository with other tools.
+    The tools wait for the environment when first invoked.
+    """
+
+    non_tool_methods = ("start_setup", "is_ready")
+    # Script output is already bounded (head and tail kept) by the execution limits.
+    output_budgets = MappingProxyType({"run_script": None, "run_scripts_in_parallel": None})
+
+    def __init__(self, base_dir: str, use_warm_worker: bool | None = None):
         self.base_dir = base_dir
         self.venv_path = ".venv"
-        self._create_venv()
+        self.backend = get_backend()
+        self.env_pool = EnvironmentPool(self.backend)
+        self.wheelhouse = Wheelhouse(self.backend.wheel_dir)
+        if use_warm_worker is None:
+            use_warm_worker = os.getenv("PAPERPROBE_WARM_WORKER", "") == "1"
+        self.use_warm_worker = use_warm_worker and warm_worker.is_supported()
+        self._warm_worker = None
+        self.execution_limits = ExecutionLimits.from_env()
+        self.script_runs = 0
+        self.successful_script_runs = 0
+        self._stats_lock = threading.Lock()
+        self._setup_ready = threading.Event()
+        self._setup_thread = None
+        self._setup_error = None
+        self._setup_stage = "not started"
+        self._setup_started = None
+        self._on_setup_finished = None
+
+    def start_setup(self, on_finished: Callable[[], None] | None = None) -> threading.Thread:
+        """Creates the virtual environment on a daemon thread and returns that thread.
+
+        Args:
+            on_finished: Called on that thread once setup has finished or failed, e.g. to
+                invalidate memoized reads of the files setup wrote into the repository.
+        """
+        if self._setup_thread is None:
+            self._on_setup_finished = on_finished
+            self._setup_started = time.perf_counter()
+            # Run in a copy of the caller's context, so setup logs to the caller's log session.
+            self._setup_thread = threading.Thread(
+                target=contextvars.copy_context().run, args=(self._run_setup,), daemon=True
+            )
+            self._setup_thread.start()
+        return self._setup_thread
+
+    def is_ready(self) -> bool:
+        return self._setup_ready.is_set() and self._setup_error is None
 
     def run_script(self, script_code: str) -> str:
         """Execute a Python snippet in the repo's virtual environment.
@@ -23,6 +87,9 @@ class VenvToolsProvider(ToolProviderBase):
 
         The code is executed as a temporary ``.py`` file located at the
         repository root using the Python interpreter from ``.venv``.
+        Execution is bounded: scripts are killed when they exceed the
+        wall-clock, CPU or memory limits, so avoid long training loops
+        or large downloads. Very long output is truncated in the middle.
 
         Args:
             script_code: Complete Python source code for the script you
@@ -32,17 +99,51 @@ class VenvToolsProvider(ToolProviderBase):
 
         Returns:
             ``stdout`` from the script if it exits successfully.
-            If the script fails, a string starting with ``"Error:"``
-            followed by the captured error output.
+            If the script fails or times out, a string starting with
+            ``"Error:"`` followed by the captured error output. Both end
+            with a line of execution statistics.
         """
         Logger.log(f"[Tool Call]: Running script in virtual environment:\n{script_code}")
-        venv_full_path = os.path.join(self.base_dir, self.venv_path)
+        error = self._wait_for_setup()
+        if error:
+            return error
+        result = self._execute(script_code, allow_warm_worker=True)
+        return self._format_result(result)
 
-        # Determine the path to the python executable in the new venv
-        if sys.platform == "win32":
-            python_executable = os.path.join(venv_full_path, "Scripts", "python.exe")
-        else:
-            python_executable = os.path.join(venv_full_path, "bin", "python")
+    def run_scripts_in_parallel(self, scripts: list[str]) -> str:
+        """Execute several candidate scripts at the same time.
+
+        Use this to try alternative versions of the example script (for
+        example different entry points or argument choices) in one step.
+        Each script runs in its own process under the same limits as
+        ``run_script``.
+
+        Args:
+            scripts: A list of complete, self-contained Python scripts.
+
+        Returns:
+            One section per script, in order, headed
+            ``=== Script <n> ===`` and containing what ``run_script``
+            would have returned for it.
+        """
+        Logger.log(f"[Tool Call]: Running {len(scripts)} scripts in parallel.")
+        error = self._wait_for_setup()
+        if error:
+            return error
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_PARALLEL_SCRIPTS) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._execute, script)
+                for script in scripts
+            ]
+            results = [future.result() for future in futures]
+        return "\n\n".join(
+            f"=== Script {i} ===\n{self._format_result(result)}"
+            for i, result in enumerate(results, start=1)
+        )
+
+    def _execute(self, script_code: str, allow_warm_worker: bool = False) -> ExecutionResult:
+        venv_full_path = os.path.join(self.base_dir, self.venv_path)
+        python_executable = venv_executable(venv_full_path, "python")
 
         # Write the script code to a temporary file
         with tempfile.NamedTemporaryFile(
@@ -53,23 +154,40 @@ class VenvToolsProvider(ToolProviderBase):
         with open(script_file, "w", encoding="utf-8") as f:
             f.write(script_code)
 
-        # Run the script using the venv's python
-        result = subprocess.run(
-            [python_executable, script_file],
-            capture_output=True,
-            text=True,
-            cwd=self.base_dir,
-            check=False,
-        )
-
-        # Clean up the temporary script file
-        os.remove(script_file)
-
+        try:
+            result = None
+            if allow_warm_worker and self.use_warm_worker:
+                result = self._run_in_warm_worker(script_file)
+            if result is None:
+                # Run the script using the venv's python
+                result = run_limited(
+                    [python_executable, script_file],
+                    cwd=self.base_dir,
+                    limits=self.execution_limits,
+                )
+        finally:
+            # Clean up the temporary script file
+            os.remove(script_file)
+
+        Logger.log(f"Script finished {result.stats_line()}")
+        with self._stats_lock:
+            self.script_runs += 1
+            if result.returncode == 0 and not result.timed_out:
+                self.successful_script_runs += 1
+        return result
+
+    def _format_result(self, result: ExecutionResult) -> str:
+        if result.timed_out:
+            Logger.log("Script execution timed out.")
+            return (
+                f"Error: Script timed out after {self.execution_limits.wall_seconds:.0f}s and was "
+                f"killed.\n{result.stderr}\n{result.stats_line()}"
+            )
         if result.returncode != 0:
             Logger.log(f"Script execution failed with error: {result.stderr.strip()}")
-            return f"Error: {result.stderr}"
+            return f"Error: {result.stderr}\n{result.stats_line()}"
 
-        return result.stdout
+        return f"{result.stdout}\n{result.stats_line()}"
 
     def add_missing_package(self, package_name: str) -> str:
         """Install a missing package into the repo virtual environment.
@@ -86,47 +204,120 @@ class VenvToolsProvider(ToolProviderBase):
         Returns:
             A success message if installation appears to have completed,
             or a string starting with ``"Error installing package:"``
-            if ``pip`` reported a failure.
+            if the installer reported a failure.
         """
         Logger.log(f"[Tool Call]: Installing package '{package_name}' in virtual environment.")
+        error = self._wait_for_setup()
+        if error:
+            return error
         venv_full_path = os.path.join(self.base_dir, self.venv_path)
 
-        # Determine the path to the pip executable in the new venv
-        if sys.platform == "win32":
-            pip_executable = os.path.join(venv_full_path, "Scripts", "pip.exe")
-        else:
-            pip_executable = os.path.join(venv_full_path, "bin", "pip")
-
         # Install the package
-        result = subprocess.run(
-            [pip_executable, "install", package_name],
-            capture_output=True,
-            text=True,
-            cwd=self.base_dir,
-            check=False,
-        )
+        result = self.backend.install(venv_full_path, [package_name], cwd=self.base_dir)
 
         if result.returncode != 0:
+            if self.backend.offline:
+                self.wheelhouse.record_misses([package_name])
+                return (
+                    "Error installing package: offline mode is enabled and the local wheelhouse "
+                    f"cannot satisfy '{package_name}'.\n{result.stderr}"
+                )
             return f"Error installing package: {result.stderr}"
 
+        # Modules already imported by the warm worker may be stale after an install.
+        self._stop_warm_worker()
+
         return f"Package '{package_name}' installed successfully."
 
-    def _create_venv(self) -> str:
-        venv_full_path = os.path.join(self.base_dir, self.venv_path)
+    def _run_setup(self) -> None:
+        try:
+            self._create_venv()
+        except Exception as e:
+            self._setup_error = str(e)
+            Logger.log(f"Virtual environment setup failed: {str(e)}", level="error")
+        finally:
+            if self._on_setup_finished is not None:
+                self._on_setup_finished()
+            self._setup_ready.set()
 
-        # Create the virtual environment
-        venv.create(venv_full_path, with_pip=True)
+    def _wait_for_setup(self) -> str | None:
+        """Waits for the background setup, logging progress.
 
-        # Determine the path to the pip executable in the new venv
-        if sys.platform == "win32":
-            pip_executable = os.path.join(venv_full_path, "Scripts", "pip.exe")
-        else:
-            pip_executable = os.path.join(venv_full_path, "bin", "pip")
+        Returns:
+            ``None`` once the environment is ready, or an error message for the agent if
+            setup failed or is still running after ``SETUP_WAIT_SECONDS``.
+        """
+        self.start_setup()
+        deadline = time.perf_counter() + SETUP_WAIT_SECONDS
+        while not self._setup_ready.wait(SETUP_PROGRESS_INTERVAL):
+            elapsed = time.perf_counter() - self._setup_started
+            if time.perf_counter() >= deadline:
+                return (
+                    f"Error: The virtual environment is still being set up ({self._setup_stage}, "
+                    f"{elapsed:.0f}s so far). Continue exploring the repository and try again later."
+                )
+            Logger.log(
+                f"Waiting for virtual environment setup ({self._setup_stage}, "
+                f"{elapsed:.0f}s so far)..."
+            )
+        if self._setup_error is not None:
+            return f"Error: Virtual environment setup failed: {self._setup_error}"
+        return None
+
+    # These tools run exclusively; wait for setup before the executor takes its write lock,
+    # so that read-only tools keep running meanwhile. The tools still call _wait_for_setup,
+    # which returns at once by then, for callers outside the executor.
+    _prepare_run_script = _wait_for_setup
+    _prepare_run_scripts_in_parallel = _wait_for_setup
+    _prepare_add_missing_package = _wait_for_setup
+
+    def _run_in_warm_worker(self, script_file: str) -> ExecutionResult | None:
+        """Runs a script through the warm worker, starting it on first use.
+
+        Returns ``None`` if the worker is unavailable, so the caller can fall back to a
+        fresh interpreter.
+        """
+        try:
+            if self._warm_worker is None or not self._warm_worker.is_alive():
+                venv_full_path = os.path.join(self.base_dir, self.venv_path)
+                self._warm_worker = warm_worker.WarmWorker(
+                    venv_executable(venv_full_path, "python"),
+                    self.base_dir,
+                    preload=warm_worker.find_top_level_packages(self.base_dir),
+                )
+                weakref.finalize(self, self._warm_worker.close)
+                self._warm_worker.start()
+                Logger.log(
+                    "Started warm worker with preloaded packages: "
+                    f"{', '.join(self._warm_worker.imported) or 'none'}."
+                )
+            return self._warm_worker.run(script_file, self.execution_limits)
+        except Exception as e:
+            Logger.log(
+                f"Warm worker unavailable, running script in a new interpreter: {str(e)}",
+                level="warning",
+            )
+            self._stop_warm_worker()
+            return None
+
+    def _stop_warm_worker(self) -> None:
+        if self._warm_worker is not None:
+            self._warm_worker.close()
+            self._warm_worker = None
+
+    def _create_venv(self) -> str:
+        venv_full_path = os.path.join(self.base_dir, self.venv_path)
+        started = time.perf_counter()
 
         requirements_file = os.path.join(self.base_dir, "requirements.txt")
         pyproject_file = os.path.join(self.base_dir, "pyproject.toml")
         uv_lock_file = os.path.join(self.base_dir, "uv.lock")
 
+        self._setup_stage = "resolving requirements"
+        # Without index access, uv may only use its cache and the wheelhouse, and pipreqs may
+        # only use locally installed package metadata.
+        uv_offline = ["--offline"] if self.backend.offline else []
+
         # Generate requirements.txt in all cases
         if os.path.exists(uv_lock_file):
             # Generate requirements.txt from uv.lock
@@ -135,6 +326,7 @@ class VenvToolsProvider(ToolProviderBase):
                 [
                     "uv",
                     "export",
+                    *uv_offline,
                     "--format",
                     "requirements-txt",
                     "--no-hashes",
@@ -151,7 +343,17 @@ class VenvToolsProvider(ToolProviderBase):
                 "pyproject.toml found. Generating requirements.txt from pyproject.toml using uv."
             )
             subprocess.run(
-                ["uv", "pip", "compile", "pyproject.toml", "-o", "requirements.txt"],
+                [
+                    "uv",
+                    "pip",
+                    "compile",
+                    *uv_offline,
+                    "--find-links",
+                    self.wheelhouse.root,
+                    "pyproject.toml",
+                    "-o",
+                    "requirements.txt",
+                ],
                 cwd=self.base_dir,
                 capture_output=True,
                 check=False,
@@ -170,6 +372,7 @@ class VenvToolsProvider(ToolProviderBase):
                     "--force",
                     "--ignore",
                     self.venv_path,
+                    *(["--use-local"] if self.backend.offline else []),
                 ],
                 cwd=self.base_dir,
                 capture_output=True,
@@ -177,44 +380,116 @@ class VenvToolsProvider(ToolProviderBase):
             )
 
         # Handle existing requirements or pyproject files
-        if os.path.exists(requirements_file):
-            Logger.log("Installing packages from requirements.txt...")
-            self._install_requirements_safely(pip_executable, requirements_file)
-        elif os.path.exists(pyproject_file):
-            # For pyproject.toml, we attempt to install via pip install .
-            # We remove check=True so the venv creation doesn't crash entirely if it fails
-            subprocess.run(
-                [pip_executable, "install", "."],
-                cwd=self.base_dir,
-                capture_output=True,
-                check=False,
+        packages = self._read_requirements(requirements_file)
+        self.wheelhouse.verify()
+        if packages:
+            self._setup_stage = f"installing {len(packages)} packages"
+            # Identical requirement sets share one fully installed environment from the
+            # pool; the clone only gets a lightweight venv layered on top of it.
+            pooled_env, lease = self.env_pool.checkout(
+                packages, build=lambda env_path: self._build_environment(env_path, packages)
             )
-
+            weakref.finalize(self, self.env_pool.release, lease)
+            self.env_pool.overlay(pooled_env, venv_full_path)
+        else:
+            self._setup_stage = "creating environment"
+            Logger.log(f"Creating virtual environment with {self.backend.name}.")
+            self.backend.create(venv_full_path)
+            if os.path.exists(pyproject_file):
+                # For pyproject.toml, we attempt to install via pip install .
+                # Failures are not raised so the venv creation doesn't crash entirely
+                self.backend.install(venv_full_path, ["."], cwd=self.base_dir)
+
+        Logger.log(f"Virtual environment ready in {time.perf_counter() - started:.1f}s.")
         return venv_full_path
 
-    def _install_requirements_safely(self, pip_executable: str, requirements_file: str):
-        """
-        Reads requirements.txt and installs packages one by one.
-        Failures are ignored so valid packages are still installed.
-        """
+    def _read_requirements(self, requirements_file: str) -> list[str]:
+        if not os.path.exists(requirements_file):
+            return []
         try:
             with open(requirements_file, encoding="utf-8") as f:
                 lines = f.readlines()
-
-            for line in lines:
-                package = line.strip()
-                # Skip comments and empty lines
-                if not package or package.startswith("#"):
-                    continue
-
-                # Attempt to install the individual package
-                # check=False ensures the script doesn't stop on failure
-                subprocess.run(
-                    [pip_executable, "install", package],
-                    cwd=self.base_dir,
-                    check=False,
-                    capture_output=True,  # Suppress output to keep console clean, or remove to see errors
-                )
         except Exception as e:
             # Catch file reading errors or other unforeseen issues
             print(f"Warning: Could not process requirements file fully: {e}")
+            return []
+
+        # Skip comments, empty lines and pip options
+        return [
+            line.split(" #", 1)[0].strip()
+            for line in lines
+            if line.strip() and not line.strip().startswith(("#", "-"))
+        ]
+
+    def _build_environment(self, env_path: str, packages: list[str]) -> list[str]:
+        """
+        Creates an environment at ``env_path`` and installs ``packages`` in a single
+        batched install. If the batch fails, the requirement set is bisected to isolate
+        the packages that cannot be installed; those are dropped so valid packages are
+        still installed. With the pip backend, wheels are first downloaded in parallel
+        into the shared wheelhouse; uv downloads in parallel on its own, and the archives
+        of what it installed are added to the wheelhouse afterwards. In offline mode
+        packages are installed only from the wheelhouse, and those it cannot satisfy are
+        recorded as misses to download later with ``Wheelhouse.sync``.
+
+        Returns:
+            list[str]: The packages that could not be installed.
+        """
+        Logger.log(f"Installing packages from requirements.txt with {self.backend.name}...")
+        self.backend.create(env_path)
+        if self.backend.supports_prefetch:
+            self._prefetch_wheels(env_path, packages)
+            self.wheelhouse.verify()
+        dropped = self._install_with_bisection(env_path, packages)
+        if dropped:
+            Logger.log(f"Skipped packages that failed to install: {', '.join(dropped)}")
+            if self.backend.offline:
+                self.wheelhouse.record_misses(dropped)
+        elif self.backend.name == "uv" and not self.backend.offline:
+            # In the background: the environment is usable already. Partial environments
+            # are skipped, as the pool moves them once this returns.
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._add_installed_to_wheelhouse, env_path),
+                daemon=True,
+            ).start()
+        return dropped
+
+    def _add_installed_to_wheelhouse(self, env_path: str) -> None:
+        """Downloads the archives of the packages uv installed in ``env_path`` into the
+        wheelhouse, so later offline installs can use them. Failures are ignored."""
+        try:
+            added = self.wheelhouse.add_installed(self.backend.freeze(env_path))
+        except Exception as e:
+            Logger.log(f"Could not add installed packages to the wheelhouse: {str(e)}")
+            return
+        if added:
+            Logger.log(f"Added {len(added)} installed packages to the wheelhouse.")
+
+    def _install_with_bisection(self, env_path: str, packages: list[str]) -> list[str]:
+        """Installs ``packages`` together, bisecting on failure. Returns the packages dropped."""
+        if self.backend.install(env_path, packages, cwd=self.base_dir).returncode == 0:
+            return []
+        if len(packages) == 1:
+            return packages
+        middle = len(packages) // 2
+        return self._install_with_bisection(
+            env_path, packages[:middle]
+        ) + self._install_with_bisection(env_path, packages[middle:])
+
+    def _prefetch_wheels(self, env_path: str, packages: list[str]) -> None:
+        """Downloads wheels for ``packages`` into the wheelhouse, several chunks at a time.
+
+        Failures are ignored: the batched install resolves anything missing on its own.
+        """
+        wheel_dir = self.wheelhouse.root
+        chunks = [
+            packages[i : i + PREFETCH_CHUNK_SIZE]
+            for i in range(0, len(packages), PREFETCH_CHUNK_SIZE)
+        ]
+
+        def download(chunk: list[str]) -> None:
+            self.backend.download(env_path, chunk, dest=wheel_dir, cwd=self.base_dir)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+            list(executor.map(download, chunks))
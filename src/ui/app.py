@@ -1,27 +1,40 @@
 import asyncio
 import os
 import re
+import time
+from dataclasses import dataclass
 
+from rich.text import Text
 from textual import work
 from textual.app import App, ComposeResult
 from textual.containers import Container
 from textual.reactive import reactive
 from textual.screen import Screen
 from textual.widgets import (
+    DataTable,
     Footer,
     Header,
     Input,
     ListItem,
     ListView,
+    Log,
     Markdown,
     RadioButton,
     RadioSet,
     Static,
 )
 
-from src.core.Logger import Logger
+from src.core.Logger import Logger, LogSession
 
-from .controller import analyze_github, scan_paper_for_github_links
+from .controller import (
+    analyze_github,
+    live_workers,
+    load_history_entry,
+    preload_analysis_modules,
+    save_report,
+    scan_paper_for_github_links,
+    search_history,
+)
 
 SAMPLE_URL = "https://github.com/Brook-B-Nigatu/PaperProbe"
 ASCII_LOGO = """
@@ -41,11 +54,39 @@ ASCII_LOGO = """
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CSS_PATH = os.path.join(SCRIPT_DIR, "style.tcss")
+# Log events are batched into at most this many view updates per second.
+LOG_REFRESH_FPS = 10
+LOG_VIEW_MAX_LINES = 10_000
+# Analyses the dashboard runs at the same time; the others wait in the queue.
+MAX_CONCURRENT_ANALYSES = int(os.getenv("PAPERPROBE_MAX_CONCURRENT_ANALYSES", "2"))
+
+
+def append_log_events(log_view: Log, session: LogSession, seq: int) -> int:
+    """Appends the events of ``session`` numbered ``seq`` or later to ``log_view``.
+
+    Returns:
+        int: The sequence number to continue from on the next call.
+    """
+    events, dropped = session.events_since(seq)
+    if not events:
+        return seq
+    lines = [f"... {dropped} earlier log events dropped ..."] if dropped else []
+    for event in events:
+        prefix = "" if event.level == "info" else f"[{event.level.upper()}] "
+        lines.extend(f"{prefix}{line}" for line in event.message.splitlines() or [""])
+    log_view.write_lines(lines)
+    return events[-1].seq + 1
 
 
 # ----------------------- Screens -----------------------
 class IntroScreen(Screen):
-    BINDINGS = [("ctrl+s", "use_sample", "Use sample url"), ("ctrl+q", "app.quit", "Quit")]
+    BINDINGS = [
+        ("ctrl+s", "use_sample", "Use sample url"),
+        ("space", "toggle_mark", "Mark repo"),
+        ("ctrl+r", "compare", "Analyze marked repos"),
+        ("ctrl+h", "history", "History"),
+        ("ctrl+q", "app.quit", "Quit"),
+    ]
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=False)
@@ -59,6 +100,10 @@ class IntroScreen(Screen):
             yield Static("After scanning, choose a repo from the list.", id="message")
         yield Footer()
 
+    # The last scanned paper (its links, digest and history id), passed on to the analyses
+    # of its repositories.
+    paper: dict | None = None
+
     async def action_use_sample(self) -> None:
         inp = self.query_one(Input)
         inp.value = SAMPLE_URL
@@ -78,6 +123,7 @@ class IntroScreen(Screen):
 
         # Detect pdf/paper vs github
         if re.search(r"github\.com", value, re.I):
+            self.paper = None
             self.app.push_screen(AnalysisScreen(url=value))
             return
 
@@ -106,26 +152,60 @@ class IntroScreen(Screen):
         fake = value if value.startswith("http") else f"https://github.com/example/{value}"
         self.app.push_screen(AnalysisScreen(url=fake))
 
+    def action_history(self) -> None:
+        self.app.push_screen(HistoryScreen())
+
+    def action_toggle_mark(self) -> None:
+        if not self.query("#results_list"):
+            return
+        item = self.query_one("#results_list", ListView).highlighted_child
+        if item is None or not getattr(item, "data", None):
+            return
+        item.data["marked"] = not item.data.get("marked", False)
+        mark = "[x] " if item.data["marked"] else ""
+        item.query_one(Static).update(f"{mark}{item.data['label']}")
+
+    def action_compare(self) -> None:
+        """Opens the dashboard for the marked repos, or for every listed repo if none is marked."""
+        if not self.query("#results_list"):
+            self.query_one("#message").update("Scan a paper for GitHub links first.")
+            return
+        items = [item for item in self.query_one("#results_list", ListView).children if item.data]
+        urls = [item.data["url"] for item in items if item.data.get("marked")] or [
+            item.data["url"] for item in items
+        ]
+        if urls:
+            self.app.push_screen(DashboardScreen(urls=urls, paper=self.paper))
+
     async def on_list_view_selected(self, event: ListView.Selected) -> None:
         item = event.item
         if hasattr(item, "data") and item.data:
             url = item.data["url"]
-            self.app.push_screen(AnalysisScreen(url=url))
+            self.app.push_screen(AnalysisScreen(url=url, paper=self.paper))
 
     @work
     async def load_github_links(self, value: str, results_list: ListView) -> None:
-        links = await scan_paper_for_github_links(value)
+        try:
+            self.paper = await scan_paper_for_github_links(value)
+        except Exception as e:
+            results_list.loading = False
+            self.query_one("#message").update(f"Error scanning paper: {str(e)}")
+            return
+        links = self.paper["links"]
 
         for idx, L in enumerate(links, start=1):
             label = f"{idx}. {L}"
             if idx == 1:
                 label += " [b][i](RECOMMENDED)[/b][/i]"
             item = ListItem(Static(label), id=f"item-{idx}")
-            item.data = {"url": L}
+            item.data = {"url": L, "label": label}
             await results_list.append(item)
 
         results_list.loading = False
-        self.query_one("#message").update("Select a GitHub link (use arrows + Enter).")
+        self.query_one("#message").update(
+            "Select a GitHub link (use arrows + Enter), or mark several with Space and press "
+            "Ctrl+R to analyze them side by side."
+        )
         results_list.focus()
 
 
@@ -134,12 +214,18 @@ class AnalysisScreen(Screen):
 
     display_output = reactive("... waiting for project analysis ...")
 
-    def __init__(self, url: str, **kwargs):
+    def __init__(self, url: str, paper: dict | None = None, **kwargs):
         super().__init__(**kwargs)
         self.url = url
+        self.paper = paper
         self.current_markdown = None
         self.current_filename = None
         self.current_mode = None
+        self._log_session = None
+        self._log_seq = 0
+        # Sections of a detailed analysis, appended from its worker thread as they complete.
+        self._sections: list[str] = []
+        self._shown_sections = 0
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=False)
@@ -150,8 +236,25 @@ class AnalysisScreen(Screen):
                 yield RadioButton("Basic", id="basic")
                 yield RadioButton("Detailed", id="detailed")
             yield Markdown(self.display_output, id="result_view")
+            yield Log(max_lines=LOG_VIEW_MAX_LINES, id="log_view")
         yield Footer()
 
+    def on_mount(self) -> None:
+        self.query_one("#log_view", Log).display = False
+        self.set_interval(1 / LOG_REFRESH_FPS, self.flush_log)
+
+    def flush_log(self) -> None:
+        """Appends the log events recorded since the last flush to the log view, and shows
+        the sections of a detailed analysis completed since then."""
+        if self._log_session is None:
+            return
+        self._log_seq = append_log_events(
+            self.query_one("#log_view", Log), self._log_session, self._log_seq
+        )
+        if len(self._sections) > self._shown_sections:
+            self._shown_sections = len(self._sections)
+            self.display_output = "\n\n".join(self._sections[: self._shown_sections])
+
     def watch_display_output(self, display_output: str) -> None:
         try:
             self.query_one("#result_view", Markdown).update(display_output)
@@ -182,16 +285,34 @@ class AnalysisScreen(Screen):
 
     @work
     async def load_analysis(self, mode: str) -> None:
-        Logger.screen = self
-        result = await analyze_github(self.url, mode)
-
-        filename = f"paperprobe_analysis_{mode}.md"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(result["markdown"])
+        log_view = self.query_one("#log_view", Log)
+        log_view.clear()
+        log_view.display = True
+        self._sections, self._shown_sections = [], 0
+        # The detailed analysis streams its sections above the log as they complete.
+        self.display_output = "... waiting for the first components ..."
+        self.query_one("#result_view", Markdown).display = mode == "detailed"
+        with Logger.session(self.url) as log_session:
+            self._log_session, self._log_seq = log_session, 0
+            try:
+                result = await analyze_github(
+                    self.url, mode, on_section=self._sections.append, paper=self.paper
+                )
+            except Exception as e:
+                result = {"markdown": f"Error analysing repository: {str(e)}", "filename": None}
+        self.flush_log()
+        filename = result["filename"]
 
         result_view = self.query_one("#result_view", Markdown)
         self.display_output = result["markdown"]
         result_view.loading = False
+        result_view.display = True
+        if filename is None:
+            # Keep the log in view: it tells why the analysis failed.
+            self.query_one("#prompt").update(f"{mode.capitalize()} Analysis Failed")
+            self.query_one("#analysis_prompt").update("See the log below for details.")
+            return
+        log_view.display = False
         self.query_one("#prompt").update(
             f"{mode.capitalize()} Analysis Results (saved to {filename})"
         )
@@ -204,6 +325,124 @@ class AnalysisScreen(Screen):
         self.current_mode = mode
 
 
+@dataclass
+class AnalysisJob:
+    url: str
+    status: str = "Queued"
+    session: LogSession | None = None
+    finished: float | None = None
+    markdown: str | None = None
+    filename: str | None = None
+
+
+class DashboardScreen(Screen):
+    """Runs basic analyses of several repositories concurrently and shows their progress.
+
+    At most ``MAX_CONCURRENT_ANALYSES`` run at once in this process; when worker processes
+    are running, every analysis is queued at once and the workers bound how many run. The
+    table shows each job's stage and elapsed time; the log below it follows the highlighted
+    job. Selecting a finished job opens its result.
+    """
+
+    BINDINGS = [("ctrl+b", "go_back", "Back")]
+
+    def __init__(self, urls: list[str], paper: dict | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.paper = paper
+        self.jobs = {url: AnalysisJob(url) for url in urls}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+        self._followed = urls[0] if urls else None
+        self._log_seq = 0
+
+    def compose(self) -> ComposeResult:
+        yield Header(show_clock=False)
+        with Container(id="main"):
+            yield Static(
+                f"Analyzing {len(self.jobs)} repositories, up to {MAX_CONCURRENT_ANALYSES} at a "
+                "time. Select a finished row to open its result.",
+                id="prompt",
+            )
+            yield DataTable(cursor_type="row", id="jobs_table")
+            yield Log(max_lines=LOG_VIEW_MAX_LINES, id="log_view")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        table = self.query_one("#jobs_table", DataTable)
+        table.add_column("Repository", key="url")
+        table.add_column("Status", key="status")
+        table.add_column("Stage", key="stage")
+        table.add_column("Elapsed", key="elapsed")
+        for url in self.jobs:
+            table.add_row(url, "Queued", "", "", key=url)
+        self.start_jobs()
+        self.set_interval(1 / LOG_REFRESH_FPS, self.refresh_jobs)
+
+    @work
+    async def start_jobs(self) -> None:
+        workers = await live_workers()
+        if workers:
+            self._semaphore = asyncio.Semaphore(len(self.jobs))
+            self.query_one("#prompt", Static).update(
+                f"Analyzing {len(self.jobs)} repositories with {workers} workers. "
+                "Select a finished row to open its result."
+            )
+        for job in self.jobs.values():
+            self.run_worker(self.run_job(job), group="analyses")
+
+    async def run_job(self, job: AnalysisJob) -> None:
+        async with self._semaphore:
+            job.status = "Running"
+            with Logger.session(job.url) as log_session:
+                job.session = log_session
+                try:
+                    result = await analyze_github(job.url, "basic", paper=self.paper)
+                    job.markdown, job.filename = result["markdown"], result["filename"]
+                    job.status = "Done"
+                except Exception as e:
+                    job.markdown = f"Error analysing repository: {str(e)}"
+                    job.status = "Failed"
+            job.finished = time.time()
+
+        if job.filename is None:
+            job.filename = await save_report(job.url, "basic", job.markdown)
+
+    def refresh_jobs(self) -> None:
+        """Updates stages and elapsed times, and appends new log lines of the followed job."""
+        table = self.query_one("#jobs_table", DataTable)
+        for url, job in self.jobs.items():
+            stage, elapsed = "", ""
+            if job.session is not None:
+                stage = job.session.stage if job.finished is None else ""
+                end = job.finished or time.time()
+                elapsed = f"{end - job.session.started:.0f}s"
+            table.update_cell(url, "status", job.status)
+            table.update_cell(url, "stage", stage)
+            table.update_cell(url, "elapsed", elapsed)
+
+        job = self.jobs.get(self._followed)
+        if job is None or job.session is None:
+            return
+        self._log_seq = append_log_events(
+            self.query_one("#log_view", Log), job.session, self._log_seq
+        )
+
+    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        if event.row_key.value != self._followed:
+            self._followed = event.row_key.value
+            self._log_seq = 0
+            self.query_one("#log_view", Log).clear()
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        job = self.jobs[event.row_key.value]
+        if job.filename is not None:
+            self.app.push_screen(
+                ResultScreen(markdown=job.markdown, filename=job.filename, mode="basic")
+            )
+
+    def action_go_back(self) -> None:
+        self.app.pop_screen()
+
+
 class ResultScreen(Screen):
     BINDINGS = [("ctrl+b", "go_back", "Back")]
 
@@ -226,6 +465,60 @@ class ResultScreen(Screen):
         self.app.pop_screen()
 
 
+class HistoryScreen(Screen):
+    """Browses past analyses, newest first; the list is filtered as the query is typed.
+    Selecting a row opens its report."""
+
+    BINDINGS = [("ctrl+b", "go_back", "Back")]
+
+    def compose(self) -> ComposeResult:
+        yield Header(show_clock=False)
+        with Container(id="main"):
+            yield Static("Search past analyses by repository or report content.", id="prompt")
+            yield Input(placeholder="e.g. transformer inference", id="history_query")
+            yield DataTable(cursor_type="row", id="history_table")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        table = self.query_one("#history_table", DataTable)
+        for column in ("Date", "Repository", "Mode", "Time", "Tokens", "Match"):
+            table.add_column(column)
+        self.search("")
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.search(event.value)
+
+    @work(exclusive=True)
+    async def search(self, query: str) -> None:
+        entries = await search_history(query)
+        table = self.query_one("#history_table", DataTable)
+        table.clear()
+        for entry in entries:
+            table.add_row(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.started_at)),
+                Text(entry.repo_url),
+                entry.mode,
+                f"{entry.seconds:.0f}s",
+                str(entry.tokens),
+                Text(entry.snippet),
+                key=str(entry.id),
+            )
+
+    async def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        entry = await load_history_entry(int(event.row_key.value))
+        if entry is not None:
+            self.app.push_screen(
+                ResultScreen(
+                    markdown=entry.report,
+                    filename=entry.report_path or "history only",
+                    mode=entry.mode,
+                )
+            )
+
+    def action_go_back(self) -> None:
+        self.app.pop_screen()
+
+
 # ------------------------ App -----------------------
 class PaperProbeApp(App):
     CSS_PATH = CSS_PATH
@@ -236,6 +529,8 @@ class PaperProbeApp(App):
     def on_mount(self) -> None:
         self.theme = "catppuccin-mocha"
         self.push_screen(IntroScreen())
+        # Import the analysis stack while the user is typing, once the first frame is drawn.
+        self.call_after_refresh(self.run_worker, preload_analysis_modules, thread=True)
 
     async def action_toggle_dark(self) -> None:
         self.theme = "catppuccin-latte" if self.theme == "catppuccin-mocha" else "catppuccin-mocha"
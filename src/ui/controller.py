@@ -1,18 +1,145 @@
+import asyncio
+import functools
+import importlib
 import os
 
-from src.core.task_manager import async_basic_analysis, async_get_github_links
+from src.core.Logger import Logger
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# These pull in langchain, PyGithub, GitPython and PyMuPDF, so they are imported on first
+# use (or by preload_analysis_modules) rather than when the UI starts.
+ANALYSIS_MODULES = ("src.core.task_manager", "src.core.detailed_analysis")
 
 
-async def scan_paper_for_github_links(source: str) -> list[str]:
-    results = await async_get_github_links(source)
+def preload_analysis_modules() -> None:
+    """Imports the analysis modules ahead of their first use, e.g. on a background thread
+    once the UI is up. Import errors are left to surface when the modules are used."""
+    for module in ANALYSIS_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
 
-    return results
 
+# How often a client polls the queue for the progress of a job run by a worker process.
+JOB_WATCH_SECONDS = 0.5
 
-async def analyze_github(url: str, mode: str) -> dict:
-    md = await async_basic_analysis(url)
+
+@functools.cache
+def get_queue():
+    from src.core.job_queue import open_queue
+
+    return open_queue()
+
+
+async def live_workers() -> int:
+    """Returns the number of worker processes (``paperprobe worker``) serving the queue."""
+    try:
+        return await asyncio.to_thread(get_queue().live_workers)
+    except Exception:
+        return 0
+
+
+async def run_job(kind: str, payload: dict, on_section=None) -> dict:
+    """Runs a scan or analysis job on the worker processes if any are running, and in this
+    process otherwise. Either way, its log events go to the current log session and the
+    sections of a detailed analysis to ``on_section``.
+
+    Raises:
+        RuntimeError: If the job failed on every attempt.
+    """
+    if not await live_workers():
+        from src.core.worker import HANDLERS
+
+        return await asyncio.to_thread(HANDLERS[kind], payload, on_section)
+
+    job_id = await asyncio.to_thread(get_queue().enqueue, kind, payload)
+    Logger.log(f"Queued as job {job_id}.")
+    return await watch_job(job_id, on_section)
+
+
+async def watch_job(job_id: int, on_section=None) -> dict:
+    """Follows a job run by a worker process until it finishes, copying its log events and
+    stage into the current log session."""
+    from src.core.job_queue import FAILED, QUEUED
+
+    session = Logger.current_session()
+    after = 0
+    while True:
+        job, events = await asyncio.to_thread(get_queue().poll, job_id, after)
+        if job is None:
+            raise RuntimeError(f"Job {job_id} is no longer in the queue.")
+        for event in events:
+            after = event.id
+            if event.kind == "section":
+                if on_section is not None:
+                    on_section(event.message)
+            else:
+                session.append(event.message, event.level)
+        session.stage = job.stage or ("Waiting for a worker" if job.status == QUEUED else "")
+        if job.finished:
+            break
+        await asyncio.sleep(JOB_WATCH_SECONDS)
+    if job.status == FAILED:
+        raise RuntimeError(f"Job {job_id} failed after {job.attempts} attempts: {job.error}")
+    return job.result
+
+
+async def scan_paper_for_github_links(source: str) -> dict:
+    """Scans a paper for GitHub links and digests it; returns the ``links``, the
+    ``paper_digest`` and the history's ``paper_id``.
+
+    Raises:
+        RuntimeError: If the scan failed on every attempt.
+    """
+    if os.path.exists(source):
+        source = os.path.abspath(source)
+    return await run_job("scan", {"source": source})
+
+
+async def analyze_github(url: str, mode: str, on_section=None, paper: dict | None = None) -> dict:
+    """Runs the analysis for ``mode`` ("basic" or "detailed"), which saves the report and
+    records it in the history. The detailed analysis passes markdown sections to
+    ``on_section`` as they complete. ``paper`` is the scan of the paper the repository was
+    found in, if any.
+
+    Raises:
+        RuntimeError: If the analysis failed, or its history entry is missing.
+    """
+    paper = paper or {}
+    payload = {
+        "url": url,
+        "mode": mode,
+        "paper_id": paper.get("paper_id"),
+        "paper_digest": paper.get("paper_digest"),
+    }
+    result = await run_job("analyze", payload, on_section)
+    entry = await load_history_entry(result["analysis_id"])
+    if entry is None:
+        raise RuntimeError(f"Analysis {result['analysis_id']} is missing from the history.")
     return {
-        "markdown": md,
+        "markdown": entry.report,
+        "filename": result["filename"],
+        "analysis_id": result["analysis_id"],
     }
+
+
+async def search_history(query: str, limit: int = 50) -> list:
+    """Returns the newest past analyses matching ``query`` (all recent ones if empty)."""
+    from src.core.history import default_history
+
+    return await asyncio.to_thread(default_history().search, query, limit)
+
+
+async def load_history_entry(analysis_id: int):
+    """Returns a past analysis with its report, or ``None``."""
+    from src.core.history import default_history
+
+    return await asyncio.to_thread(default_history().get, analysis_id)
+
+
+async def save_report(url: str, mode: str, markdown: str) -> str:
+    """Saves an analysis report in the workspace and returns its path."""
+    from src.core.worker import save_report
+
+    return await asyncio.to_thread(save_report, url, mode, markdown)
@@ -1,5 +1,226 @@
-from src.ui.app import PaperProbeApp
+import argparse
+import sys
+import time
 
 
 def paperprobe() -> None:
-    PaperProbeApp().run()
+    parser = argparse.ArgumentParser(
+        prog="paperprobe",
+        description="Find source code for research papers and generate sample scripts.",
+    )
+    commands = parser.add_subparsers(dest="command")
+    profile = commands.add_parser(
+        "profile-imports", help="Show which imports make startup slow (-X importtime)."
+    )
+    profile.add_argument("--module", default=None, help="Module to profile (default: the TUI).")
+    profile.add_argument("--top", type=int, default=25, help="Number of entries to show.")
+    benchmark = commands.add_parser(
+        "startup-benchmark", help="Time startup and fail if it exceeds the budget."
+    )
+    benchmark.add_argument("--runs", type=int, default=5, help="Number of timed runs.")
+    benchmark.add_argument("--budget-ms", type=float, default=None, help="Allowed median time.")
+    cleanup = commands.add_parser(
+        "cleanup", help="Remove unused clones (with their environments) and reports."
+    )
+    cleanup.add_argument(
+        "--older-than-days", type=float, default=None, help="Only remove artifacts unused longer."
+    )
+    cleanup.add_argument(
+        "--gc", action="store_true", help="Only remove what exceeds the workspace quota."
+    )
+    cleanup.add_argument("--list", action="store_true", help="List artifacts, remove nothing.")
+    history = commands.add_parser("history", help="Search past analyses or print a report.")
+    history.add_argument("query", nargs="*", help="Words to search for (default: list recent).")
+    history.add_argument("--limit", type=int, default=20, help="Number of analyses to list.")
+    history.add_argument("--show", type=int, default=None, help="Print the report with this id.")
+    worker = commands.add_parser("worker", help="Run worker processes that take queued jobs.")
+    worker.add_argument("--processes", type=int, default=None, help="Number of workers.")
+    submit = commands.add_parser("submit", help="Queue a scan or analysis job for the workers.")
+    submit.add_argument("kind", choices=("scan", "analyze"), help="Job kind.")
+    submit.add_argument("target", help="Paper to scan, or repository URL to analyze.")
+    submit.add_argument("--mode", choices=("basic", "detailed"), default="basic")
+    submit.add_argument("--paper-id", type=int, default=None, help="Scanned paper of the repo.")
+    submit.add_argument("--no-wait", action="store_true", help="Do not follow the job.")
+    jobs = commands.add_parser("jobs", help="List queued, running and finished jobs.")
+    jobs.add_argument("--status", choices=("queued", "running", "done", "failed"), default=None)
+    jobs.add_argument("--limit", type=int, default=20, help="Number of jobs to list.")
+    queue_benchmark = commands.add_parser(
+        "queue-benchmark", help="Measure job throughput by worker count with stand-in jobs."
+    )
+    queue_benchmark.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    queue_benchmark.add_argument("--jobs", type=int, default=48, help="Jobs per measurement.")
+    queue_benchmark.add_argument("--cpu-ms", type=float, default=50.0, help="CPU time per job.")
+    queue_benchmark.add_argument("--io-ms", type=float, default=200.0, help="Wait time per job.")
+    serve = commands.add_parser("serve", help="Run the HTTP API for scans and analyses.")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    api_benchmark = commands.add_parser(
+        "api-benchmark", help="Load-test the HTTP API with stand-in jobs."
+    )
+    api_benchmark.add_argument("--clients", type=int, default=50, help="Concurrent clients.")
+    api_benchmark.add_argument("--polls", type=int, default=200, help="Status polls per client.")
+    api_benchmark.add_argument("--repositories", type=int, default=5, help="Distinct repos.")
+    api_benchmark.add_argument("--job-seconds", type=float, default=1.0, help="Job duration.")
+    args = parser.parse_args()
+
+    if args.command is None:
+        # Imported here so that the diagnostic commands do not pay for the TUI.
+        from src.ui.app import PaperProbeApp
+
+        PaperProbeApp().run()
+        return
+
+    if args.command == "history":
+        from src.core.history import AnalysisHistory
+
+        store = AnalysisHistory()
+        if args.show is not None:
+            entry = store.get(args.show)
+            if entry is None:
+                print(f"No analysis with id {args.show}.")
+                sys.exit(1)
+            print(entry.report)
+            return
+        for entry in store.search(" ".join(args.query), args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.started_at))
+            print(
+                f"{entry.id:>6}  {started}  {entry.mode:<8} {entry.repo_url}  "
+                f"({entry.seconds:.0f}s, {entry.tokens} tokens)"
+            )
+            if entry.snippet:
+                print(f"        {entry.snippet}")
+        return
+
+    if args.command == "worker":
+        from src.core.worker import DEFAULT_WORKERS, WorkerPool
+
+        pool = WorkerPool(args.processes or DEFAULT_WORKERS)
+        pool.start()
+        print(f"Started {pool.processes} workers; Ctrl+C stops them after their jobs.")
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            print("Waiting for running jobs to finish; Ctrl+C again to stop now.")
+            try:
+                pool.stop()
+            except KeyboardInterrupt:
+                pool.stop(timeout=0)
+        return
+
+    if args.command in ("submit", "jobs"):
+        from src.core.job_queue import FAILED, open_queue
+
+        queue = open_queue()
+        if args.command == "jobs":
+            for job in queue.jobs(args.status, args.limit):
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job.created_at))
+                target = job.payload.get("url") or job.payload.get("source", "")
+                detail = job.error if job.status == FAILED else job.stage or ""
+                print(
+                    f"{job.id:>6}  {created}  {job.kind:<8} {job.status:<8} {target}  "
+                    f"(attempt {job.attempts}/{job.max_attempts}) {detail}"
+                )
+            return
+        if args.kind == "scan":
+            payload = {"source": args.target}
+        else:
+            payload = {"url": args.target, "mode": args.mode, "paper_id": args.paper_id}
+            if args.paper_id is not None:
+                from src.core.history import AnalysisHistory
+
+                payload["paper_digest"] = AnalysisHistory().paper_digest(args.paper_id)
+        job_id = queue.enqueue(args.kind, payload)
+        print(f"Queued job {job_id}.")
+        if not queue.live_workers():
+            print("No workers are running; start them with `paperprobe worker`.")
+        if args.no_wait:
+            return
+        after = 0
+        while True:
+            job, events = queue.poll(job_id, after)
+            for event in events:
+                after = event.id
+                if event.kind == "log":
+                    print(event.message)
+            if job is None or job.finished:
+                break
+            time.sleep(1)
+        if job is None or job.status == FAILED:
+            print(f"Job {job_id} failed: {job.error if job else 'removed from the queue'}")
+            sys.exit(1)
+        if args.kind == "scan":
+            print(f"Paper {job.result['paper_id']}, GitHub links (most relevant first):")
+            print("\n".join(f"  {link}" for link in job.result["links"]))
+        else:
+            print(
+                f"Report saved to {job.result['filename']} "
+                f"(paperprobe history --show {job.result['analysis_id']})."
+            )
+        return
+
+    if args.command in ("serve", "api-benchmark"):
+        import asyncio
+
+        from src.ui import server
+
+        if args.command == "serve":
+            try:
+                asyncio.run(server.serve(args.host, args.port))
+            except KeyboardInterrupt:
+                pass
+            return
+        result = asyncio.run(
+            server.load_benchmark(args.clients, args.polls, args.repositories, args.job_seconds)
+        )
+        print(
+            f"{result.submissions} submissions from {result.clients} clients ran "
+            f"{result.jobs_run} jobs (the rest were coalesced).\n"
+            f"Submit latency: p50 {result.submit_p50_ms:.1f} ms, "
+            f"p99 {result.submit_p99_ms:.1f} ms.\n"
+            f"Submit to done event: p50 {result.completion_p50_seconds:.2f} s, "
+            f"{result.events_per_stream:.0f} events per stream.\n"
+            f"Status polls: {result.polls_per_second:.0f}/s, p50 {result.poll_p50_ms:.2f} ms, "
+            f"p99 {result.poll_p99_ms:.2f} ms."
+        )
+        return
+
+    if args.command == "queue-benchmark":
+        from src.core.diagnostics import queue_benchmark
+
+        print("workers  processes (jobs/s)  threads (jobs/s)")
+        for row in queue_benchmark(tuple(args.workers), args.jobs, args.cpu_ms, args.io_ms):
+            print(
+                f"{row.workers:>7}  {row.processes_jobs_per_second:>18.1f}  "
+                f"{row.threads_jobs_per_second:>16.1f}"
+            )
+        return
+
+    if args.command == "cleanup":
+        from src.core.workspace import Workspace
+
+        workspace = Workspace()
+        if args.list:
+            print(workspace.report())
+            return
+        if args.gc:
+            reclaimed = workspace.gc()
+        else:
+            older_than = args.older_than_days * 86400 if args.older_than_days else None
+            reclaimed = workspace.cleanup(older_than)
+        print(f"Reclaimed {reclaimed / 1024**2:.1f} MB.")
+        return
+
+    from src.core import diagnostics
+
+    if args.command == "profile-imports":
+        print(diagnostics.import_time_report(args.module or diagnostics.STARTUP_MODULE, args.top))
+    else:
+        budget_ms = args.budget_ms or diagnostics.STARTUP_BUDGET_MS
+        median_ms, within_budget = diagnostics.startup_benchmark(args.runs, budget_ms=budget_ms)
+        print(
+            f"Startup import time: {median_ms:.0f} ms (median of {args.runs}), "
+            f"budget {budget_ms:.0f} ms."
+        )
+        if not within_budget:
+            print("Startup time exceeds the budget.")
+            sys.exit(1)
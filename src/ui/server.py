@@ -0,0 +1,553 @@
+import asyncio
+import itertools
+import json
+import os
+import re
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from urllib.parse import parse_qs, urlsplit
+
+from src.core.Logger import Logger, LogSession
+
+from . import controller
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Jobs the server runs at the same time in this process, as in the TUI's dashboard; when
+# worker processes are running, the server allows as many as there are workers.
+MAX_CONCURRENT_JOBS = int(os.getenv("PAPERPROBE_MAX_CONCURRENT_ANALYSES", "2"))
+# Submissions beyond this many queued or running jobs are refused with 503.
+MAX_PENDING_JOBS = 100
+# Finished jobs kept for polling; their reports stay in the history.
+MAX_FINISHED_JOBS = 500
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+# Event streams send new log events this often, like the TUI's log view.
+STREAM_INTERVAL_SECONDS = 0.1
+# Event streams send a comment this often when idle, so proxies keep them open.
+STREAM_KEEPALIVE_SECONDS = 15.0
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON body: {str(e)}") from e
+        if not isinstance(data, dict):
+            raise HttpError(400, "The body must be a JSON object.")
+        return data
+
+
+@dataclass
+class ApiJob:
+    """A scan or analysis submitted to the server, with its log session once it runs."""
+
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    status: str = "queued"
+    session: LogSession | None = None
+    sections: list[str] = field(default_factory=list)
+    result: dict | None = None
+    error: str | None = None
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    # Number of submissions coalesced into this job.
+    submissions: int = 1
+    task: asyncio.Task | None = None
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.session.stage if self.session and self.finished is None else None,
+            "submissions": self.submissions,
+            "created": self.created,
+            "elapsed": (self.finished or time.time()) - self.created,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ApiServer:
+    """Local HTTP API for running scans and analyses from other tools.
+
+    Endpoints (JSON unless noted):
+
+    - ``POST /scan`` with ``{"source": ...}``: scans a paper (URL or local path).
+    - ``POST /analyze`` with ``{"url": ..., "mode": "basic" | "detailed", "paper_id": ...}``:
+      analyses a repository; ``mode`` and ``paper_id`` are optional.
+    - ``GET /jobs`` and ``GET /jobs/<id>``: job status, stage and result.
+    - ``GET /jobs/<id>/events``: server-sent events: ``log`` and ``tool_call`` events from
+      the job's log session (with ids, so ``Last-Event-ID`` resumes a stream), ``stage``,
+      report ``section`` events, and finally ``done`` with the job.
+    - ``GET /reports/<analysis id>``: the report, as markdown.
+    - ``GET /history?q=...``: past analyses matching the words, newest first.
+    - ``GET /health``.
+
+    Submissions return ``202`` with the job. A submission matching a queued or running job
+    (same paper, or same repository, mode and paper) is coalesced into it instead of starting
+    another. Jobs run through the controller, so on worker processes when any are
+    running; at most ``max_concurrent`` run at once, and submissions are refused with
+    ``503`` once ``MAX_PENDING_JOBS`` are queued or running. Jobs are kept in memory.
+
+    The server has no authentication: bind it to localhost only.
+
+    Args:
+        run_job: Coroutine function running a job, ``controller.run_job`` by default.
+        max_concurrent (int | None): Jobs run at once; by default ``MAX_CONCURRENT_JOBS``,
+            or the number of live worker processes if greater.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[..., Awaitable[dict]] | None = None,
+        max_concurrent: int | None = None,
+    ):
+        self.run_job = run_job or controller.run_job
+        self.max_concurrent = max_concurrent
+        self.jobs: dict[int, ApiJob] = {}
+        self._in_flight: dict[str, ApiJob] = {}
+        self._ids = itertools.count(1)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self._routes = [
+            ("GET", re.compile(r"/health"), self.health),
+            ("POST", re.compile(r"/scan"), self.submit_scan),
+            ("POST", re.compile(r"/analyze"), self.submit_analysis),
+            ("GET", re.compile(r"/jobs"), self.list_jobs),
+            ("GET", re.compile(r"/jobs/(\d+)"), self.get_job),
+            ("GET", re.compile(r"/jobs/(\d+)/events"), self.stream_events),
+            ("GET", re.compile(r"/reports/(\d+)"), self.get_report),
+            ("GET", re.compile(r"/history"), self.search_history),
+        ]
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """Starts listening and returns the port (useful with ``port=0``)."""
+        if self.max_concurrent is None:
+            self.max_concurrent = max(MAX_CONCURRENT_JOBS, await controller.live_workers())
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening, closes open connections and cancels unfinished jobs."""
+        self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        for job in self.jobs.values():
+            if job.finished is None:
+                job.task.cancel()
+        await self._server.wait_closed()
+        # Let the connection handlers see their connections closed.
+        await asyncio.sleep(0)
+
+    # ------------------------- Endpoints -------------------------
+    async def health(self, request: Request) -> tuple[int, dict]:
+        return 200, {
+            "status": "ok",
+            "jobs_in_flight": len(self._in_flight),
+            "max_concurrent": self.max_concurrent,
+            "workers": await controller.live_workers(),
+        }
+
+    async def submit_scan(self, request: Request) -> tuple[int, dict]:
+        source = str(request.json().get("source") or "").strip()
+        if not source:
+            raise HttpError(400, "'source' (a paper URL or local path) is required.")
+        if os.path.exists(source):
+            source = os.path.abspath(source)
+        return self._submit("scan", f"scan:{source}", {"source": source})
+
+    async def submit_analysis(self, request: Request) -> tuple[int, dict]:
+        data = request.json()
+        url, mode = str(data.get("url") or "").strip(), data.get("mode", "basic")
+        if not re.search(r"github\.com/[^/\s]+/[^/\s]+", url):
+            raise HttpError(400, "'url' must be a GitHub repository URL.")
+        if mode not in ("basic", "detailed"):
+            raise HttpError(400, "'mode' must be 'basic' or 'detailed'.")
+        url = normalize_repository_url(url)
+        paper_id = data.get("paper_id")
+        if paper_id is not None and (not isinstance(paper_id, int) or isinstance(paper_id, bool)):
+            raise HttpError(400, "'paper_id' must be an integer.")
+        paper_digest = None
+        if paper_id is not None:
+            from src.core.history import default_history
+
+            paper_digest = await asyncio.to_thread(default_history().paper_digest, paper_id)
+        payload = {"url": url, "mode": mode, "paper_id": paper_id, "paper_digest": paper_digest}
+        return self._submit("analyze", f"analyze:{mode}:{url.lower()}:{paper_id}", payload)
+
+    async def list_jobs(self, request: Request) -> tuple[int, list]:
+        return 200, [job.describe() for job in reversed(self.jobs.values())]
+
+    async def get_job(self, request: Request, job_id: str) -> tuple[int, dict]:
+        return 200, self._job(job_id).describe()
+
+    async def get_report(self, request: Request, analysis_id: str) -> tuple[int, str]:
+        entry = await controller.load_history_entry(int(analysis_id))
+        if entry is None:
+            raise HttpError(404, f"No report with id {analysis_id}.")
+        return 200, entry.report
+
+    async def search_history(self, request: Request) -> tuple[int, list]:
+        limit = request.query.get("limit", "")
+        limit = int(limit) if limit.isdigit() else 50
+        entries = await controller.search_history(request.query.get("q", ""), limit)
+        return 200, [asdict(entry) for entry in entries]
+
+    async def stream_events(
+        self, request: Request, job_id: str, writer: asyncio.StreamWriter
+    ) -> None:
+        """Streams a job's progress as server-sent events until it finishes."""
+        job = self._job(job_id)
+        last_id = request.headers.get("last-event-id") or request.query.get("after") or "0"
+        seq = int(last_id) if last_id.isdigit() else 0
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        sent_sections, stage, last_write = 0, None, time.monotonic()
+        while True:
+            # Read before flushing, so that every event of a finished job has been sent.
+            finished = job.finished is not None
+            chunks = []
+            if job.session is not None:
+                events, dropped = job.session.events_since(seq)
+                if dropped:
+                    chunks.append(_sse("dropped", {"count": dropped}))
+                for event in events:
+                    kind = "tool_call" if event.message.startswith("[Tool Call]") else "log"
+                    chunks.append(_sse(kind, asdict(event), event_id=event.seq + 1))
+                    seq = event.seq + 1
+                if job.session.stage != stage and not finished:
+                    stage = job.session.stage
+                    chunks.append(_sse("stage", {"stage": stage}))
+            for index in range(sent_sections, len(job.sections)):
+                chunks.append(_sse("section", {"index": index, "markdown": job.sections[index]}))
+            sent_sections = len(job.sections)
+            if finished:
+                chunks.append(_sse("done", job.describe()))
+            elif not chunks and time.monotonic() - last_write > STREAM_KEEPALIVE_SECONDS:
+                chunks.append(b": keepalive\n\n")
+            if chunks:
+                writer.write(b"".join(chunks))
+                await writer.drain()
+                last_write = time.monotonic()
+            if finished:
+                return
+            await asyncio.sleep(STREAM_INTERVAL_SECONDS)
+
+    # ------------------------- Jobs -------------------------
+    def _submit(self, kind: str, key: str, payload: dict) -> tuple[int, dict]:
+        job = self._in_flight.get(key)
+        if job is not None:
+            job.submissions += 1
+            return 202, {**job.describe(), "coalesced": True}
+        if len(self._in_flight) >= MAX_PENDING_JOBS:
+            raise HttpError(503, "Too many jobs in flight; retry later.")
+        job = ApiJob(next(self._ids), kind, key, payload)
+        self.jobs[job.id] = self._in_flight[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        return 202, {**job.describe(), "coalesced": False}
+
+    async def _run(self, job: ApiJob) -> None:
+        try:
+            async with self._semaphore:
+                with Logger.session(f"api job {job.id}: {job.kind}") as session:
+                    job.session, job.status = session, "running"
+                    job.result = await self.run_job(job.kind, job.payload, job.sections.append)
+                    job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {str(e)}"
+        finally:
+            job.finished = time.time()
+            del self._in_flight[job.key]
+            self._forget_finished_jobs()
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def _job(self, job_id: str) -> ApiJob:
+        job = self.jobs.get(int(job_id))
+        if job is None:
+            raise HttpError(404, f"No job with id {job_id}.")
+        return job
+
+    # ------------------------- HTTP -------------------------
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HttpError as e:
+                    await _respond(writer, e.status, {"error": e.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                try:
+                    handler, args = self._route(request)
+                    if handler == self.stream_events:
+                        await handler(request, *args, writer)
+                        return
+                    status, body = await handler(request, *args)
+                except HttpError as e:
+                    status, body = e.status, {"error": e.message}
+                except Exception as e:
+                    Logger.log(f"API request {request.path} failed: {str(e)}", level="error")
+                    status, body = 500, {"error": f"Internal error: {str(e)}"}
+                await _respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _route(self, request: Request) -> tuple[Callable, tuple]:
+        allowed = False
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path.rstrip("/") or "/")
+            if match is None:
+                continue
+            if method == request.method:
+                return handler, match.groups()
+            allowed = True
+        if allowed:
+            raise HttpError(405, f"{request.method} is not allowed on {request.path}.")
+        raise HttpError(404, f"No endpoint {request.path}.")
+
+
+def normalize_repository_url(url: str) -> str:
+    """Returns ``https://github.com/<owner>/<repo>`` for any URL of a repository, so that
+    submissions of the same repository coalesce."""
+    owner, repo = re.search(r"github\.com/([^/\s]+)/([^/\s#?]+)", url).groups()
+    return f"https://github.com/{owner}/{repo.removesuffix('.git')}"
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Request | None:
+    """Reads one HTTP/1.1 request; returns ``None`` if the client closed the connection."""
+    line = await _read_line(reader)
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError as e:
+        raise HttpError(400, "Malformed request line.") from e
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await _read_line(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(400, "Too many headers.")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HttpError(400, "Malformed Content-Length header.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Bodies are limited to {MAX_BODY_BYTES} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path, query, headers, body)
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError) as e:
+        # readline reports a line longer than the stream's limit (64 KiB) as a ValueError.
+        raise HttpError(400, "Request line or header too long.") from e
+
+
+async def _respond(
+    writer: asyncio.StreamWriter, status: int, body: dict | list | str, keep_alive: bool
+) -> None:
+    if isinstance(body, str):
+        content, content_type = body.encode("utf-8"), "text/markdown; charset=utf-8"
+    else:
+        content, content_type = json.dumps(body).encode("utf-8"), "application/json"
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Internal Server Error')}\r\n"
+        f"Content-Type: {content_type}\r\nContent-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        + content
+    )
+    await writer.drain()
+
+
+def _sse(event: str, data: dict, event_id: int | None = None) -> bytes:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    server = ApiServer()
+    port = await server.start(host, port)
+    print(
+        f"PaperProbe API listening on http://{host}:{port}, running up to "
+        f"{server.max_concurrent} jobs at once."
+    )
+    await server.serve_forever()
+
+
+@dataclass
+class LoadTestResult:
+    clients: int
+    submissions: int
+    jobs_run: int
+    submit_p50_ms: float
+    submit_p99_ms: float
+    completion_p50_seconds: float
+    events_per_stream: float
+    polls_per_second: float
+    poll_p50_ms: float
+    poll_p99_ms: float
+
+
+async def load_benchmark(
+    clients: int = 50,
+    polls_per_client: int = 200,
+    repositories: int = 5,
+    job_seconds: float = 1.0,
+    events_per_job: int = 20,
+) -> LoadTestResult:
+    """Load-tests the API on localhost with stand-in jobs, offline.
+
+    Every client submits an analysis of one of ``repositories`` repositories, so that
+    submissions of the same repository coalesce, and follows it with an event stream until
+    it finishes; each stand-in job logs ``events_per_job`` events over ``job_seconds``.
+    Then every client polls a job's status ``polls_per_client`` times over a keep-alive
+    connection. Clients and server share one event loop, so the figures are a lower bound
+    on what the server alone sustains.
+    """
+
+    async def stand_in_job(kind: str, payload: dict, on_section=None) -> dict:
+        Logger.stage("Analysing")
+        for i in range(events_per_job):
+            Logger.log(f"[Tool Call]: step {i}" if i % 2 else f"Step {i}")
+            await asyncio.sleep(job_seconds / events_per_job)
+        on_section(f"## Stand-in section for {payload['url']}")
+        return {"analysis_id": 0, "filename": ""}
+
+    server = ApiServer(stand_in_job, max_concurrent=MAX_CONCURRENT_JOBS)
+    port = await server.start(DEFAULT_HOST, 0)
+
+    async def submit_and_follow(i: int) -> tuple[float, float, int, int]:
+        reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+        started = time.perf_counter()
+        body = {"url": f"https://github.com/benchmark/repo-{i % repositories}"}
+        _, content = await _client_request(reader, writer, "POST", "/analyze", body)
+        submitted = time.perf_counter()
+        job_id = json.loads(content)["id"]
+        writer.write(f"GET /jobs/{job_id}/events HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        events = 0
+        while line := await reader.readline():
+            if line.startswith(b"event: "):
+                events += 1
+                if line.strip() == b"event: done":
+                    break
+        writer.close()
+        return submitted - started, time.perf_counter() - started, events, job_id
+
+    async def poll(job_id: int) -> list[float]:
+        reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+        latencies = []
+        for _ in range(polls_per_client):
+            started = time.perf_counter()
+            await _client_request(reader, writer, "GET", f"/jobs/{job_id}")
+            latencies.append(time.perf_counter() - started)
+        writer.close()
+        return latencies
+
+    try:
+        follows = await asyncio.gather(*(submit_and_follow(i) for i in range(clients)))
+        started = time.perf_counter()
+        polls = await asyncio.gather(*(poll(follow[3]) for follow in follows))
+        poll_seconds = time.perf_counter() - started
+    finally:
+        await server.close()
+
+    submit_ms = [follow[0] * 1000 for follow in follows]
+    poll_ms = [latency * 1000 for latencies in polls for latency in latencies]
+    return LoadTestResult(
+        clients=clients,
+        submissions=clients,
+        jobs_run=len(server.jobs),
+        submit_p50_ms=statistics.median(submit_ms),
+        submit_p99_ms=_percentile(submit_ms, 99),
+        completion_p50_seconds=statistics.median(follow[1] for follow in follows),
+        events_per_stream=statistics.mean(follow[2] for follow in follows),
+        polls_per_second=len(poll_ms) / poll_seconds,
+        poll_p50_ms=statistics.median(poll_ms),
+        poll_p99_ms=_percentile(poll_ms, 99),
+    )
+
+
+async def _client_request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    path: str,
+    body: dict | None = None,
+) -> tuple[int, bytes]:
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, len(ordered) * percent // 100)]
@@ -0,0 +1,157 @@
+import os
+import shutil
+import subprocess
+import sys
+import venv
+
+from src.core.paths import get_cache_dir
+
+from .wheelhouse import Wheelhouse, is_offline
+
+
+def venv_executable(venv_path: str, name: str) -> str:
+    """Returns the path of an executable (e.g. ``python`` or ``pip``) inside a virtual environment."""
+    if sys.platform == "win32":
+        return os.path.join(venv_path, "Scripts", f"{name}.exe")
+    return os.path.join(venv_path, "bin", name)
+
+
+def _index_options(wheel_dir: str, offline: bool) -> list[str]:
+    return ["--find-links", wheel_dir, *(["--no-index"] if offline else [])]
+
+
+class PipBackend:
+    """Creates environments with the stdlib ``venv`` module and installs packages with pip.
+
+    Args:
+        wheel_dir (str | None): Local wheelhouse passed as ``--find-links`` to installs.
+        offline (bool): Install only from the wheelhouse (``--no-index``).
+    """
+
+    name = "pip"
+
+    def __init__(self, wheel_dir: str | None = None, offline: bool = False):
+        self.wheel_dir = wheel_dir or get_cache_dir("wheels")
+        self.offline = offline
+        self.supports_prefetch = not offline
+
+    def create(self, venv_path: str) -> None:
+        venv.create(venv_path, with_pip=True)
+
+    def install(self, venv_path: str, packages: list[str], cwd: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                venv_executable(venv_path, "pip"),
+                "install",
+                "--cache-dir",
+                get_cache_dir("pip"),
+                *_index_options(self.wheel_dir, self.offline),
+                *packages,
+            ],
+            cwd=cwd,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+    def download(
+        self, venv_path: str, packages: list[str], dest: str, cwd: str
+    ) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                venv_executable(venv_path, "pip"),
+                "download",
+                "--cache-dir",
+                get_cache_dir("pip"),
+                "--find-links",
+                dest,
+                "--dest",
+                dest,
+                *packages,
+            ],
+            cwd=cwd,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+
+class UvBackend:
+    """Creates environments with ``uv venv`` and installs packages with ``uv pip``.
+
+    uv resolves and downloads in parallel and links packages out of its global cache
+    (hardlinks where the filesystem allows), so environments sharing packages are
+    cheap to build. Environments are created without pip; all installs go through uv.
+
+    Args:
+        uv_executable (str): Path of the ``uv`` executable.
+        wheel_dir (str | None): Local wheelhouse passed as ``--find-links`` to installs.
+        offline (bool): Install only from the wheelhouse (``--no-index``).
+    """
+
+    name = "uv"
+    supports_prefetch = False
+
+    def __init__(
+        self, uv_executable: str = "uv", wheel_dir: str | None = None, offline: bool = False
+    ):
+        self.uv_executable = uv_executable
+        self.wheel_dir = wheel_dir or get_cache_dir("wheels")
+        self.offline = offline
+
+    def create(self, venv_path: str) -> None:
+        if os.path.exists(os.path.join(venv_path, "pyvenv.cfg")):
+            return
+        subprocess.run(
+            [self.uv_executable, "venv", "--python", sys.executable, venv_path],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    def install(self, venv_path: str, packages: list[str], cwd: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                self.uv_executable,
+                "pip",
+                "install",
+                "--python",
+                venv_executable(venv_path, "python"),
+                "--cache-dir",
+                get_cache_dir("uv"),
+                "--link-mode",
+                "hardlink",
+                *_index_options(self.wheel_dir, self.offline),
+                *packages,
+            ],
+            cwd=cwd,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+    def freeze(self, venv_path: str) -> list[str]:
+        """Returns the environment's installed packages as ``name==version`` requirements."""
+        result = subprocess.run(
+            [self.uv_executable, "pip", "freeze", "--python", venv_executable(venv_path, "python")],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return []
+        return [line.strip() for line in result.stdout.splitlines() if "==" in line]
+
+
+def get_backend() -> PipBackend | UvBackend:
+    """Returns the uv backend when ``uv`` is on the PATH, and the pip backend otherwise.
+
+    ``PAPERPROBE_VENV_BACKEND=pip`` (or ``uv``) forces a backend. Both install from the
+    local wheelhouse first, and only from it when ``PAPERPROBE_OFFLINE=1``.
+    """
+    requested = os.getenv("PAPERPROBE_VENV_BACKEND", "").lower()
+    uv_executable = shutil.which("uv")
+    wheel_dir = Wheelhouse().root
+    if requested == "pip" or uv_executable is None:
+        return PipBackend(wheel_dir=wheel_dir, offline=is_offline())
+    return UvBackend(uv_executable, wheel_dir=wheel_dir, offline=is_offline())
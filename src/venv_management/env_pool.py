@@ -0,0 +1,242 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+from src.core.Logger import Logger
+from src.core.paths import directory_size, get_cache_dir, pid_alive
+
+from .backends import PipBackend, UvBackend, venv_executable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_QUOTA_BYTES = int(float(os.getenv("PAPERPROBE_ENV_POOL_QUOTA_GB", "20")) * 1024**3)
+OVERLAY_PTH_NAME = "_paperprobe_env_pool.pth"
+
+
+class EnvironmentPool:
+    """Shared pool of fully installed virtual environments, outside any clone.
+
+    Environments are keyed by a hash of the normalized requirement set, the
+    interpreter and the installer backend, so any analysis whose resolved
+    dependencies match an earlier one reuses that environment instead of
+    installing again. Analyses never modify pooled environments: each gets a
+    lightweight venv in its clone whose site-packages links to the pooled one
+    through a ``.pth`` file, so packages installed later (e.g. by the agent) stay
+    local to the clone and shadow the pooled ones.
+
+    An environment some requirements could not be installed into is stored under the
+    key of the requirements it does hold, so a later checkout of the full set retries
+    the missing ones, e.g. after a transient network failure or a ``Wheelhouse.sync``.
+
+    Checked-out environments are leased; least recently used environments
+    without live leases are evicted once the pool exceeds its disk quota. Builds
+    and catalog updates are serialized across processes with file locks.
+    """
+
+    def __init__(
+        self,
+        backend: PipBackend | UvBackend,
+        root: str | None = None,
+        quota_bytes: int = DEFAULT_QUOTA_BYTES,
+    ):
+        self.backend = backend
+        self.root = root or get_cache_dir("env_pool")
+        self.quota_bytes = quota_bytes
+        os.makedirs(os.path.join(self.root, "envs"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "leases"), exist_ok=True)
+
+    def key_for(self, requirements: list[str]) -> str:
+        normalized = sorted({r.strip().lower().replace("_", "-") for r in requirements})
+        payload = json.dumps(
+            {
+                "requirements": normalized,
+                "python": sys.version,
+                "interpreter": os.path.realpath(sys.executable),
+                "backend": self.backend.name,
+                # Offline builds may lack packages the wheelhouse does not have.
+                "offline": self.backend.offline,
+            }
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def checkout(self, requirements: list[str], build) -> tuple[str, str]:
+        """Returns a pooled environment for ``requirements``, building it on a miss.
+
+        Args:
+            requirements (list[str]): The resolved requirement specifiers.
+            build: Callable taking the path of a new, empty environment directory,
+                installing ``requirements`` into it and returning the requirements it
+                could not install.
+
+        Returns:
+            tuple[str, str]: The pooled environment's path and the lease to pass to
+            :meth:`release` once the environment is no longer used.
+        """
+        key = self.key_for(requirements)
+        env_path = os.path.join(self.root, "envs", key)
+        lease = self._acquire_lease(key)
+
+        size = None
+        try:
+            # Lock order is always catalog before environment, so the catalog is updated
+            # only after the environment lock is released.
+            with self._locked(f"{key}.lock"):
+                if not os.path.exists(os.path.join(env_path, ".complete")):
+                    Logger.log("No pooled environment matches these requirements. Building one...")
+                    shutil.rmtree(env_path, ignore_errors=True)
+                    try:
+                        dropped = build(env_path)
+                    except BaseException:
+                        shutil.rmtree(env_path, ignore_errors=True)
+                        raise
+                    if dropped:
+                        installed = [r for r in requirements if r not in dropped]
+                        key, env_path, lease = self._store_partial(env_path, lease, installed)
+                    else:
+                        open(os.path.join(env_path, ".complete"), "w").close()
+                    size = directory_size(env_path)
+                else:
+                    Logger.log("Reusing pooled environment with identical requirements.")
+        except BaseException:
+            self.release(lease)
+            raise
+        self._update_catalog(key, size=size)
+
+        self.evict()
+        return env_path, lease
+
+    def release(self, lease: str) -> None:
+        with contextlib.suppress(OSError):
+            os.remove(lease)
+
+    def overlay(self, pooled_env: str, target_venv: str) -> None:
+        """Creates a lightweight venv at ``target_venv`` that sees the pooled packages."""
+        self.backend.create(target_venv)
+        pooled_site = _site_packages(pooled_env)
+        target_site = _site_packages(target_venv)
+        # addsitedir (rather than a plain path entry) also processes the pooled
+        # environment's own .pth files, e.g. those of editable installs.
+        with open(os.path.join(target_site, OVERLAY_PTH_NAME), "w", encoding="utf-8") as f:
+            f.write(f"import site; site.addsitedir({pooled_site!r})\n")
+
+    def evict(self) -> int:
+        """Removes least recently used, unleased environments until the pool fits its quota.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        reclaimed = 0
+        with self._locked("catalog.lock"):
+            catalog = self._read_catalog()
+            total = sum(entry["size"] for entry in catalog.values())
+            for key, entry in sorted(catalog.items(), key=lambda item: item[1]["last_used"]):
+                if total - reclaimed <= self.quota_bytes:
+                    break
+                if self._has_live_lease(key):
+                    continue
+                with self._locked(f"{key}.lock"):
+                    shutil.rmtree(os.path.join(self.root, "envs", key), ignore_errors=True)
+                del catalog[key]
+                reclaimed += entry["size"]
+            self._write_catalog(catalog)
+        if reclaimed:
+            Logger.log(f"Evicted pooled environments, reclaiming {reclaimed / 1024**2:.0f} MB.")
+        return reclaimed
+
+    def _store_partial(
+        self, env_path: str, lease: str, installed: list[str]
+    ) -> tuple[str, str, str]:
+        """Moves an environment holding only ``installed`` to the key of that set, or
+        drops it if the pool already has a complete one there.
+
+        Returns:
+            tuple[str, str, str]: The key, path and lease of the environment to use.
+        """
+        key = self.key_for(installed)
+        partial_path = os.path.join(self.root, "envs", key)
+        partial_lease = self._acquire_lease(key)
+        self.release(lease)
+        with self._locked(f"{key}.lock"):
+            if os.path.exists(os.path.join(partial_path, ".complete")):
+                shutil.rmtree(env_path, ignore_errors=True)
+            else:
+                shutil.rmtree(partial_path, ignore_errors=True)
+                os.replace(env_path, partial_path)
+                open(os.path.join(partial_path, ".complete"), "w").close()
+        return key, partial_path, partial_lease
+
+    def _acquire_lease(self, key: str) -> str:
+        lease_dir = os.path.join(self.root, "leases", key)
+        os.makedirs(lease_dir, exist_ok=True)
+        lease = os.path.join(lease_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+        open(lease, "w").close()
+        return lease
+
+    def _has_live_lease(self, key: str) -> bool:
+        lease_dir = os.path.join(self.root, "leases", key)
+        if not os.path.isdir(lease_dir):
+            return False
+        for name in os.listdir(lease_dir):
+            pid = int(name.split("-", 1)[0]) if name.split("-", 1)[0].isdigit() else -1
+            if pid_alive(pid):
+                return True
+            # The process holding this lease has exited without releasing it.
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(lease_dir, name))
+        return False
+
+    def _update_catalog(self, key: str, size: int | None = None) -> None:
+        with self._locked("catalog.lock"):
+            catalog = self._read_catalog()
+            entry = catalog.setdefault(key, {"size": 0})
+            if size is not None:
+                entry["size"] = size
+            entry["last_used"] = time.time()
+            self._write_catalog(catalog)
+
+    def _read_catalog(self) -> dict:
+        try:
+            with open(os.path.join(self.root, "catalog.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_catalog(self, catalog: dict) -> None:
+        path = os.path.join(self.root, "catalog.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        os.replace(f"{path}.tmp", path)
+
+    @contextlib.contextmanager
+    def _locked(self, name: str):
+        with open(os.path.join(self.root, name), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _site_packages(venv_path: str) -> str:
+    result = subprocess.run(
+        [
+            venv_executable(venv_path, "python"),
+            "-c",
+            "import sysconfig; print(sysconfig.get_paths()['purelib'])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
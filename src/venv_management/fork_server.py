@@ -0,0 +1,156 @@
+"""Fork server run by a repository's virtual-environment interpreter.
+
+Started as ``python fork_server.py <repo_dir> [module ...]``, it imports the given
+modules once, then reads JSON requests from stdin, one per line:
+
+    {"script": "/path/to/script.py", "stdout": "/path/out", "stderr": "/path/err",
+     "limits": {"wall_seconds": 120, "cpu_seconds": 120, "memory_bytes": null}}
+
+For each request it forks a child that starts a new session, applies the CPU and
+memory rlimits that are set, redirects its output to the given files and runs the script as
+``__main__``. The parent kills the child's process group if it exceeds the wall
+limit, and answers with ``{"returncode", "timed_out", "cpu_seconds",
+"max_rss_bytes"}`` on stdout. Children start with every pre-imported module
+already loaded but cannot affect the server or each other.
+
+This file runs inside the analysed repository's environment, so it must only use
+the standard library and must not import anything from PaperProbe.
+"""
+
+import importlib
+import json
+import os
+import resource
+import runpy
+import signal
+import sys
+import time
+import traceback
+
+
+def _apply_limits(limits: dict) -> None:
+    for limit, key in (
+        (resource.RLIMIT_CPU, "cpu_seconds"),
+        (resource.RLIMIT_AS, "memory_bytes"),
+    ):
+        if not limits.get(key):
+            continue
+        try:
+            _, hard = resource.getrlimit(limit)
+            value = int(limits[key])
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, hard))
+        except (ValueError, OSError):
+            continue
+
+
+def _kill_group(pgid: int) -> None:
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _wait(pid: int, wall_seconds: float | None) -> dict:
+    deadline = time.monotonic() + wall_seconds if wall_seconds else None
+    timed_out = False
+    while True:
+        waited, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            timed_out = True
+            _kill_group(pid)
+            _, status, rusage = os.wait4(pid, 0)
+            break
+        time.sleep(0.02)
+    # Reap anything the script left running in the background.
+    _kill_group(pid)
+    return {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "timed_out": timed_out,
+        "cpu_seconds": rusage.ru_utime + rusage.ru_stime,
+        "max_rss_bytes": rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+    }
+
+
+def _run_child(request: dict, protocol_fd: int) -> None:
+    os.setsid()
+    # The script must not be able to write to, or hold open, the server's protocol stream.
+    os.close(protocol_fd)
+    _apply_limits(request.get("limits", {}))
+    stdin_fd = os.open(os.devnull, os.O_RDONLY)
+    stdout_fd = os.open(request["stdout"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    stderr_fd = os.open(request["stderr"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.dup2(stdin_fd, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+
+    script = request["script"]
+    sys.argv = [script]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Hide the server and runpy frames so the traceback matches a plain ``python script.py``.
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+def main() -> None:
+    repo_dir = sys.argv[1]
+    os.chdir(repo_dir)
+    sys.path.insert(0, repo_dir)
+
+    # Only the server writes to the protocol stream, a duplicate of the original stdout.
+    # Anything else written to stdout (modules printing while they are imported, C
+    # extensions or subprocesses writing to fd 1) goes to stderr instead.
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+
+    imported = []
+    for module in sys.argv[2:]:
+        try:
+            importlib.import_module(module)
+            imported.append(module)
+        except BaseException:
+            continue
+
+    protocol.write(json.dumps({"ready": True, "imported": imported}) + "\n")
+    protocol.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request, protocol.fileno())
+        response = _wait(pid, request.get("limits", {}).get("wall_seconds"))
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
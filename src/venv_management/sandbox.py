@@ -0,0 +1,219 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+POLL_INTERVAL_SECONDS = 0.05
+
+
+@dataclass
+class ExecutionLimits:
+    wall_seconds: float = 120.0
+    cpu_seconds: int = 120
+    # Address-space limit, off by default: torch, JAX and OpenBLAS reserve far more virtual
+    # memory than they use, and fail to import under any limit near the machine's RAM.
+    memory_bytes: int | None = None
+    max_output_bytes: int = 32 * 1024
+
+    @classmethod
+    def from_env(cls) -> "ExecutionLimits":
+        """Builds limits from ``PAPERPROBE_SCRIPT_TIMEOUT`` (seconds, wall and CPU),
+        ``PAPERPROBE_SCRIPT_MEMORY_MB`` (address space; ``0`` for no limit) and
+        ``PAPERPROBE_SCRIPT_OUTPUT_KB``."""
+        limits = cls()
+        if os.getenv("PAPERPROBE_SCRIPT_TIMEOUT"):
+            limits.wall_seconds = float(os.environ["PAPERPROBE_SCRIPT_TIMEOUT"])
+            limits.cpu_seconds = max(1, int(limits.wall_seconds))
+        if os.getenv("PAPERPROBE_SCRIPT_MEMORY_MB"):
+            limits.memory_bytes = int(os.environ["PAPERPROBE_SCRIPT_MEMORY_MB"]) * 1024**2 or None
+        if os.getenv("PAPERPROBE_SCRIPT_OUTPUT_KB"):
+            limits.max_output_bytes = int(os.environ["PAPERPROBE_SCRIPT_OUTPUT_KB"]) * 1024
+        return limits
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+@dataclass
+class ExecutionResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_seconds: float
+    cpu_seconds: float | None = None
+    max_rss_bytes: int | None = None
+    timed_out: bool = False
+
+    def stats_line(self) -> str:
+        parts = [f"exit code {self.returncode}", f"{self.wall_seconds:.2f}s wall"]
+        if self.cpu_seconds is not None:
+            parts.append(f"{self.cpu_seconds:.2f}s CPU")
+        if self.max_rss_bytes:
+            parts.append(f"peak memory {self.max_rss_bytes / 1024**2:.0f} MB")
+        if self.timed_out:
+            parts.append("timed out")
+        return f"[{', '.join(parts)}]"
+
+
+class HeadTailBuffer:
+    """Keeps the first and last ``limit / 2`` bytes of a stream and counts what is dropped."""
+
+    def __init__(self, limit: int):
+        self.half = max(1, limit // 2)
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def write(self, data: bytes) -> None:
+        room = self.half - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail += data
+        overflow = len(self.tail) - self.half
+        if overflow > 0:
+            self.dropped += overflow
+            del self.tail[:overflow]
+
+    def getvalue(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if self.dropped:
+            return f"{head}\n... [{self.dropped} bytes of output truncated] ...\n{tail}"
+        return head + tail
+
+
+def read_head_tail(path: str, limit: int) -> str:
+    """Reads a file the way :class:`HeadTailBuffer` would have captured it, without loading it all."""
+    buffer = HeadTailBuffer(limit)
+    with open(path, "rb") as f:
+        buffer.write(f.read(buffer.half))
+        size = os.fstat(f.fileno()).st_size
+        remaining = size - len(buffer.head)
+        if remaining > buffer.half:
+            buffer.dropped = remaining - buffer.half
+            f.seek(size - buffer.half)
+        buffer.tail += f.read()
+    return buffer.getvalue()
+
+
+def apply_limits(pid: int, limits: ExecutionLimits) -> None:
+    """Applies the CPU and address-space rlimits to a running process (Linux only)."""
+    if not hasattr(resource, "prlimit"):
+        return
+    for limit, value in (
+        (resource.RLIMIT_CPU, limits.cpu_seconds),
+        (resource.RLIMIT_AS, limits.memory_bytes),
+    ):
+        if not value:
+            continue
+        try:
+            _, hard = resource.prlimit(pid, limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.prlimit(pid, limit, (value, hard))
+        except (ValueError, OSError):
+            continue
+
+
+def run_limited(cmd: list[str], cwd: str, limits: ExecutionLimits) -> ExecutionResult:
+    """Runs a command with wall-clock, CPU and memory limits and bounded output capture.
+
+    The command runs in its own process group (session) so that on timeout it is
+    killed together with any children it spawned. Output is streamed into
+    head/tail buffers, so a chatty process cannot exhaust memory and the start and
+    end of its output (where errors usually are) are kept.
+
+    The rlimits are applied with ``prlimit`` once the process has started, rather than in a
+    ``preexec_fn``, which is unsafe when the caller runs threads (as the agent's tools do).
+    Where ``prlimit`` is unavailable only the wall-clock limit applies.
+    """
+    posix = resource is not None and hasattr(os, "wait4")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=posix,
+    )
+    if posix:
+        apply_limits(process.pid, limits)
+
+    buffers = {}
+    readers = []
+    for name, stream in (("stdout", process.stdout), ("stderr", process.stderr)):
+        buffers[name] = HeadTailBuffer(limits.max_output_bytes)
+        reader = threading.Thread(target=_drain, args=(stream, buffers[name]), daemon=True)
+        reader.start()
+        readers.append(reader)
+
+    timed_out = False
+    rusage = None
+    deadline = started + limits.wall_seconds
+    if posix:
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                break
+            if time.perf_counter() >= deadline:
+                timed_out = True
+                _kill_group(process.pid)
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                break
+            time.sleep(POLL_INTERVAL_SECONDS)
+        # Reap anything the script left running in the background.
+        _kill_group(process.pid)
+    else:
+        try:
+            process.wait(timeout=limits.wall_seconds)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            process.kill()
+            process.wait()
+
+    for reader in readers:
+        reader.join(timeout=1)
+
+    result = ExecutionResult(
+        returncode=process.returncode,
+        stdout=buffers["stdout"].getvalue(),
+        stderr=buffers["stderr"].getvalue(),
+        wall_seconds=time.perf_counter() - started,
+        timed_out=timed_out,
+    )
+    if rusage is not None:
+        result.cpu_seconds = rusage.ru_utime + rusage.ru_stime
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        result.max_rss_bytes = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return result
+
+
+def _drain(stream, buffer: HeadTailBuffer) -> None:
+    for chunk in iter(lambda: stream.read1(65536), b""):
+        buffer.write(chunk)
+    stream.close()
+
+
+def _kill_group(pgid: int) -> None:
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
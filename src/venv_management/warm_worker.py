@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from .sandbox import ExecutionLimits, ExecutionResult, read_head_tail
+
+FORK_SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fork_server.py")
+EXCLUDED_PACKAGES = {"test", "tests", "docs", "doc", "examples", "example", "benchmarks", "scripts"}
+
+
+def is_supported() -> bool:
+    return hasattr(os, "fork")
+
+
+def find_top_level_packages(base_dir: str) -> list[str]:
+    """Returns the importable top-level packages of a repository (flat or ``src/`` layout)."""
+    packages = []
+    for root in (base_dir, os.path.join(base_dir, "src")):
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            if (
+                name.isidentifier()
+                and name not in EXCLUDED_PACKAGES
+                and os.path.isfile(os.path.join(root, name, "__init__.py"))
+            ):
+                packages.append(name)
+    return packages
+
+
+class WarmWorker:
+    """Persistent fork server inside a virtual environment for running scripts quickly.
+
+    The server process imports the repository's packages (and, transitively, heavy
+    dependencies such as numpy or torch) once; every script then runs in a freshly
+    forked child, so each run skips interpreter startup and those imports while
+    remaining isolated from the others. POSIX only.
+    """
+
+    def __init__(self, python_executable: str, base_dir: str, preload: list[str]):
+        self.python_executable = python_executable
+        self.base_dir = base_dir
+        self.preload = preload
+        self.imported: list[str] = []
+        self._process = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self._process = subprocess.Popen(
+            [self.python_executable, FORK_SERVER_PATH, self.base_dir, *self.preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.base_dir,
+            text=True,
+        )
+        ready = self._read_message()
+        self.imported = ready.get("imported", [])
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, script_file: str, limits: ExecutionLimits) -> ExecutionResult:
+        """Runs a script in a forked child under ``limits`` and returns its result.
+
+        Raises:
+            RuntimeError: If the worker is not running or dies during the request.
+        """
+        with self._lock:
+            if not self.is_alive():
+                raise RuntimeError("warm worker is not running")
+            with (
+                tempfile.NamedTemporaryFile(suffix=".out", delete=False) as out,
+                tempfile.NamedTemporaryFile(suffix=".err", delete=False) as err,
+            ):
+                stdout_path, stderr_path = out.name, err.name
+            started = time.perf_counter()
+            try:
+                request = {
+                    "script": script_file,
+                    "stdout": stdout_path,
+                    "stderr": stderr_path,
+                    "limits": limits.to_dict(),
+                }
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                response = self._read_message()
+                stdout = read_head_tail(stdout_path, limits.max_output_bytes)
+                stderr = read_head_tail(stderr_path, limits.max_output_bytes)
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"warm worker failed: {str(e)}") from e
+            finally:
+                os.remove(stdout_path)
+                os.remove(stderr_path)
+        return ExecutionResult(
+            returncode=response["returncode"],
+            stdout=stdout,
+            stderr=stderr,
+            wall_seconds=time.perf_counter() - started,
+            cpu_seconds=response.get("cpu_seconds"),
+            max_rss_bytes=response.get("max_rss_bytes"),
+            timed_out=response.get("timed_out", False),
+        )
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
+
+    def _read_message(self) -> dict:
+        line = self._process.stdout.readline()
+        if not line:
+            raise RuntimeError("warm worker exited unexpectedly")
+        return json.loads(line)
@@ -0,0 +1,242 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import time
+import zipfile
+
+from src.core.Logger import Logger
+from src.core.paths import get_cache_dir
+
+MANIFEST_NAME = "manifest.json"
+MISSES_NAME = "misses.jsonl"
+ARCHIVE_SUFFIXES = (".whl", ".tar.gz", ".zip")
+
+
+def is_offline() -> bool:
+    """Returns whether package installs must not reach a package index (``PAPERPROBE_OFFLINE=1``)."""
+    return os.getenv("PAPERPROBE_OFFLINE", "") == "1"
+
+
+class Wheelhouse:
+    """Local directory of wheels and sdists that installs resolve from before any index.
+
+    Every install passes the wheelhouse as ``--find-links``; in offline mode installs
+    also pass ``--no-index`` so the wheelhouse is the only source. It is populated by
+    the pip backend's wheel prefetch, by :meth:`add_installed` after uv installs, and by
+    :meth:`sync`, which downloads the requirements that offline installs could not
+    satisfy (recorded by :meth:`record_misses`) on a machine with index access.
+
+    A manifest stores the SHA-256 of each archive. :meth:`verify` rehashes archives
+    whose size or modification time changed, checks the integrity of new ones before
+    adding them, and deletes any that are corrupt or truncated so they cannot break an
+    install.
+
+    The location is ``$PAPERPROBE_WHEELHOUSE`` if set, otherwise ``wheels`` in the
+    cache directory, so a prepopulated wheelhouse can be shipped to air-gapped
+    machines.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root or os.getenv("PAPERPROBE_WHEELHOUSE") or get_cache_dir("wheels")
+        os.makedirs(self.root, exist_ok=True)
+
+    def archives(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.root) if name.endswith(ARCHIVE_SUFFIXES))
+
+    def missing(self, pinned: list[str]) -> list[str]:
+        """Returns the ``name==version`` requirements that no archive in the wheelhouse
+        provides. Other requirements are ignored."""
+        available = {_archive_key(name) for name in self.archives()}
+        missing = []
+        for requirement in pinned:
+            name, separator, version = requirement.partition("==")
+            if separator and (_normalize(name), version.strip()) not in available:
+                missing.append(requirement)
+        return missing
+
+    def add_installed(self, pinned: list[str]) -> list[str]:
+        """Downloads the archives of installed ``name==version`` requirements that the
+        wheelhouse lacks, e.g. after a uv install, whose downloads stay in uv's own cache.
+        Needs index access.
+
+        Returns:
+            list[str]: The requirements whose archives were added.
+        """
+        missing = self.missing(pinned)
+        if not missing:
+            return []
+        # One at a time: a single failing pin (e.g. a local package) must not stop the rest.
+        for requirement in missing:
+            self.download([requirement])
+        self.verify()
+        still_missing = self.missing(missing)
+        return [requirement for requirement in missing if requirement not in still_missing]
+
+    def verify(self) -> list[str]:
+        """Checks every archive against the manifest and registers new ones.
+
+        Returns:
+            list[str]: The names of the archives that were corrupt and have been removed.
+        """
+        manifest = self._read_manifest()
+        removed = []
+        updated = {}
+        for name in self.archives():
+            path = os.path.join(self.root, name)
+            stat = os.stat(path)
+            entry = manifest.get(name)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                updated[name] = entry
+                continue
+            digest = _sha256(path)
+            valid = entry["sha256"] == digest if entry else _is_intact(path)
+            if not valid:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+                removed.append(name)
+                continue
+            updated[name] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if updated != manifest:
+            self._write_manifest(updated)
+        if removed:
+            Logger.log(f"Removed corrupt archives from the wheelhouse: {', '.join(removed)}")
+        return removed
+
+    def record_misses(self, requirements: list[str]) -> None:
+        """Records requirements that could not be installed from the wheelhouse."""
+        if not requirements:
+            return
+        with open(os.path.join(self.root, MISSES_NAME), "a", encoding="utf-8") as f:
+            for requirement in requirements:
+                f.write(json.dumps({"requirement": requirement, "time": time.time()}) + "\n")
+
+    def pending_misses(self) -> list[str]:
+        """Returns the distinct requirements recorded as misses, in first-seen order."""
+        try:
+            with open(os.path.join(self.root, MISSES_NAME), encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        misses = []
+        for line in lines:
+            with contextlib.suppress(ValueError, KeyError):
+                requirement = json.loads(line)["requirement"]
+                if requirement not in misses:
+                    misses.append(requirement)
+        return misses
+
+    def download(self, requirements: list[str]) -> subprocess.CompletedProcess:
+        """Downloads ``requirements`` and their dependencies into the wheelhouse.
+
+        Uses pip of the interpreter running PaperProbe, which is also the interpreter
+        analysed repositories' environments are created from, so the downloaded
+        archives match the platform and Python version they are installed into.
+        """
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "download",
+                "--cache-dir",
+                get_cache_dir("pip"),
+                "--find-links",
+                self.root,
+                "--dest",
+                self.root,
+                *requirements,
+            ],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+    def sync(self) -> list[str]:
+        """Downloads every recorded miss, then verifies the wheelhouse. Needs index access.
+
+        Returns:
+            list[str]: The requirements that still could not be downloaded; they stay
+            recorded as misses.
+        """
+        failed = [
+            requirement
+            for requirement in self.pending_misses()
+            if self.download([requirement]).returncode != 0
+        ]
+        self.verify()
+        misses_path = os.path.join(self.root, MISSES_NAME)
+        with contextlib.suppress(OSError):
+            os.remove(misses_path)
+        self.record_misses(failed)
+        return failed
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.root, MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        path = os.path.join(self.root, MANIFEST_NAME)
+        with open(f"{path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).strip().lower()
+
+
+def _archive_key(filename: str) -> tuple[str, str]:
+    """Returns the normalized project name and the version of a wheel or sdist file name."""
+    if filename.endswith(".whl"):
+        name, version = filename.split("-")[:2]
+    else:
+        stem = filename.removesuffix(".tar.gz").removesuffix(".zip")
+        name, _, version = stem.rpartition("-")
+    return _normalize(name), version
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_intact(path: str) -> bool:
+    """Checks that an archive is complete and every member's checksum is valid."""
+    try:
+        if path.endswith(".tar.gz"):
+            with tarfile.open(path, "r:gz") as archive:
+                for member in archive:
+                    if member.isfile():
+                        archive.extractfile(member).read()
+            return True
+        with zipfile.ZipFile(path) as archive:
+            return archive.testzip() is None
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile):
+        return False
+
+
+if __name__ == "__main__":
+    # python -m src.venv_management.wheelhouse [verify | misses | sync]
+    wheelhouse = Wheelhouse()
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command == "sync":
+        still_missing = wheelhouse.sync()
+        print(
+            f"Still missing: {', '.join(still_missing)}" if still_missing else "All misses synced."
+        )
+    elif command == "misses":
+        print("\n".join(wheelhouse.pending_misses()))
+    else:
+        removed = wheelhouse.verify()
+        print(f"{len(wheelhouse.archives())} archives OK, {len(removed)} corrupt removed.")
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from src.venv_management.backends import PipBackend
+from src.venv_management.env_pool import EnvironmentPool
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("PAPERPROBE_CACHE_DIR", str(tmp_path / "cache"))
+    return EnvironmentPool(PipBackend(wheel_dir=str(tmp_path / "wheels")), root=str(tmp_path))
+
+
+def fake_build(builds: list, dropped: list[str] | None = None):
+    def build(env_path: str) -> list[str]:
+        builds.append(env_path)
+        os.makedirs(env_path)
+        with open(os.path.join(env_path, "installed.txt"), "w") as f:
+            f.write("x" * 100)
+        return list(dropped or [])
+
+    return build
+
+
+def leases(pool: EnvironmentPool) -> list[str]:
+    return [
+        name
+        for key in os.listdir(os.path.join(pool.root, "leases"))
+        for name in os.listdir(os.path.join(pool.root, "leases", key))
+    ]
+
+
+def test_complete_environments_are_reused(pool):
+    builds = []
+    first, lease = pool.checkout(["numpy", "torch"], fake_build(builds))
+    pool.release(lease)
+    second, _ = pool.checkout(["torch", "NumPy"], fake_build(builds))
+
+    assert first == second
+    assert len(builds) == 1
+
+
+def test_partial_environments_are_keyed_on_what_they_hold(pool):
+    builds = []
+    partial, lease = pool.checkout(["numpy", "broken"], fake_build(builds, ["broken"]))
+
+    assert os.path.basename(partial) == pool.key_for(["numpy"])
+    assert leases(pool) == [os.path.basename(lease)]
+    assert os.path.dirname(lease).endswith(pool.key_for(["numpy"]))
+
+    # The full set is built again, so the dropped package is retried.
+    retried, _ = pool.checkout(["numpy", "broken"], fake_build(builds))
+    assert retried != partial
+    assert len(builds) == 2
+
+    # The partial environment is complete for the requirements it holds.
+    reused, _ = pool.checkout(["numpy"], fake_build(builds))
+    assert reused == partial
+    assert len(builds) == 2
+
+
+def test_failed_builds_release_their_lease_and_directory(pool):
+    def build(env_path: str) -> list[str]:
+        os.makedirs(env_path)
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        pool.checkout(["numpy"], build)
+
+    assert leases(pool) == []
+    assert not os.path.exists(os.path.join(pool.root, "envs", pool.key_for(["numpy"])))
@@ -0,0 +1,170 @@
+import io
+import os
+import stat
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from src.venv_management.backends import PipBackend, UvBackend
+from src.venv_management.wheelhouse import MANIFEST_NAME, Wheelhouse
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PAPERPROBE_CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    return Wheelhouse(str(tmp_path / "wheels"))
+
+
+def make_wheel(wheelhouse: Wheelhouse, filename: str) -> str:
+    path = os.path.join(wheelhouse.root, filename)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("pkg/__init__.py", "VALUE = 1\n")
+    return path
+
+
+def make_sdist(wheelhouse: Wheelhouse, filename: str) -> str:
+    path = os.path.join(wheelhouse.root, filename)
+    data = b"print('setup')\n" * 1000
+    with tarfile.open(path, "w:gz") as archive:
+        info = tarfile.TarInfo("pkg/setup.py")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def test_verify_registers_intact_archives_and_removes_truncated_ones(wheelhouse):
+    make_wheel(wheelhouse, "good-1.0-py3-none-any.whl")
+    sdist = make_sdist(wheelhouse, "broken-2.0.tar.gz")
+    with open(sdist, "r+b") as f:
+        f.truncate(os.path.getsize(sdist) // 2)
+
+    assert wheelhouse.verify() == ["broken-2.0.tar.gz"]
+    assert wheelhouse.archives() == ["good-1.0-py3-none-any.whl"]
+    assert os.path.exists(os.path.join(wheelhouse.root, MANIFEST_NAME))
+
+
+def test_verify_removes_archives_changed_since_registered(wheelhouse):
+    path = make_wheel(wheelhouse, "good-1.0-py3-none-any.whl")
+    assert wheelhouse.verify() == []
+
+    with open(path, "ab") as f:
+        f.write(b"garbage")
+
+    assert wheelhouse.verify() == ["good-1.0-py3-none-any.whl"]
+    assert wheelhouse.archives() == []
+
+
+def test_misses_are_recorded_once_in_first_seen_order(wheelhouse):
+    wheelhouse.record_misses(["numpy", "torch==2.3"])
+    wheelhouse.record_misses(["numpy", "scipy"])
+
+    assert wheelhouse.pending_misses() == ["numpy", "torch==2.3", "scipy"]
+
+
+def test_sync_keeps_the_misses_that_still_fail(wheelhouse, monkeypatch):
+    wheelhouse.record_misses(["available", "unavailable"])
+
+    def download(requirements):
+        if requirements == ["available"]:
+            make_wheel(wheelhouse, "available-1.0-py3-none-any.whl")
+            return _completed(0)
+        return _completed(1)
+
+    monkeypatch.setattr(wheelhouse, "download", download)
+
+    assert wheelhouse.sync() == ["unavailable"]
+    assert wheelhouse.pending_misses() == ["unavailable"]
+    assert wheelhouse.archives() == ["available-1.0-py3-none-any.whl"]
+
+
+def test_missing_matches_normalized_names_and_versions(wheelhouse):
+    make_wheel(wheelhouse, "typing_extensions-4.12.2-py3-none-any.whl")
+    make_sdist(wheelhouse, "my-package-0.3.tar.gz")
+
+    pinned = [
+        "typing-extensions==4.12.2",
+        "My_Package==0.3",
+        "my-package==0.4",
+        "numpy==2.0.0",
+        "editable @ file:///src",
+    ]
+
+    assert wheelhouse.missing(pinned) == ["my-package==0.4", "numpy==2.0.0"]
+
+
+def test_add_installed_downloads_only_the_missing_archives(wheelhouse, monkeypatch):
+    make_wheel(wheelhouse, "present-1.0-py3-none-any.whl")
+    downloaded = []
+
+    def download(requirements):
+        downloaded.extend(requirements)
+        if requirements == ["absent==2.0"]:
+            make_wheel(wheelhouse, "absent-2.0-py3-none-any.whl")
+            return _completed(0)
+        return _completed(1)
+
+    monkeypatch.setattr(wheelhouse, "download", download)
+
+    added = wheelhouse.add_installed(["present==1.0", "absent==2.0", "local==0.1"])
+
+    assert downloaded == ["absent==2.0", "local==0.1"]
+    assert added == ["absent==2.0"]
+
+
+def test_pip_backend_installs_only_from_the_wheelhouse_offline(tmp_path, monkeypatch):
+    calls = _record_subprocess_runs(monkeypatch)
+
+    PipBackend(wheel_dir="/wheels", offline=True).install(str(tmp_path), ["numpy"], cwd=".")
+    PipBackend(wheel_dir="/wheels").install(str(tmp_path), ["numpy"], cwd=".")
+
+    offline, online = calls
+    assert offline[offline.index("--find-links") + 1] == "/wheels"
+    assert "--no-index" in offline
+    assert "--find-links" in online
+    assert "--no-index" not in online
+    assert not PipBackend(offline=True).supports_prefetch
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a shell script as a fake uv")
+def test_uv_backend_installs_offline_and_freezes_pins(tmp_path):
+    fake_uv = tmp_path / "uv"
+    log = tmp_path / "uv-args.txt"
+    fake_uv.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> "{log}"\n'
+        'if [ "$2" = "freeze" ]; then\n'
+        "  printf 'numpy==2.0.0\\n-e file:///repo\\nrequests==2.32.3\\n'\n"
+        "fi\n"
+    )
+    fake_uv.chmod(fake_uv.stat().st_mode | stat.S_IXUSR)
+    backend = UvBackend(str(fake_uv), wheel_dir="/wheels", offline=True)
+
+    assert backend.install(str(tmp_path), ["numpy"], cwd=str(tmp_path)).returncode == 0
+    assert backend.freeze(str(tmp_path)) == ["numpy==2.0.0", "requests==2.32.3"]
+
+    install_args = log.read_text().splitlines()[0].split()
+    assert install_args[:2] == ["pip", "install"]
+    assert "--no-index" in install_args
+    assert install_args[install_args.index("--find-links") + 1] == "/wheels"
+
+
+def _completed(returncode: int) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess([], returncode, "", "")
+
+
+def _record_subprocess_runs(monkeypatch) -> list[list[str]]:
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(list(args))
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    return calls